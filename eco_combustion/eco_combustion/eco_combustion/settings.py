@@ -30,6 +30,8 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "plataforma.middleware.BloqueoPorNoVerificarEmailMiddleware",
+    "plataforma.middleware.RolesMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     # 3. Middleware para servir archivos estáticos correctamente en Render
@@ -73,6 +75,37 @@ else:
         "NAME": BASE_DIR / "db.sqlite3",
     }
 
+# Caché compartida por todos los workers de gunicorn: con LocMemCache cada
+# proceso tendría la suya y las invalidaciones (roles, tarifas de envío, clave
+# de los quizzes, páginas educativas) solo llegarían al worker que atendió el
+# cambio. Con REDIS_URL se usa Redis; si no, en producción la tabla
+# plataforma_cache de la base (la crea la migración 0018). En desarrollo, un
+# solo proceso: memoria local.
+# OJO: DatabaseCache es solo un respaldo. Cada lectura de la caché es un
+# SELECT (y cada escritura, varios): los roles del usuario, el ETag de las
+# páginas educativas y la clave de los quizzes cuestan al menos una consulta
+# SQL por request, así que en producción conviene definir REDIS_URL.
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+elif os.environ.get("DATABASE_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "plataforma_cache",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -106,3 +139,20 @@ STATICFILES_DIRS = [
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "plataforma.Usuario"
+
+# Las vistas marcadas con @presupuesto_consultas lanzan error (en vez de solo
+# registrar un warning) cuando superan su número máximo de consultas.
+PRESUPUESTO_CONSULTAS_ESTRICTO = False
+
+# Correo: las vistas solo encolan en plataforma.CorreoPendiente y el comando
+# `enviar_correos` los despacha. En desarrollo se imprimen en consola.
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend")
+EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", "587"))
+EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "1") == "1"
+DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "EcoCombustión <no-responder@ecocombustion.cl>")
+
+# URL pública del sitio, para los enlaces de los correos (el worker no tiene request)
+SITIO_URL = os.getenv("SITIO_URL", "http://localhost:8000")
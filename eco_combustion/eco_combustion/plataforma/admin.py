@@ -1,4 +1,8 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils import timezone
+
+from .calificaciones import recalcular_calificaciones
+from .solicitudes import resolver_solicitudes
 from .models import (
     Region,
     Comuna,
@@ -13,7 +17,11 @@ from .models import (
     ContenidoEducativo,
     QuizOpcion,
     QuizIntentoUsuario,
-    QuizPregunta
+    QuizPregunta,
+    CorreoPendiente,
+    ReservaStock,
+    Pedido,
+    LineaPedido,
 )
 
 
@@ -40,6 +48,29 @@ class SolicitudAdmin(admin.ModelAdmin):
     list_filter = ("estado", "tipo_solicitud")
     search_fields = ("usuario__username",)
     readonly_fields = ("fecha_envio", "fecha_resolucion")
+    list_select_related = ("usuario",)
+    # Mismo orden que la cola del panel, cubierto por los índices del modelo
+    ordering = ("-fecha_envio", "-id")
+    actions = ["aprobar", "rechazar"]
+
+    def _resolver(self, request, queryset, accion, verbo):
+        ids = list(queryset.values_list("pk", flat=True))
+        resultado = resolver_solicitudes(ids, accion)
+        self.message_user(request, f"Solicitudes {verbo}: {len(resultado.resueltas)}")
+        if resultado.omitidas:
+            self.message_user(
+                request,
+                f"Omitidas: {len(resultado.omitidas)} (ya resueltas o con RUT repetido)",
+                level=messages.WARNING,
+            )
+
+    @admin.action(description="Aprobar solicitudes pendientes seleccionadas")
+    def aprobar(self, request, queryset):
+        self._resolver(request, queryset, "aprobar", "aprobadas")
+
+    @admin.action(description="Rechazar solicitudes pendientes seleccionadas")
+    def rechazar(self, request, queryset):
+        self._resolver(request, queryset, "rechazar", "rechazadas")
 
 
 
@@ -110,6 +141,36 @@ class ResenaAdmin(admin.ModelAdmin):
     list_display = ("proveedor", "usuario", "puntaje", "visible", "fecha_creacion")
     list_filter = ("visible", "puntaje")
     search_fields = ("proveedor__nombre_comercial", "usuario__username")
+    readonly_fields = ("moderado_por", "fecha_moderacion")
+    actions = ["ocultar", "mostrar"]
+
+    def save_model(self, request, obj, form, change):
+        if change and "visible" in form.changed_data:
+            obj.moderado_por = request.user
+            obj.fecha_moderacion = timezone.now()
+        super().save_model(request, obj, form, change)
+
+    def _moderar(self, request, queryset, visible):
+        # queryset.update() no dispara señales: se recalcula el resumen de los
+        # proveedores afectados con un solo UPDATE
+        proveedor_ids = list(queryset.values_list("proveedor_id", flat=True).distinct())
+        cambiadas = queryset.exclude(visible=visible).update(
+            visible=visible,
+            moderado_por=request.user,
+            fecha_moderacion=timezone.now(),
+        )
+        recalcular_calificaciones(proveedor_ids)
+        return cambiadas
+
+    @admin.action(description="Ocultar reseñas seleccionadas")
+    def ocultar(self, request, queryset):
+        cambiadas = self._moderar(request, queryset, False)
+        self.message_user(request, f"Reseñas ocultadas: {cambiadas}")
+
+    @admin.action(description="Mostrar reseñas seleccionadas")
+    def mostrar(self, request, queryset):
+        cambiadas = self._moderar(request, queryset, True)
+        self.message_user(request, f"Reseñas visibles: {cambiadas}")
 
 
 # -----------------------------
@@ -145,3 +206,37 @@ class QuizIntentoAdmin(admin.ModelAdmin):
     list_display = ("usuario", "contenido", "puntaje_obtenido", "total_preguntas", "fecha_intento")
     list_filter = ("fecha_intento",)
     search_fields = ("usuario__username", "contenido__titulo")
+
+
+@admin.register(CorreoPendiente)
+class CorreoPendienteAdmin(admin.ModelAdmin):
+    list_display = ("destinatario", "asunto", "estado", "intentos", "proximo_intento", "fecha_envio")
+    list_filter = ("estado",)
+    search_fields = ("destinatario", "asunto")
+    readonly_fields = ("fecha_creacion", "fecha_envio", "ultimo_error")
+
+
+@admin.register(ReservaStock)
+class ReservaStockAdmin(admin.ModelAdmin):
+    list_display = ("producto", "usuario", "cantidad", "estado", "expira_en", "fecha_resolucion")
+    list_filter = ("estado",)
+    list_select_related = ("producto__proveedor", "usuario")
+    raw_id_fields = ("producto", "usuario")
+    readonly_fields = ("fecha_creacion", "fecha_resolucion")
+
+
+class LineaPedidoInline(admin.TabularInline):
+    model = LineaPedido
+    extra = 0
+    raw_id_fields = ("producto",)
+
+
+@admin.register(Pedido)
+class PedidoAdmin(admin.ModelAdmin):
+    list_display = ("id", "usuario", "proveedor", "estado", "total", "fecha_creacion")
+    list_filter = ("estado", "fecha_creacion")
+    list_select_related = ("usuario", "proveedor")
+    search_fields = ("usuario__username", "proveedor__nombre_comercial", "compra")
+    raw_id_fields = ("usuario", "proveedor", "comuna_destino")
+    readonly_fields = ("compra", "subtotal", "total", "fecha_creacion")
+    inlines = [LineaPedidoInline]
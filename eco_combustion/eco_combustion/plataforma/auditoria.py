@@ -0,0 +1,194 @@
+"""
+Auditoría de calidad de datos del marketplace.
+
+Cada tabla se lee con .values_list(...).iterator(chunk_size=...) (memoria
+acotada, cursor del lado del servidor en PostgreSQL) y cada bloque de filas
+se revisa en un pool de procesos. Las revisiones son funciones puras sobre
+tuplas: los procesos no tocan la base, solo devuelven los ids que fallan.
+El pool se crea con "spawn" para que los procesos no hereden la conexión
+abierta del proceso principal.
+"""
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
+
+from .models import UNIDADES_POR_FORMATO
+from .solicitudes import RUT_PROVISORIO
+from .validador import normalizar_rut, validar_ruts
+
+TAMANO_LOTE = 10_000
+MAX_MUESTRAS = 50
+
+REGLAS = {
+    "rut_provisorio": f"Proveedor con el RUT provisorio {RUT_PROVISORIO}.",
+    "rut_invalido": "RUT con formato o dígito verificador inválido.",
+    "rut_duplicado": "RUT sin forma normalizada: lo usa otro registro.",
+    "sin_coordenadas": "Proveedor sin latitud/longitud.",
+    "unidad_inconsistente": "Producto cuya unidad de medida no corresponde al formato.",
+    "comuna_sin_region": "Comuna sin región.",
+}
+
+
+# ---------- revisiones (corren en los procesos del pool) ----------
+
+
+def _revisar_ruts(filas, hallazgos):
+    """
+    filas: (pk, rut, rut_normalizado, ...)
+    """
+    resultados = validar_ruts(fila[1] for fila in filas)
+    for fila, resultado in zip(filas, resultados):
+        if not resultado.valido:
+            hallazgos["rut_invalido"].append(fila[0])
+        elif fila[2] is None:
+            hallazgos["rut_duplicado"].append(fila[0])
+
+
+def _revisar_usuarios(filas, hallazgos):
+    _revisar_ruts([fila for fila in filas if fila[1]], hallazgos)
+
+
+def _revisar_proveedores(filas, hallazgos):
+    provisorio = normalizar_rut(RUT_PROVISORIO)
+    _revisar_ruts(filas, hallazgos)
+    for pk, rut, rut_normalizado, latitud, longitud in filas:
+        if rut_normalizado == provisorio or rut == RUT_PROVISORIO:
+            hallazgos["rut_provisorio"].append(pk)
+        if latitud is None or longitud is None:
+            hallazgos["sin_coordenadas"].append(pk)
+
+
+def _revisar_productos(filas, hallazgos):
+    for pk, formato, unidad in filas:
+        permitidas = UNIDADES_POR_FORMATO.get(formato)
+        if permitidas is not None and unidad not in permitidas:
+            hallazgos["unidad_inconsistente"].append(pk)
+
+
+def _revisar_comunas(filas, hallazgos):
+    for pk, region_id in filas:
+        if region_id is None:
+            hallazgos["comuna_sin_region"].append(pk)
+
+
+# tabla: (modelo, columnas leídas, revisión, reglas que puede disparar)
+TABLAS = {
+    "usuario": (settings.AUTH_USER_MODEL, ("pk", "rut", "rut_normalizado"), _revisar_usuarios,
+                ("rut_invalido", "rut_duplicado")),
+    "proveedor": ("plataforma.Proveedor", ("pk", "rut", "rut_normalizado", "latitud", "longitud"),
+                  _revisar_proveedores,
+                  ("rut_provisorio", "rut_invalido", "rut_duplicado", "sin_coordenadas")),
+    "producto": ("plataforma.Producto", ("pk", "formato", "unidad_medida"), _revisar_productos,
+                 ("unidad_inconsistente",)),
+    "comuna": ("plataforma.Comuna", ("pk", "region_id"), _revisar_comunas, ("comuna_sin_region",)),
+}
+
+
+def revisar_lote(tabla, filas):
+    """
+    Aplica las revisiones de `tabla` a un bloque de filas. Devuelve
+    (tabla, filas revisadas, {regla: [ids]}).
+    """
+    _, _, revision, reglas = TABLAS[tabla]
+    hallazgos = {regla: [] for regla in reglas}
+    revision(filas, hallazgos)
+    return tabla, len(filas), hallazgos
+
+
+# ---------- lectura y reporte ----------
+
+
+def _lotes(tabla, tamano_lote):
+    modelo, columnas, _, _ = TABLAS[tabla]
+    filas = (
+        apps.get_model(modelo).objects
+        .order_by("pk")
+        .values_list(*columnas)
+        .iterator(chunk_size=tamano_lote)
+    )
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tamano_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+class _Reporte:
+    def __init__(self, tablas, max_muestras):
+        self.max_muestras = max_muestras
+        self.revisados = {tabla: 0 for tabla in tablas}
+        self.hallazgos = {}
+        for tabla in tablas:
+            for regla in TABLAS[tabla][3]:
+                self.hallazgos[(tabla, regla)] = {"total": 0, "ids": []}
+
+    def sumar(self, tabla, revisados, hallazgos):
+        self.revisados[tabla] += revisados
+        for regla, ids in hallazgos.items():
+            acumulado = self.hallazgos[(tabla, regla)]
+            acumulado["total"] += len(ids)
+            faltan = self.max_muestras - len(acumulado["ids"])
+            if faltan > 0:
+                acumulado["ids"].extend(ids[:faltan])
+
+    def como_dict(self, inicio):
+        return {
+            "generado": timezone.now().isoformat(),
+            "duracion_s": round((timezone.now() - inicio).total_seconds(), 2),
+            "tablas": {tabla: {"revisados": total} for tabla, total in self.revisados.items()},
+            "hallazgos": [
+                {
+                    "tabla": tabla,
+                    "regla": regla,
+                    "descripcion": REGLAS[regla],
+                    "total": acumulado["total"],
+                    "ids": sorted(acumulado["ids"]),
+                }
+                for (tabla, regla), acumulado in self.hallazgos.items()
+            ],
+        }
+
+
+def auditar(tablas=None, tamano_lote=TAMANO_LOTE, procesos=None, max_muestras=MAX_MUESTRAS):
+    """
+    Recorre las tablas y devuelve el reporte como dict (serializable a JSON).
+    Las revisiones corren en un pool de `procesos` (por defecto, uno por CPU);
+    con 0 o 1 corren en el proceso actual, que con una sola CPU es más rápido
+    que pagar el envío de cada bloque a otro proceso. En vuelo hay a lo sumo
+    dos bloques por proceso, así que la memoria no depende del tamaño de la base.
+    """
+    inicio = timezone.now()
+    tablas = list(tablas or TABLAS)
+    reporte = _Reporte(tablas, max_muestras)
+    if procesos is None:
+        procesos = os.cpu_count() or 1
+
+    if procesos <= 1:
+        for tabla in tablas:
+            for lote in _lotes(tabla, tamano_lote):
+                reporte.sumar(*revisar_lote(tabla, lote))
+        return reporte.como_dict(inicio)
+
+    pendientes = deque()
+    with ProcessPoolExecutor(
+        max_workers=procesos,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=django.setup,
+    ) as pool:
+        for tabla in tablas:
+            for lote in _lotes(tabla, tamano_lote):
+                pendientes.append(pool.submit(revisar_lote, tabla, lote))
+                if len(pendientes) >= 2 * procesos:
+                    reporte.sumar(*pendientes.popleft().result())
+        while pendientes:
+            reporte.sumar(*pendientes.popleft().result())
+    return reporte.como_dict(inicio)
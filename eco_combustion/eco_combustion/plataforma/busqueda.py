@@ -0,0 +1,306 @@
+"""
+Búsqueda de texto sobre productos, servicios y proveedores.
+
+- PostgreSQL: to_tsvector con la configuración `es_sin_acentos` (spanish +
+  unaccent) e índices GIN por expresión creados en la migración 0006.
+- SQLite: tabla virtual FTS5 `plataforma_busqueda_fts` (unicode61 sin
+  diacríticos) que se mantiene sincronizada con señales.
+"""
+import re
+from functools import lru_cache
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from django.urls import reverse
+from django.utils import translation
+from django.utils.translation import get_language
+
+from .models import Producto, Proveedor, Servicio
+
+TABLA_FTS = "plataforma_busqueda_fts"
+CONFIG_TS = "es_sin_acentos"
+
+
+def _tipo_producto_sql(columna):
+    """
+    CASE que traduce el código de tipo_producto a su etiqueta, como el título
+    que indexa FTS5. Sin traducir: el índice GIN es una expresión fija.
+    """
+    with translation.override(None):
+        casos = " ".join(
+            f"WHEN '{valor}' THEN '{etiqueta}'" for valor, etiqueta in Producto.TipoProducto.choices
+        )
+    return f"CASE {columna} {casos} ELSE {columna} END"
+
+
+# Deben coincidir exactamente con los índices GIN de las migraciones 0006 y 0019
+VECTORES_POSTGRES = {
+    "producto": (
+        "to_tsvector('es_sin_acentos', "
+        + _tipo_producto_sql('"plataforma_producto"."tipo_producto"')
+        + " || ' ' || coalesce(\"plataforma_producto\".\"especie\", '') "
+        "|| ' ' || coalesce(\"plataforma_producto\".\"descripcion\", ''))"
+    ),
+    "servicio": (
+        "to_tsvector('es_sin_acentos', coalesce(\"plataforma_servicio\".\"nombre\", '') "
+        "|| ' ' || coalesce(\"plataforma_servicio\".\"descripcion\", ''))"
+    ),
+    "proveedor": (
+        "to_tsvector('es_sin_acentos', coalesce(\"plataforma_proveedor\".\"nombre_comercial\", ''))"
+    ),
+}
+
+PALABRA = re.compile(r"\w+", re.UNICODE)
+
+
+def usa_fts5():
+    return connection.vendor == "sqlite"
+
+
+# ---------- documentos indexados ----------
+
+
+@lru_cache(maxsize=None)
+def _etiquetas_tipo_producto(idioma):
+    # get_FOO_display() resuelve la traducción perezosa en cada llamada; al
+    # indexar miles de productos conviene hacerlo una vez por idioma
+    return {valor: str(etiqueta) for valor, etiqueta in Producto.TipoProducto.choices}
+
+
+def _documento_producto(producto):
+    tipo = _etiquetas_tipo_producto(get_language()).get(producto.tipo_producto, producto.tipo_producto)
+    return (
+        f"{tipo} {producto.especie}".strip(),
+        producto.descripcion,
+    )
+
+
+def _documento_servicio(servicio):
+    return servicio.nombre, servicio.descripcion
+
+
+def _documento_proveedor(proveedor):
+    return proveedor.nombre_comercial, ""
+
+
+TIPOS = {
+    "producto": (Producto, _documento_producto),
+    "servicio": (Servicio, _documento_servicio),
+    "proveedor": (Proveedor, _documento_proveedor),
+}
+
+
+def _activos(tipo):
+    """Queryset de los objetos de `tipo` que deben aparecer en la búsqueda."""
+    if tipo == "proveedor":
+        return Proveedor.objects.filter(estado=Proveedor.EstadoProveedor.ACTIVO)
+    return TIPOS[tipo][0].objects.filter(activo=True).select_related("proveedor")
+
+
+def _indexable(tipo, objeto):
+    if tipo == "proveedor":
+        return objeto.estado == Proveedor.EstadoProveedor.ACTIVO
+    return objeto.activo
+
+
+def indexar(tipo, objeto):
+    """
+    Inserta o reemplaza el documento de `objeto` en el índice FTS5.
+    En PostgreSQL no hace nada: el índice GIN se mantiene solo.
+    """
+    if not usa_fts5():
+        return
+    desindexar(tipo, objeto.pk)
+    if not _indexable(tipo, objeto):
+        return
+    titulo, cuerpo = TIPOS[tipo][1](objeto)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {TABLA_FTS} (tipo, objeto_id, titulo, cuerpo) VALUES (%s, %s, %s, %s)",
+            [tipo, objeto.pk, titulo, cuerpo or ""],
+        )
+
+
+def desindexar(tipo, objeto_id):
+    if not usa_fts5():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {TABLA_FTS} WHERE tipo = %s AND objeto_id = %s",
+            [tipo, objeto_id],
+        )
+
+
+def desindexar_lote(tipo, objeto_ids):
+    """
+    Como desindexar(), para muchos objetos con un solo DELETE.
+    """
+    objeto_ids = list(objeto_ids)
+    if not usa_fts5() or not objeto_ids:
+        return
+    marcas = ", ".join(["%s"] * len(objeto_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {TABLA_FTS} WHERE tipo = %s AND objeto_id IN ({marcas})",
+            [tipo, *objeto_ids],
+        )
+
+
+def indexar_lote(tipo, objetos):
+    """
+    Como indexar(), para muchos objetos: un DELETE y un INSERT por lotes.
+    Se usa tras bulk_create/bulk_update, que no envían señales.
+    """
+    objetos = list(objetos)
+    if not usa_fts5() or not objetos:
+        return
+    desindexar_lote(tipo, [objeto.pk for objeto in objetos])
+    filas = [
+        (tipo, objeto.pk, *TIPOS[tipo][1](objeto))
+        for objeto in objetos
+        if _indexable(tipo, objeto)
+    ]
+    if not filas:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {TABLA_FTS} (tipo, objeto_id, titulo, cuerpo) VALUES (%s, %s, %s, %s)",
+            [(t, pk, titulo, cuerpo or "") for t, pk, titulo, cuerpo in filas],
+        )
+
+
+def reconstruir_indice(tamano_lote=2000, using=DEFAULT_DB_ALIAS):
+    """
+    Vuelve a llenar el índice FTS5 desde cero. Devuelve la cantidad de documentos.
+    Todo va en una transacción: en autocommit SQLite confirmaría (y
+    sincronizaría a disco) cada fila del executemany por separado.
+    """
+    if connections[using].vendor != "sqlite":
+        return 0
+
+    total = 0
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLA_FTS}")
+        for tipo, (modelo, documento) in TIPOS.items():
+            lote = []
+            for objeto in modelo.objects.using(using).order_by("pk").iterator(chunk_size=tamano_lote):
+                if not _indexable(tipo, objeto):
+                    continue
+                titulo, cuerpo = documento(objeto)
+                lote.append((tipo, objeto.pk, titulo, cuerpo or ""))
+                if len(lote) >= tamano_lote:
+                    cursor.executemany(
+                        f"INSERT INTO {TABLA_FTS} (tipo, objeto_id, titulo, cuerpo) VALUES (%s, %s, %s, %s)",
+                        lote,
+                    )
+                    total += len(lote)
+                    lote = []
+            if lote:
+                cursor.executemany(
+                    f"INSERT INTO {TABLA_FTS} (tipo, objeto_id, titulo, cuerpo) VALUES (%s, %s, %s, %s)",
+                    lote,
+                )
+                total += len(lote)
+    return total
+
+
+# ---------- consultas ----------
+
+
+def _raiz(palabra):
+    """
+    Stemming mínimo para FTS5 (que no trae uno en español): quita el plural.
+    """
+    palabra = palabra.lower()
+    if len(palabra) > 4 and palabra.endswith("es"):
+        return palabra[:-2]
+    if len(palabra) > 3 and palabra.endswith("s"):
+        return palabra[:-1]
+    return palabra
+
+
+def _consulta_fts5(texto):
+    """
+    "leñas secas" -> '"leña"* "seca"*' (AND de prefijos; los acentos los quita el tokenizer).
+    """
+    terminos = [_raiz(p) for p in PALABRA.findall(texto)]
+    return " ".join('"{}"*'.format(t.replace('"', '""')) for t in terminos if t)
+
+
+def _ids_fts5(texto, limite):
+    consulta = _consulta_fts5(texto)
+    if not consulta:
+        return []
+    with connection.cursor() as cursor:
+        # bm25: pesos por columna (tipo, objeto_id, titulo, cuerpo); menor = mejor
+        cursor.execute(
+            f"SELECT tipo, objeto_id, bm25({TABLA_FTS}, 0, 0, 4.0, 1.0) AS puntaje "
+            f"FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH %s ORDER BY puntaje LIMIT %s",
+            [consulta, limite],
+        )
+        return [(tipo, int(pk), -puntaje) for tipo, pk, puntaje in cursor.fetchall()]
+
+
+def _ids_postgres(texto, limite):
+    consulta = f"websearch_to_tsquery('{CONFIG_TS}', %s)"
+    resultados = []
+    for tipo in TIPOS:
+        vector = VECTORES_POSTGRES[tipo]
+        filas = (
+            _activos(tipo)
+            .filter(RawSQL(f"{vector} @@ {consulta}", (texto,), output_field=BooleanField()))
+            .annotate(puntaje=RawSQL(f"ts_rank({vector}, {consulta})", (texto,), output_field=FloatField()))
+            .order_by("-puntaje")
+            .values_list("pk", "puntaje")[:limite]
+        )
+        resultados.extend((tipo, pk, puntaje) for pk, puntaje in filas)
+    resultados.sort(key=lambda r: r[2], reverse=True)
+    return resultados[:limite]
+
+
+def _resultado(tipo, objeto, puntaje):
+    titulo, cuerpo = TIPOS[tipo][1](objeto)
+    if tipo == "proveedor":
+        url = reverse("plataforma:detalle_proveedor", args=[objeto.pk])
+        proveedor = objeto.nombre_comercial
+    else:
+        url = reverse("plataforma:detalle_proveedor", args=[objeto.proveedor_id])
+        proveedor = objeto.proveedor.nombre_comercial
+    return {
+        "tipo": tipo,
+        "id": objeto.pk,
+        "titulo": titulo,
+        "descripcion": cuerpo,
+        "proveedor": proveedor,
+        "url": url,
+        "puntaje": round(puntaje, 4),
+    }
+
+
+def buscar(texto, limite=20):
+    """
+    Busca `texto` en productos, servicios y proveedores activos.
+    Devuelve una lista de dicts ordenada por relevancia.
+    """
+    texto = (texto or "").strip()
+    if not texto:
+        return []
+
+    # Se piden algunos extra por si hay documentos que ya no están activos
+    encontrados = (_ids_fts5 if usa_fts5() else _ids_postgres)(texto, limite * 2)
+
+    por_tipo = {}
+    for tipo, pk, _ in encontrados:
+        por_tipo.setdefault(tipo, []).append(pk)
+
+    cargados = {
+        tipo: _activos(tipo).in_bulk(ids) for tipo, ids in por_tipo.items()
+    }
+
+    resultados = []
+    for tipo, pk, puntaje in encontrados:
+        objeto = cargados[tipo].get(pk)
+        if objeto is not None:
+            resultados.append(_resultado(tipo, objeto, puntaje))
+    return resultados[:limite]
@@ -0,0 +1,63 @@
+from django.db.models import Count, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+
+from .models import Proveedor, Resena
+
+
+def _promedio(suma, cantidad):
+    """
+    Expresión SQL de suma / cantidad con 2 decimales (0 si no hay reseñas).
+    Se castea a float para evitar la división entera de SQLite.
+    """
+    return Coalesce(
+        Round(Cast(suma, FloatField()) / NullIf(cantidad, 0), 2),
+        Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def aplicar_delta(proveedor_id, cantidad, suma):
+    """
+    Suma (o resta) reseñas al resumen del proveedor con un solo UPDATE atómico.
+    """
+    if not cantidad and not suma:
+        return
+    nueva_cantidad = F("resenas_cantidad") + cantidad
+    nueva_suma = F("resenas_suma") + suma
+    Proveedor.objects.filter(pk=proveedor_id).update(
+        resenas_cantidad=nueva_cantidad,
+        resenas_suma=nueva_suma,
+        calificacion_promedio=_promedio(nueva_suma, nueva_cantidad),
+    )
+
+
+def aporte(visible, puntaje):
+    """
+    (cantidad, suma) con que una reseña aporta al resumen de su proveedor.
+    """
+    return (1, puntaje) if visible else (0, 0)
+
+
+def recalcular_calificaciones(proveedor_ids=None):
+    """
+    Recalcula desde cero el resumen de los proveedores indicados (o de todos)
+    con un único UPDATE ... SET = (subconsulta). Devuelve las filas actualizadas.
+    """
+    visibles = Resena.objects.filter(proveedor=OuterRef("pk"), visible=True).order_by().values("proveedor")
+    cantidad = Coalesce(
+        Subquery(visibles.annotate(n=Count("*")).values("n"), output_field=IntegerField()),
+        0,
+    )
+    suma = Coalesce(
+        Subquery(visibles.annotate(s=Sum("puntaje")).values("s"), output_field=IntegerField()),
+        0,
+    )
+
+    proveedores = Proveedor.objects.all()
+    if proveedor_ids is not None:
+        proveedores = proveedores.filter(pk__in=proveedor_ids)
+    return proveedores.update(
+        resenas_cantidad=cantidad,
+        resenas_suma=suma,
+        calificacion_promedio=_promedio(suma, cantidad),
+    )
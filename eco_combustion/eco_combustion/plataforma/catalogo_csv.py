@@ -0,0 +1,384 @@
+"""
+Importación y exportación del catálogo de productos de un proveedor en CSV.
+
+- Importar: el archivo se lee fila a fila (sin cargarlo entero en memoria),
+  se valida contra los choices de Producto y se guarda por lotes: bulk_create
+  para las filas sin id y un UPDATE con executemany para las que traen el id
+  de un producto del proveedor. Las filas con errores se informan y no se
+  guardan; un archivo ilegible (codificación, CSV mal formado) no guarda nada.
+- Exportar: generador de líneas CSV sobre .iterator(), pensado para
+  StreamingHttpResponse.
+"""
+import csv
+import io
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import busqueda
+from .models import UNIDADES_POR_FORMATO, Comuna, Producto, Proveedor
+from .paginacion import ENTERO_MAX
+
+COLUMNAS = [
+    "id",
+    "tipo_producto",
+    "especie",
+    "contenido_humedad",
+    "formato",
+    "unidad_medida",
+    "precio_unitario",
+    "descripcion",
+    "comuna_id",
+    "stock_disponible",
+    "certificado_sncl",
+    "activo",
+]
+COLUMNAS_OBLIGATORIAS = ["tipo_producto", "formato", "unidad_medida", "precio_unitario"]
+
+# Campos que escribe una fila (el UPDATE no toca auto_now: se agrega aparte)
+CAMPOS_IMPORTABLES = [c for c in COLUMNAS if c != "id"]
+
+TAMANO_LOTE = 1000
+MAX_FILAS = 100_000
+# En la respuesta solo se detallan las primeras; el total se cuenta igual
+MAX_ERRORES_REPORTE = 500
+
+VERDADERO = {"1", "si", "sí", "s", "true", "verdadero", "x"}
+FALSO = {"0", "no", "n", "false", "falso", ""}
+
+
+def _opciones(choices):
+    """
+    {texto normalizado: valor} aceptando el código ("SACO_15") o la etiqueta ("Saco 15 kg").
+    """
+    opciones = {}
+    for valor, etiqueta in choices:
+        opciones[str(valor).lower()] = valor
+        opciones[str(etiqueta).lower()] = valor
+    return opciones
+
+
+OPCIONES = {
+    "tipo_producto": _opciones(Producto.TipoProducto.choices),
+    "formato": _opciones(Producto.FormatoProducto.choices),
+    "unidad_medida": _opciones(Producto.UnidadMedida.choices),
+}
+
+MAX_ESPECIE = Producto._meta.get_field("especie").max_length
+PRECIO_MAXIMO = Decimal(10) ** (
+    Producto._meta.get_field("precio_unitario").max_digits
+    - Producto._meta.get_field("precio_unitario").decimal_places
+)
+# stock_disponible es un IntegerField: 32 bits con signo en PostgreSQL
+STOCK_MAXIMO = 2 ** 31 - 1
+
+
+@dataclass
+class ResultadoImportacion:
+    creados: int = 0
+    actualizados: int = 0
+    filas_con_error: int = 0
+    # [(numero_fila, [mensajes])], hasta MAX_ERRORES_REPORTE
+    errores: list = field(default_factory=list)
+
+    def agregar_error(self, fila, mensajes):
+        self.filas_con_error += 1
+        if len(self.errores) < MAX_ERRORES_REPORTE:
+            self.errores.append((fila, mensajes))
+
+
+# ---------- validación de filas ----------
+
+
+def _texto(fila, columna):
+    return (fila.get(columna) or "").strip()
+
+
+def _entero(valor, nombre, errores, minimo=None, maximo=ENTERO_MAX):
+    if not valor:
+        return None
+    try:
+        numero = int(valor)
+    except ValueError:
+        errores.append(f"{nombre}: debe ser un número entero.")
+        return None
+    if minimo is not None and numero < minimo:
+        errores.append(f"{nombre}: no puede ser menor que {minimo}.")
+    if numero > maximo:
+        # La base de datos lo rechazaría con OverflowError en vez de un error de fila
+        errores.append(f"{nombre}: no puede ser mayor que {maximo}.")
+        return None
+    return numero
+
+
+def _booleano(valor, nombre, errores, defecto):
+    valor = valor.lower()
+    if not valor:
+        return defecto
+    if valor in VERDADERO:
+        return True
+    if valor in FALSO:
+        return False
+    errores.append(f"{nombre}: use sí/no.")
+    return defecto
+
+
+def validar_fila(fila, comunas, comuna_propia=None):
+    """
+    Convierte una fila del CSV (dict de texto) en (id, {campo: valor}, errores).
+    `comunas` es el conjunto de ids de comuna válidos. Con `comuna_propia`,
+    como en ProductoForm, el producto solo puede estar en esa comuna (y la
+    toma si la fila no trae comuna_id).
+    """
+    errores = []
+    datos = {}
+
+    for columna in COLUMNAS_OBLIGATORIAS:
+        if not _texto(fila, columna):
+            errores.append(f"{columna}: es obligatorio.")
+
+    for columna, opciones in OPCIONES.items():
+        valor = _texto(fila, columna)
+        if valor:
+            datos[columna] = opciones.get(valor.lower())
+            if datos[columna] is None:
+                errores.append(f"{columna}: '{valor}' no es una opción válida.")
+
+    formato, unidad = datos.get("formato"), datos.get("unidad_medida")
+    if formato and unidad and unidad not in UNIDADES_POR_FORMATO.get(formato, {unidad}):
+        errores.append(
+            f"unidad_medida: '{Producto.UnidadMedida(unidad).label}' no corresponde al "
+            f"formato '{Producto.FormatoProducto(formato).label}'."
+        )
+
+    datos["especie"] = _texto(fila, "especie")
+    if len(datos["especie"]) > MAX_ESPECIE:
+        errores.append(f"especie: máximo {MAX_ESPECIE} caracteres.")
+    datos["descripcion"] = _texto(fila, "descripcion")
+
+    precio = _texto(fila, "precio_unitario").replace(",", ".")
+    if precio:
+        try:
+            datos["precio_unitario"] = Decimal(precio).quantize(Decimal("0.01"))
+        except InvalidOperation:
+            errores.append("precio_unitario: debe ser un número.")
+        else:
+            # NaN e Infinity pasan por Decimal(), pero no se pueden comparar ni guardar
+            if not datos["precio_unitario"].is_finite():
+                errores.append("precio_unitario: debe ser un número.")
+            elif not 0 <= datos["precio_unitario"] < PRECIO_MAXIMO:
+                errores.append("precio_unitario: fuera de rango.")
+
+    humedad = _texto(fila, "contenido_humedad").replace(",", ".")
+    datos["contenido_humedad"] = None
+    if humedad:
+        try:
+            datos["contenido_humedad"] = float(humedad)
+        except ValueError:
+            errores.append("contenido_humedad: debe ser un número.")
+        else:
+            if not 0 <= datos["contenido_humedad"] <= 100:
+                errores.append("contenido_humedad: debe estar entre 0 y 100.")
+
+    datos["comuna_id"] = _entero(_texto(fila, "comuna_id"), "comuna_id", errores)
+    if datos["comuna_id"] is None:
+        datos["comuna_id"] = comuna_propia
+    elif datos["comuna_id"] not in comunas:
+        errores.append(f"comuna_id: la comuna {datos['comuna_id']} no existe.")
+    elif comuna_propia is not None and datos["comuna_id"] != comuna_propia:
+        errores.append(f"comuna_id: los productos van en tu comuna ({comuna_propia}).")
+    datos["stock_disponible"] = _entero(
+        _texto(fila, "stock_disponible"),
+        "stock_disponible",
+        errores,
+        minimo=0,
+        maximo=STOCK_MAXIMO,
+    )
+    datos["certificado_sncl"] = _booleano(
+        _texto(fila, "certificado_sncl"), "certificado_sncl", errores, defecto=True
+    )
+    datos["activo"] = _booleano(_texto(fila, "activo"), "activo", errores, defecto=True)
+
+    producto_id = _entero(_texto(fila, "id"), "id", errores, minimo=1)
+    return producto_id, datos, errores
+
+
+# ---------- importación ----------
+
+
+def _leer_csv(archivo):
+    """
+    DictReader sobre el archivo subido, detectando si el separador es ',' o ';'
+    (Excel en español guarda con ';').
+    """
+    texto = io.TextIOWrapper(archivo, encoding="utf-8-sig", newline="")
+    muestra = texto.readline()
+    try:
+        dialecto = csv.Sniffer().sniff(muestra, delimiters=",;")
+    except csv.Error:
+        dialecto = csv.excel
+    encabezado = next(csv.reader([muestra], dialecto), [])
+    lector = csv.DictReader(texto, fieldnames=[c.strip().lower() for c in encabezado], dialect=dialecto)
+    return lector
+
+
+def _actualizar(productos, campos):
+    """
+    UPDATE por fila con executemany: un statement preparado que se reutiliza.
+    bulk_update arma un CASE WHEN por campo que crece con el lote y en un
+    catálogo de decenas de miles de filas es órdenes de magnitud más lento.
+    """
+    if not productos:
+        return
+    fields = [Producto._meta.get_field(campo) for campo in campos]
+    asignaciones = ", ".join(f"{connection.ops.quote_name(f.column)} = %s" for f in fields)
+    sql = (
+        f"UPDATE {connection.ops.quote_name(Producto._meta.db_table)} SET {asignaciones} "
+        f"WHERE {connection.ops.quote_name(Producto._meta.pk.column)} = %s"
+    )
+    filas = [
+        [f.get_db_prep_save(getattr(producto, f.attname), connection) for f in fields] + [producto.pk]
+        for producto in productos
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, filas)
+
+
+def _guardar_lote(proveedor_id, lote, resultado):
+    """
+    lote: [(numero_fila, producto_id, datos)] ya validados.
+    """
+    ids = {producto_id for _, producto_id, _ in lote if producto_id}
+    existentes = Producto.objects.filter(proveedor_id=proveedor_id, pk__in=ids).in_bulk()
+
+    nuevos, actualizados = [], []
+    ahora = timezone.now()
+    for numero, producto_id, datos in lote:
+        if producto_id is None:
+            nuevos.append(Producto(proveedor_id=proveedor_id, **datos))
+            continue
+        producto = existentes.get(producto_id)
+        if producto is None:
+            resultado.agregar_error(numero, [f"id: el producto {producto_id} no existe en tu catálogo."])
+            continue
+        for campo, valor in datos.items():
+            setattr(producto, campo, valor)
+        producto.fecha_actualizacion = ahora
+        actualizados.append(producto)
+
+    Producto.objects.bulk_create(nuevos, batch_size=TAMANO_LOTE)
+    _actualizar(actualizados, CAMPOS_IMPORTABLES + ["fecha_actualizacion"])
+    # Las operaciones en lote no envían señales. El índice FTS5 vive en la misma
+    # base, así que se actualiza dentro de la transacción y sin juntar todo el archivo.
+    busqueda.indexar_lote("producto", nuevos + actualizados)
+
+    resultado.creados += len(nuevos)
+    resultado.actualizados += len(actualizados)
+
+
+def _comuna_propia(proveedor_id):
+    """
+    La comuna que ProductoForm fija para los productos: la del usuario dueño
+    y, si no tiene, la del proveedor.
+    """
+    comunas = Proveedor.objects.filter(pk=proveedor_id).values_list("usuario__comuna_id", "comuna_id").first()
+    if comunas is None:
+        return None
+    return comunas[0] or comunas[1]
+
+
+def _archivo_invalido(resultado, numero, mensaje):
+    resultado.creados = resultado.actualizados = 0
+    resultado.agregar_error(numero, [mensaje + " No se guardó ninguna fila."])
+
+
+def importar_productos(proveedor_id, archivo):
+    """
+    Importa un CSV de productos al catálogo del proveedor. Crea las filas sin
+    id y actualiza las que traen el id de un producto propio. Todo el archivo
+    se guarda en una transacción: si no se puede leer hasta el final, no se
+    guarda ninguna fila. Devuelve un ResultadoImportacion.
+    """
+    resultado = ResultadoImportacion()
+    comunas = set(Comuna.objects.values_list("id", flat=True))
+    comuna_propia = _comuna_propia(proveedor_id)
+    # Última fila leída; la 1 es el encabezado
+    numero = 0
+    try:
+        with transaction.atomic():
+            lector = _leer_csv(archivo)
+            numero = 1
+            faltantes = [c for c in COLUMNAS_OBLIGATORIAS if c not in (lector.fieldnames or [])]
+            if faltantes:
+                resultado.agregar_error(1, [f"Faltan columnas: {', '.join(faltantes)}."])
+                return resultado
+
+            lote = []
+            vistos = set()
+            for numero, fila in enumerate(lector, start=2):
+                if numero - 1 > MAX_FILAS:
+                    resultado.agregar_error(numero, [f"Máximo {MAX_FILAS} filas por archivo; el resto se ignoró."])
+                    break
+                producto_id, datos, errores = validar_fila(fila, comunas, comuna_propia)
+                if producto_id is not None:
+                    if producto_id in vistos:
+                        errores.append(f"id: el producto {producto_id} aparece más de una vez.")
+                    vistos.add(producto_id)
+                if errores:
+                    resultado.agregar_error(numero, errores)
+                    continue
+                lote.append((numero, producto_id, datos))
+                if len(lote) >= TAMANO_LOTE:
+                    _guardar_lote(proveedor_id, lote, resultado)
+                    lote = []
+            if lote:
+                _guardar_lote(proveedor_id, lote, resultado)
+    # La excepción sale del atomic(): se revierten también los lotes ya guardados
+    except UnicodeDecodeError:
+        _archivo_invalido(
+            resultado, numero + 1, "El archivo debe estar codificado en UTF-8 (guárdelo como «CSV UTF-8»)."
+        )
+    except csv.Error as error:
+        _archivo_invalido(resultado, numero + 1, f"CSV mal formado: {error}")
+    return resultado
+
+
+# ---------- exportación ----------
+
+
+class _Eco:
+    """
+    "Archivo" que devuelve lo que se le escribe, para usar csv.writer como generador.
+    """
+
+    def write(self, valor):
+        return valor
+
+
+def _celda(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, bool):
+        return "si" if valor else "no"
+    return valor
+
+
+def exportar_productos(proveedor_id, tamano_lote=2000):
+    """
+    Genera el catálogo del proveedor como líneas CSV (con las mismas columnas
+    que acepta la importación), leyendo la base de a `tamano_lote` filas.
+    """
+    escritor = csv.writer(_Eco())
+    # BOM para que Excel reconozca el UTF-8
+    yield "\ufeff" + escritor.writerow(COLUMNAS)
+    filas = (
+        Producto.objects
+        .filter(proveedor_id=proveedor_id)
+        .order_by("pk")
+        .values_list(*COLUMNAS)
+        .iterator(chunk_size=tamano_lote)
+    )
+    for fila in filas:
+        yield escritor.writerow([_celda(valor) for valor in fila])
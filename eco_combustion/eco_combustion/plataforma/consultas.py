@@ -0,0 +1,64 @@
+import logging
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class PresupuestoConsultasExcedido(AssertionError):
+    pass
+
+
+class ContadorConsultas:
+    """
+    execute_wrapper que cuenta las consultas SQL ejecutadas mientras está activo.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.sql = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        self.sql.append(sql)
+        return execute(sql, params, many, context)
+
+
+def presupuesto_consultas(maximo):
+    """
+    Decorador para vistas: cuenta las consultas de la vista (incluido el
+    render del template) y avisa si se pasa de `maximo`.
+
+    Con settings.PRESUPUESTO_CONSULTAS_ESTRICTO = True (se usa en los tests)
+    lanza PresupuestoConsultasExcedido; si no, solo deja un warning en el log.
+    """
+
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            contador = ContadorConsultas()
+            with connection.execute_wrapper(contador):
+                respuesta = vista(request, *args, **kwargs)
+                # Las TemplateResponse consultan al renderizar
+                if hasattr(respuesta, "render") and not respuesta.is_rendered:
+                    respuesta.render()
+
+            if contador.total > maximo:
+                mensaje = (
+                    f"{vista.__name__} ejecutó {contador.total} consultas "
+                    f"(presupuesto: {maximo})."
+                )
+                if getattr(settings, "PRESUPUESTO_CONSULTAS_ESTRICTO", False):
+                    raise PresupuestoConsultasExcedido(
+                        mensaje + "\n" + "\n".join(contador.sql)
+                    )
+                logger.warning(mensaje)
+
+            return respuesta
+
+        envoltura.presupuesto_consultas = maximo
+        return envoltura
+
+    return decorador
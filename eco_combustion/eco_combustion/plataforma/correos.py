@@ -0,0 +1,192 @@
+"""
+Bandeja de salida de correos.
+
+Las vistas no envían correo: guardan un CorreoPendiente (en la misma
+transacción que el cambio que lo origina) y el comando `enviar_correos`
+los despacha por lotes usando una sola conexión SMTP, reintentando con
+backoff exponencial los que fallan.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection, transaction
+from django.template import TemplateDoesNotExist
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .models import CorreoPendiente
+from .tokens import email_verification_token
+
+logger = logging.getLogger(__name__)
+
+MAX_INTENTOS = 6
+BACKOFF_BASE = timedelta(minutes=1)
+BACKOFF_MAXIMO = timedelta(hours=6)
+# Mientras un worker envía un lote, esos correos quedan reservados este tiempo
+RESERVA_LOTE = timedelta(minutes=10)
+
+
+def url_sitio(ruta):
+    return settings.SITIO_URL.rstrip("/") + ruta
+
+
+def preparar(destinatario, asunto, plantilla, contexto):
+    """
+    CorreoPendiente sin guardar, con el cuerpo renderizado desde
+    plataforma/correos/<plantilla>.txt (y .html si existe).
+    """
+    contexto = {"sitio_url": settings.SITIO_URL, **contexto}
+    cuerpo_texto = render_to_string(f"plataforma/correos/{plantilla}.txt", contexto)
+    try:
+        cuerpo_html = render_to_string(f"plataforma/correos/{plantilla}.html", contexto)
+    except TemplateDoesNotExist:
+        cuerpo_html = ""
+    return CorreoPendiente(
+        destinatario=destinatario,
+        asunto=asunto,
+        cuerpo_texto=cuerpo_texto,
+        cuerpo_html=cuerpo_html,
+    )
+
+
+def encolar(destinatario, asunto, plantilla, contexto):
+    correo = preparar(destinatario, asunto, plantilla, contexto)
+    correo.save()
+    return correo
+
+
+def encolar_lote(correos):
+    """
+    Guarda muchos CorreoPendiente (de preparar()) con un solo INSERT.
+    """
+    return CorreoPendiente.objects.bulk_create(correos)
+
+
+# ---------- correos de la plataforma ----------
+
+
+def url_verificacion(usuario):
+    uid = urlsafe_base64_encode(force_bytes(usuario.pk))
+    token = email_verification_token.make_token(usuario)
+    return url_sitio(reverse("plataforma:verificar_email", args=[uid, token]))
+
+
+def encolar_verificacion(usuario):
+    if not usuario.email:
+        return None
+    return encolar(
+        usuario.email,
+        "Confirma tu correo en EcoCombustión",
+        "verificacion_email",
+        {"usuario": usuario, "url": url_verificacion(usuario)},
+    )
+
+
+def preparar_resolucion_solicitud(solicitud, aprobada):
+    """
+    Aviso al usuario de que su solicitud de rol comercial fue resuelta.
+    """
+    return preparar(
+        solicitud.usuario.email,
+        "Tu solicitud comercial fue aprobada" if aprobada else "Tu solicitud comercial fue revisada",
+        "solicitud_aprobada" if aprobada else "solicitud_rechazada",
+        {
+            "usuario": solicitud.usuario,
+            "solicitud": solicitud,
+            "url": url_sitio(reverse("plataforma:configuracion_cuenta")),
+        },
+    )
+
+
+# ---------- worker ----------
+
+
+def espera_reintento(intentos):
+    """
+    Backoff exponencial: 1, 2, 4, 8... minutos, con tope.
+    """
+    return min(BACKOFF_BASE * (2 ** max(intentos - 1, 0)), BACKOFF_MAXIMO)
+
+
+def _reservar_lote(tamano):
+    """
+    Toma hasta `tamano` correos vencidos y los reserva corriendo su
+    proximo_intento, para que otro worker no los envíe en paralelo.
+    """
+    ahora = timezone.now()
+    with transaction.atomic():
+        vencidos = CorreoPendiente.objects.filter(
+            estado=CorreoPendiente.EstadoCorreo.PENDIENTE,
+            proximo_intento__lte=ahora,
+        ).order_by("proximo_intento", "id")
+        if connection.features.has_select_for_update_skip_locked:
+            vencidos = vencidos.select_for_update(skip_locked=True)
+        ids = list(vencidos.values_list("id", flat=True)[:tamano])
+        CorreoPendiente.objects.filter(pk__in=ids).update(proximo_intento=ahora + RESERVA_LOTE)
+    return list(CorreoPendiente.objects.filter(pk__in=ids).order_by("id"))
+
+
+def _registrar_fallo(correo, error, ahora):
+    correo.intentos += 1
+    correo.ultimo_error = str(error)[:1000]
+    if correo.intentos >= MAX_INTENTOS:
+        correo.estado = CorreoPendiente.EstadoCorreo.FALLIDO
+    else:
+        correo.proximo_intento = ahora + espera_reintento(correo.intentos)
+
+
+def enviar_pendientes(tamano_lote=100):
+    """
+    Envía un lote de correos pendientes por una sola conexión. Devuelve
+    (enviados, fallidos) de esta pasada.
+    """
+    correos = _reservar_lote(tamano_lote)
+    if not correos:
+        return 0, 0
+
+    enviados = fallidos = 0
+    ahora = timezone.now()
+    conexion = get_connection(fail_silently=False)
+    try:
+        conexion.open()
+    except Exception as error:
+        # Sin conexión no se puede enviar nada: todo el lote vuelve a la cola
+        logger.warning("No se pudo abrir la conexión de correo: %s", error)
+        for correo in correos:
+            _registrar_fallo(correo, error, ahora)
+        fallidos = len(correos)
+    else:
+        try:
+            for correo in correos:
+                mensaje = EmailMultiAlternatives(
+                    subject=correo.asunto,
+                    body=correo.cuerpo_texto,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    to=[correo.destinatario],
+                    connection=conexion,
+                )
+                if correo.cuerpo_html:
+                    mensaje.attach_alternative(correo.cuerpo_html, "text/html")
+                try:
+                    mensaje.send()
+                except Exception as error:
+                    logger.warning("Falló el envío del correo %s: %s", correo.pk, error)
+                    _registrar_fallo(correo, error, ahora)
+                    fallidos += 1
+                else:
+                    correo.estado = CorreoPendiente.EstadoCorreo.ENVIADO
+                    correo.fecha_envio = timezone.now()
+                    correo.intentos += 1
+                    enviados += 1
+        finally:
+            conexion.close()
+
+    CorreoPendiente.objects.bulk_update(
+        correos, ["estado", "intentos", "proximo_intento", "ultimo_error", "fecha_envio"]
+    )
+    return enviados, fallidos
@@ -0,0 +1,86 @@
+"""
+Metadatos cacheados del contenido educativo para responder GET condicionales
+(ETag / Last-Modified) sin tocar la base de datos. Las señales de
+ContenidoEducativo los invalidan al guardar o borrar.
+"""
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .markdown_html import compilar_markdown
+from .models import ContenidoEducativo
+
+CACHE_CONTENIDO = "educativo:{}"
+CACHE_LISTA = "educativo_lista"
+CACHE_EDUCATIVO_TIMEOUT = 60 * 60 * 24
+
+# Marca para slugs inexistentes o inactivos (None no se distingue de "no está en caché")
+NO_DISPONIBLE = "-"
+
+
+def _clave_contenido(slug):
+    return CACHE_CONTENIDO.format(slug)
+
+
+def metadatos_contenido(slug):
+    """
+    (id, fecha_actualizacion, cantidad de preguntas) del contenido activo con
+    ese slug, o None. Las señales de QuizPregunta también los invalidan.
+    """
+    clave = _clave_contenido(slug)
+    meta = cache.get(clave)
+    if meta is None:
+        fila = (
+            ContenidoEducativo.objects
+            .filter(slug=slug, activo=True)
+            .annotate(total_preguntas=Count("preguntas"))
+            .values_list("id", "fecha_actualizacion", "total_preguntas")
+            .first()
+        )
+        meta = fila or NO_DISPONIBLE
+        cache.set(clave, meta, CACHE_EDUCATIVO_TIMEOUT)
+    return None if meta == NO_DISPONIBLE else meta
+
+
+def metadatos_lista():
+    """
+    (cantidad, última actualización) de los contenidos activos. La cantidad
+    cubre los borrados y desactivaciones, que no mueven la fecha máxima.
+    """
+    meta = cache.get(CACHE_LISTA)
+    if meta is None:
+        resumen = ContenidoEducativo.objects.filter(activo=True).aggregate(
+            cantidad=Count("*"), actualizado=Max("fecha_actualizacion")
+        )
+        meta = (resumen["cantidad"], resumen["actualizado"])
+        cache.set(CACHE_LISTA, meta, CACHE_EDUCATIVO_TIMEOUT)
+    return meta
+
+
+def invalidar_contenido(*slugs):
+    cache.delete_many([_clave_contenido(slug) for slug in slugs] + [CACHE_LISTA])
+
+
+def recompilar_contenidos(tamano_lote=500):
+    """
+    Vuelve a compilar `texto_html` de todos los contenidos (p. ej. al cambiar el
+    renderizador). Solo escribe los que cambian, con bulk_update por lotes, y les
+    mueve la fecha de edición para que ETags y fragmentos en caché se renueven.
+    Devuelve la cantidad de contenidos actualizados.
+    """
+    ahora = timezone.now()
+    cambiados = []
+    filas = ContenidoEducativo.objects.order_by("pk").only("id", "slug", "texto", "texto_html")
+    for contenido in filas.iterator(chunk_size=tamano_lote):
+        html = compilar_markdown(contenido.texto)
+        if html != contenido.texto_html:
+            contenido.texto_html = html
+            contenido.fecha_actualizacion = ahora
+            cambiados.append(contenido)
+
+    # bulk_update no envía señales: se invalida la caché a mano
+    ContenidoEducativo.objects.bulk_update(
+        cambiados, ["texto_html", "fecha_actualizacion"], batch_size=tamano_lote
+    )
+    invalidar_contenido(*[contenido.slug for contenido in cambiados])
+    return len(cambiados)
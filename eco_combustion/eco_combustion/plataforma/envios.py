@@ -0,0 +1,109 @@
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.core.cache import cache
+
+from .geo import haversine_km
+from .models import Producto, TarifaEnvio
+
+CACHE_TARIFAS = "tarifas_envio:{}"
+CACHE_TARIFAS_TIMEOUT = 60 * 60
+
+
+def _clave_tarifas(proveedor_id):
+    return CACHE_TARIFAS.format(proveedor_id)
+
+
+def tarifas_por_proveedor(proveedor_ids):
+    """
+    Tarifas activas de cada proveedor como {proveedor_id: [(comuna_id, por_km, minima)]}.
+    Lo que no está en caché se trae con una sola consulta para todos los proveedores.
+    """
+    claves = {_clave_tarifas(pk): pk for pk in proveedor_ids}
+    en_cache = cache.get_many(list(claves))
+    resultado = {claves[clave]: tarifas for clave, tarifas in en_cache.items()}
+
+    faltantes = [pk for pk in proveedor_ids if pk not in resultado]
+    if faltantes:
+        nuevas = defaultdict(list)
+        filas = TarifaEnvio.objects.filter(
+            proveedor_id__in=faltantes, activo=True
+        ).order_by("id").values_list("proveedor_id", "comuna_id", "tarifa_por_km", "tarifa_minima")
+        for proveedor_id, comuna_id, por_km, minima in filas:
+            nuevas[proveedor_id].append((comuna_id, por_km, minima))
+
+        # También se cachean los proveedores sin tarifas, para no volver a consultarlos
+        por_guardar = {pk: nuevas.get(pk, []) for pk in faltantes}
+        cache.set_many(
+            {_clave_tarifas(pk): tarifas for pk, tarifas in por_guardar.items()},
+            CACHE_TARIFAS_TIMEOUT,
+        )
+        resultado.update(por_guardar)
+
+    return resultado
+
+
+def invalidar_tarifas(proveedor_id):
+    cache.delete(_clave_tarifas(proveedor_id))
+
+
+def elegir_tarifa(tarifas, comuna_id=None):
+    """
+    La tarifa más específica: primero la de la comuna de destino, luego la general
+    del proveedor (comuna vacía). None si el proveedor no despacha a esa comuna.
+    """
+    general = None
+    for tarifa in tarifas:
+        if comuna_id is not None and tarifa[0] == comuna_id:
+            return tarifa
+        if tarifa[0] is None and general is None:
+            general = tarifa
+    return general
+
+
+def costo_envio(tarifa, distancia_km):
+    _, por_km, minima = tarifa
+    costo = por_km * Decimal(str(distancia_km))
+    return max(minima, costo).quantize(Decimal("1"), rounding=ROUND_HALF_UP)
+
+
+def cotizar_envio(lat, lon, producto_ids, comuna_id=None):
+    """
+    Cotiza el despacho de una lista de productos a un punto (lat, lon).
+    Se agrupa por proveedor: un envío por proveedor, con su tarifa más específica
+    y la distancia desde la ubicación del proveedor.
+
+    Devuelve {"envios": [...], "total": Decimal, "sin_cobertura": [proveedor_id, ...]}.
+    """
+    productos = (
+        Producto.objects
+        .filter(pk__in=producto_ids, activo=True)
+        .values_list("proveedor_id", "proveedor__nombre_comercial", "proveedor__latitud", "proveedor__longitud")
+        .distinct()
+    )
+    proveedores = {pk: (nombre, p_lat, p_lon) for pk, nombre, p_lat, p_lon in productos}
+    tarifas = tarifas_por_proveedor(list(proveedores))
+
+    envios = []
+    sin_cobertura = []
+    total = Decimal("0")
+    for proveedor_id, (nombre, p_lat, p_lon) in sorted(proveedores.items()):
+        tarifa = elegir_tarifa(tarifas.get(proveedor_id, []), comuna_id)
+        if tarifa is None or p_lat is None or p_lon is None:
+            sin_cobertura.append(proveedor_id)
+            continue
+
+        distancia = round(haversine_km(p_lat, p_lon, lat, lon), 2)
+        costo = costo_envio(tarifa, distancia)
+        total += costo
+        envios.append({
+            "proveedor_id": proveedor_id,
+            "proveedor": nombre,
+            "distancia_km": distancia,
+            "tarifa_comuna": tarifa[0] is not None,
+            "tarifa_por_km": tarifa[1],
+            "tarifa_minima": tarifa[2],
+            "costo": costo,
+        })
+
+    return {"envios": envios, "total": total, "sin_cobertura": sin_cobertura}
@@ -0,0 +1,209 @@
+"""
+Corrección de quizzes en el servidor.
+
+La clave de respuestas de cada contenido se arma con una sola consulta y se
+guarda en caché; las señales de QuizPregunta/QuizOpcion la invalidan.
+
+Cada intento además suma a las tablas de estadísticas (QuizEstadistica,
+QuizDistribucionPuntaje, QuizEstadisticaPregunta) con UPDATEs de contadores,
+así el reporte no depende de cuántos intentos haya.
+"""
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import (
+    QuizDistribucionPuntaje,
+    QuizEstadistica,
+    QuizEstadisticaPregunta,
+    QuizIntentoUsuario,
+    QuizPregunta,
+)
+
+CACHE_CLAVE_QUIZ = "quiz_clave:{}"
+CACHE_CLAVE_QUIZ_TIMEOUT = 60 * 60 * 24
+
+
+def _clave_cache(contenido_id):
+    return CACHE_CLAVE_QUIZ.format(contenido_id)
+
+
+def clave_respuestas(contenido_id):
+    """
+    {pregunta_id: (opciones_validas, opciones_correctas)} como frozensets de ids.
+    Las preguntas sin ninguna opción correcta no se pueden corregir y quedan fuera.
+    """
+    clave = cache.get(_clave_cache(contenido_id))
+    if clave is not None:
+        return clave
+
+    opciones = {}
+    correctas = {}
+    filas = QuizPregunta.objects.filter(contenido_id=contenido_id).values_list(
+        "id", "opciones__id", "opciones__es_correcta"
+    )
+    for pregunta_id, opcion_id, es_correcta in filas:
+        if opcion_id is None:
+            continue
+        opciones.setdefault(pregunta_id, set()).add(opcion_id)
+        if es_correcta:
+            correctas.setdefault(pregunta_id, set()).add(opcion_id)
+
+    clave = {
+        pregunta_id: (frozenset(opciones[pregunta_id]), frozenset(ids))
+        for pregunta_id, ids in correctas.items()
+    }
+    cache.set(_clave_cache(contenido_id), clave, CACHE_CLAVE_QUIZ_TIMEOUT)
+    return clave
+
+
+def invalidar_clave(contenido_id):
+    cache.delete(_clave_cache(contenido_id))
+
+
+def respuestas_desde_post(clave, datos):
+    """
+    Lee los campos `pregunta_<id>` del POST y devuelve {pregunta_id: [opcion_id, ...]}
+    solo con opciones que pertenecen a su pregunta.
+    """
+    respuestas = {}
+    for pregunta_id, (validas, _) in clave.items():
+        elegidas = set()
+        for valor in datos.getlist(f"pregunta_{pregunta_id}"):
+            try:
+                opcion_id = int(valor)
+            except (TypeError, ValueError):
+                continue
+            if opcion_id in validas:
+                elegidas.add(opcion_id)
+        respuestas[pregunta_id] = sorted(elegidas)
+    return respuestas
+
+
+def preguntas_correctas(clave, respuestas):
+    """
+    Ids de las preguntas bien respondidas. Las preguntas son de una sola respuesta:
+    es correcta si se eligió alguna opción y todas las elegidas son correctas.
+    """
+    correctas = set()
+    for pregunta_id, (_, opciones_correctas) in clave.items():
+        elegidas = respuestas.get(pregunta_id)
+        if elegidas and opciones_correctas.issuperset(elegidas):
+            correctas.add(pregunta_id)
+    return correctas
+
+
+# ---------- estadísticas ----------
+
+
+def _incrementar(modelo, filas, **deltas):
+    """
+    Suma `deltas` a las filas de `modelo` identificadas por `filas` (dicts con
+    sus campos únicos), creándolas en cero si no existen. INSERT ... ON CONFLICT
+    DO NOTHING seguido de un UPDATE con F(): no hay carreras entre intentos simultáneos.
+    """
+    if not filas:
+        return
+    modelo.objects.bulk_create([modelo(**fila) for fila in filas], ignore_conflicts=True)
+    filtro = Q()
+    for fila in filas:
+        filtro |= Q(**fila)
+    modelo.objects.filter(filtro).update(**{campo: F(campo) + valor for campo, valor in deltas.items()})
+
+
+def sumar_a_estadisticas(contenido_id, puntaje, total, respondidas, correctas):
+    """
+    Agrega un intento a los resúmenes del contenido y de cada pregunta respondida.
+    """
+    _incrementar(
+        QuizEstadistica,
+        [{"contenido_id": contenido_id}],
+        intentos=1,
+        suma_puntajes=puntaje,
+        suma_preguntas=total,
+    )
+    _incrementar(
+        QuizDistribucionPuntaje,
+        [{"contenido_id": contenido_id, "puntaje": puntaje}],
+        cantidad=1,
+    )
+    _incrementar(
+        QuizEstadisticaPregunta,
+        [{"pregunta_id": pk} for pk in sorted(correctas)],
+        respondidas=1,
+        correctas=1,
+    )
+    _incrementar(
+        QuizEstadisticaPregunta,
+        [{"pregunta_id": pk} for pk in sorted(set(respondidas) - correctas)],
+        respondidas=1,
+    )
+
+
+def recalcular_estadisticas(contenido_id, tamano_lote=2000):
+    """
+    Rehace desde QuizIntentoUsuario los resúmenes de un contenido. El acierto
+    por pregunta se vuelve a corregir con la clave actual a partir de las
+    respuestas guardadas (los intentos sin respuestas solo cuentan en el total).
+    """
+    intentos = QuizIntentoUsuario.objects.filter(contenido_id=contenido_id)
+    totales = intentos.aggregate(
+        intentos=Count("*"), suma_puntajes=Sum("puntaje_obtenido"), suma_preguntas=Sum("total_preguntas")
+    )
+    distribucion = intentos.order_by().values("puntaje_obtenido").annotate(cantidad=Count("*"))
+
+    clave = clave_respuestas(contenido_id)
+    respondidas = Counter()
+    acertadas = Counter()
+    for guardadas in intentos.values_list("respuestas", flat=True).iterator(chunk_size=tamano_lote):
+        respuestas = {int(pk): ids for pk, ids in (guardadas or {}).items() if ids and int(pk) in clave}
+        respondidas.update(respuestas.keys())
+        acertadas.update(preguntas_correctas(clave, respuestas))
+
+    with transaction.atomic():
+        QuizEstadistica.objects.update_or_create(
+            contenido_id=contenido_id,
+            defaults={
+                "intentos": totales["intentos"],
+                "suma_puntajes": totales["suma_puntajes"] or 0,
+                "suma_preguntas": totales["suma_preguntas"] or 0,
+            },
+        )
+        QuizDistribucionPuntaje.objects.filter(contenido_id=contenido_id).delete()
+        QuizDistribucionPuntaje.objects.bulk_create([
+            QuizDistribucionPuntaje(
+                contenido_id=contenido_id, puntaje=fila["puntaje_obtenido"], cantidad=fila["cantidad"]
+            )
+            for fila in distribucion
+        ])
+        QuizEstadisticaPregunta.objects.filter(pregunta__contenido_id=contenido_id).delete()
+        QuizEstadisticaPregunta.objects.bulk_create([
+            QuizEstadisticaPregunta(pregunta_id=pk, respondidas=n, correctas=acertadas[pk])
+            for pk, n in respondidas.items()
+        ])
+    return totales["intentos"]
+
+
+def registrar_intento(usuario, contenido_id, datos):
+    """
+    Corrige el intento completo, lo guarda con un único INSERT y lo suma a las estadísticas.
+    """
+    clave = clave_respuestas(contenido_id)
+    respuestas = respuestas_desde_post(clave, datos)
+    correctas = preguntas_correctas(clave, respuestas)
+    puntaje, total = len(correctas), len(clave)
+    with transaction.atomic():
+        intento = QuizIntentoUsuario.objects.create(
+            usuario=usuario,
+            contenido_id=contenido_id,
+            puntaje_obtenido=puntaje,
+            total_preguntas=total,
+            # Las claves JSON son texto
+            respuestas={str(pk): ids for pk, ids in respuestas.items()},
+        )
+        sumar_a_estadisticas(
+            contenido_id, puntaje, total, [pk for pk, ids in respuestas.items() if ids], correctas
+        )
+    return intento
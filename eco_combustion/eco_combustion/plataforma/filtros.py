@@ -0,0 +1,105 @@
+from django.db.models import Count
+
+from .models import Producto, Servicio, SolicitudRolComercial
+
+# Parámetro GET -> lookup del ORM
+FILTROS_PRODUCTO = {
+    "tipo_producto": "tipo_producto",
+    "formato": "formato",
+    "unidad_medida": "unidad_medida",
+    "comuna": "comuna_id",
+    "certificado_sncl": "certificado_sncl",
+    "precio_min": "precio_unitario__gte",
+    "precio_max": "precio_unitario__lte",
+    "humedad_min": "contenido_humedad__gte",
+    "humedad_max": "contenido_humedad__lte",
+    "calificacion_min": "proveedor__calificacion_promedio__gte",
+}
+
+FILTROS_SERVICIO = {
+    "tipo_servicio": "tipo_servicio",
+    "comuna": "comunas_cobertura",
+    "calificacion_min": "proveedor__calificacion_promedio__gte",
+}
+
+# Valor del parámetro `orden` -> orden keyset (el último campo debe ser único)
+ORDENES_CATALOGO = {
+    "recientes": ("-id",),
+    "calificacion": ("-proveedor__calificacion_promedio", "-id"),
+}
+ORDEN_CATALOGO_DEFECTO = "recientes"
+
+FILTROS_SOLICITUD = {
+    "estado": "estado",
+    "tipo_solicitud": "tipo_solicitud",
+}
+
+ETIQUETAS_SI_NO = {True: "Sí", False: "No"}
+
+# (parámetro, campo agrupado, etiquetas: dict de choices o campo con el nombre)
+FACETAS_PRODUCTO = [
+    ("tipo_producto", "tipo_producto", dict(Producto.TipoProducto.choices)),
+    ("formato", "formato", dict(Producto.FormatoProducto.choices)),
+    ("unidad_medida", "unidad_medida", dict(Producto.UnidadMedida.choices)),
+    ("comuna", "comuna", "comuna__nombre"),
+    ("certificado_sncl", "certificado_sncl", ETIQUETAS_SI_NO),
+]
+
+FACETAS_SERVICIO = [
+    ("tipo_servicio", "tipo_servicio", dict(Servicio.TipoServicio.choices)),
+    ("comuna", "comunas_cobertura", "comunas_cobertura__nombre"),
+]
+
+
+def _valor_param(valor):
+    """
+    Valor de la faceta tal como se manda de vuelta en el parámetro GET.
+    """
+    if isinstance(valor, bool):
+        return "true" if valor else "false"
+    return str(valor)
+
+
+def filtrar(queryset, lookups, datos, excluir=None):
+    """
+    Aplica los filtros presentes en `datos` (cleaned_data de un formulario de filtros).
+    `excluir` deja fuera un parámetro, para contar esa faceta con el resto de filtros.
+    """
+    condiciones = {
+        lookups[nombre]: valor
+        for nombre, valor in datos.items()
+        if nombre in lookups and nombre != excluir and valor not in (None, "")
+    }
+    return queryset.filter(**condiciones)
+
+
+def contar_facetas(queryset, lookups, facetas, datos):
+    """
+    Una consulta GROUP BY por faceta. Cada faceta se cuenta aplicando todos
+    los filtros menos el suyo, para que el usuario vea las alternativas.
+    """
+    resultado = {}
+    for nombre, campo, etiquetas in facetas:
+        columnas = [campo] if isinstance(etiquetas, dict) else [campo, etiquetas]
+        # COUNT(*) (y no COUNT(id)) deja que el índice compuesto resuelva el conteo solo
+        filas = (
+            filtrar(queryset, lookups, datos, excluir=nombre)
+            .order_by()
+            .values(*columnas)
+            .annotate(total=Count("*"))
+            .order_by("-total")
+        )
+
+        opciones = []
+        for fila in filas:
+            valor = fila[campo]
+            if valor is None:
+                continue
+            etiqueta = etiquetas.get(valor, valor) if isinstance(etiquetas, dict) else fila[etiquetas]
+            opciones.append({
+                "valor": _valor_param(valor),
+                "etiqueta": etiqueta,
+                "total": fila["total"],
+            })
+        resultado[nombre] = opciones
+    return resultado
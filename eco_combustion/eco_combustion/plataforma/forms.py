@@ -11,6 +11,7 @@ from .models import (
     Region,
     ContenidoEducativo,
 )
+from .paginacion import ENTERO_MAX
 
 
 class RegistroUsuarioForm(UserCreationForm):
@@ -201,3 +202,168 @@ class ContenidoEducativoForm(ModelForm):
             "tema",
             "activo",
         ]
+
+
+# ----------------- FILTROS DEL CATÁLOGO -----------------
+
+
+ORDEN_CATALOGO_CHOICES = [
+    ("recientes", "Más recientes"),
+    ("calificacion", "Mejor calificados"),
+]
+
+
+class FiltroProductoForm(forms.Form):
+    """
+    Valida los parámetros GET del catálogo de productos. Todos son opcionales.
+    """
+
+    tipo_producto = forms.ChoiceField(
+        choices=[("", "Todos")] + Producto.TipoProducto.choices, required=False
+    )
+    formato = forms.ChoiceField(
+        choices=[("", "Todos")] + Producto.FormatoProducto.choices, required=False
+    )
+    unidad_medida = forms.ChoiceField(
+        choices=[("", "Todas")] + Producto.UnidadMedida.choices, required=False
+    )
+    comuna = forms.IntegerField(required=False, min_value=1, max_value=ENTERO_MAX)
+    certificado_sncl = forms.NullBooleanField(required=False)
+    precio_min = forms.DecimalField(required=False, min_value=0, max_digits=12, decimal_places=2)
+    precio_max = forms.DecimalField(required=False, min_value=0, max_digits=12, decimal_places=2)
+    humedad_min = forms.FloatField(required=False, min_value=0, max_value=100)
+    humedad_max = forms.FloatField(required=False, min_value=0, max_value=100)
+    calificacion_min = forms.DecimalField(required=False, min_value=1, max_value=5, decimal_places=2)
+    orden = forms.ChoiceField(choices=ORDEN_CATALOGO_CHOICES, required=False)
+
+
+class FiltroServicioForm(forms.Form):
+    """
+    Valida los parámetros GET del catálogo de servicios. `comuna` filtra por cobertura.
+    """
+
+    tipo_servicio = forms.ChoiceField(
+        choices=[("", "Todos")] + Servicio.TipoServicio.choices, required=False
+    )
+    comuna = forms.IntegerField(required=False, min_value=1, max_value=ENTERO_MAX)
+    calificacion_min = forms.DecimalField(required=False, min_value=1, max_value=5, decimal_places=2)
+    orden = forms.ChoiceField(choices=ORDEN_CATALOGO_CHOICES, required=False)
+
+
+class FiltroSolicitudesForm(forms.Form):
+    """
+    Filtros de la cola de solicitudes del panel admin.
+    """
+
+    estado = forms.ChoiceField(
+        choices=[("", "Todos")] + SolicitudRolComercial.EstadoSolicitud.choices, required=False
+    )
+    tipo_solicitud = forms.ChoiceField(
+        choices=[("", "Todos")] + SolicitudRolComercial.TipoSolicitud.choices, required=False
+    )
+
+
+class UbicacionForm(forms.Form):
+    """
+    Punto opcional (lat/lon). Si no viene, las vistas usan la ubicación
+    guardada en el perfil del usuario.
+    """
+
+    lat = forms.FloatField(required=False, min_value=-90, max_value=90)
+    lon = forms.FloatField(required=False, min_value=-180, max_value=180)
+
+    def clean(self):
+        datos = super().clean()
+        if (datos.get("lat") is None) != (datos.get("lon") is None):
+            raise forms.ValidationError("Debes indicar latitud y longitud juntas.")
+        return datos
+
+
+class BusquedaCercanaForm(UbicacionForm):
+    """
+    Punto y radio para la búsqueda "cerca de mí".
+    """
+
+    radio_km = forms.FloatField(required=False, min_value=0.1, max_value=500)
+    limite = forms.IntegerField(required=False, min_value=1, max_value=100)
+
+
+class CotizacionEnvioForm(UbicacionForm):
+    """
+    Destino del despacho y productos a cotizar (`productos=1,2,3`).
+    """
+
+    comuna = forms.IntegerField(required=False, min_value=1, max_value=ENTERO_MAX)
+    productos = forms.CharField()
+
+    MAX_PRODUCTOS = 200
+
+    def clean_productos(self):
+        try:
+            ids = {int(pk) for pk in self.cleaned_data["productos"].split(",") if pk.strip()}
+        except ValueError:
+            raise forms.ValidationError("Los productos deben ser ids separados por coma.")
+        if not ids:
+            raise forms.ValidationError("Indica al menos un producto.")
+        if not all(1 <= pk <= ENTERO_MAX for pk in ids):
+            raise forms.ValidationError("Hay ids de producto fuera de rango.")
+        if len(ids) > self.MAX_PRODUCTOS:
+            raise forms.ValidationError(f"Máximo {self.MAX_PRODUCTOS} productos por cotización.")
+        return sorted(ids)
+
+
+class CantidadCarritoForm(forms.Form):
+    """
+    Unidades de un producto en el carrito (0 lo quita).
+    """
+
+    MAX_CANTIDAD = 10_000
+
+    cantidad = forms.IntegerField(min_value=0, max_value=MAX_CANTIDAD, initial=1)
+
+
+class CheckoutForm(UbicacionForm):
+    """
+    Destino del despacho. Sin lat/lon se usa la ubicación del perfil.
+    """
+
+    comuna = forms.IntegerField(required=False, min_value=1, max_value=ENTERO_MAX)
+
+
+class ImportarProductosForm(forms.Form):
+    """
+    Archivo CSV con el catálogo de productos (ver plataforma.catalogo_csv.COLUMNAS).
+    """
+
+    archivo = forms.FileField(label="Archivo CSV")
+
+    def clean_archivo(self):
+        archivo = self.cleaned_data["archivo"]
+        if not archivo.name.lower().endswith(".csv"):
+            raise forms.ValidationError("El archivo debe ser .csv (en Excel: Guardar como → CSV UTF-8).")
+        return archivo
+
+
+class ResolucionSolicitudesForm(forms.Form):
+    """
+    Resolución en lote de solicitudes de rol comercial (`ids=1,2,3`).
+    """
+
+    ids = forms.CharField()
+    accion = forms.ChoiceField(choices=[("aprobar", "Aprobar"), ("rechazar", "Rechazar")])
+    comentario = forms.CharField(required=False, widget=forms.Textarea)
+
+    MAX_SOLICITUDES = 1000
+
+    def clean_ids(self):
+        try:
+            ids = {int(pk) for pk in self.cleaned_data["ids"].split(",") if pk.strip()}
+        except ValueError:
+            raise forms.ValidationError("Las solicitudes deben ser ids separados por coma.")
+        if not ids:
+            raise forms.ValidationError("Indica al menos una solicitud.")
+        if not all(1 <= pk <= ENTERO_MAX for pk in ids):
+            raise forms.ValidationError("Hay ids de solicitud fuera de rango.")
+        if len(ids) > self.MAX_SOLICITUDES:
+            raise forms.ValidationError(f"Máximo {self.MAX_SOLICITUDES} solicitudes por lote.")
+        return sorted(ids)
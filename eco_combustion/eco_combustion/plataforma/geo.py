@@ -0,0 +1,105 @@
+import math
+
+from django.db.models import Case, Exists, IntegerField, OuterRef, Q, Value, When
+
+from .models import Producto, Proveedor
+
+RADIO_TIERRA_KM = 6371.0088
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Distancia en km sobre la esfera entre dos puntos (grados decimales).
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def filtro_caja(lat, lon, radio_km, campo_lat="latitud", campo_lon="longitud"):
+    """
+    Q con la caja (lat/lon) que contiene el círculo de radio `radio_km`.
+    Es un prefiltro barato que usa el índice; la distancia real se calcula después.
+    """
+    # Mismo radio terrestre que haversine_km, así la caja nunca recorta puntos del círculo
+    angulo = radio_km / RADIO_TIERRA_KM
+    dlat = math.degrees(angulo)
+    lat_min, lat_max = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+
+    cos_lat = math.cos(math.radians(lat))
+    if lat_min <= -90.0 or lat_max >= 90.0 or math.sin(angulo) >= cos_lat:
+        # Cerca de un polo (o con un radio enorme) la caja abarca todas las longitudes
+        return Q(**{f"{campo_lat}__range": (lat_min, lat_max)})
+
+    # Máxima diferencia de longitud de un punto del círculo (no la del paralelo central)
+    dlon = math.degrees(math.asin(math.sin(angulo) / cos_lat))
+    lon_min, lon_max = lon - dlon, lon + dlon
+
+    filtro = Q(**{f"{campo_lat}__range": (lat_min, lat_max)})
+    if lon_min < -180.0:
+        return filtro & (
+            Q(**{f"{campo_lon}__gte": lon_min + 360.0}) | Q(**{f"{campo_lon}__lte": lon_max})
+        )
+    if lon_max > 180.0:
+        return filtro & (
+            Q(**{f"{campo_lon}__gte": lon_min}) | Q(**{f"{campo_lon}__lte": lon_max - 360.0})
+        )
+    return filtro & Q(**{f"{campo_lon}__range": (lon_min, lon_max)})
+
+
+def _cercanos(queryset, lat, lon, radio_km, limite):
+    """
+    Devuelve [(id, distancia_km)] ordenado por distancia. Solo trae id/lat/lon
+    de los candidatos de la caja, así la memoria no depende del tamaño de la tabla.
+    """
+    candidatos = queryset.filter(filtro_caja(lat, lon, radio_km)).values_list(
+        "id", "latitud", "longitud"
+    )
+    distancias = []
+    for pk, lat2, lon2 in candidatos.iterator(chunk_size=2000):
+        distancia = haversine_km(lat, lon, lat2, lon2)
+        if distancia <= radio_km:
+            distancias.append((pk, distancia))
+    distancias.sort(key=lambda par: par[1])
+    return distancias[:limite] if limite else distancias
+
+
+def proveedores_cercanos(lat, lon, radio_km, limite=50):
+    """
+    Proveedores ACTIVOS a menos de `radio_km` del punto, del más cercano al más lejano.
+    Devuelve una lista de (proveedor, distancia_km).
+    """
+    activos = Proveedor.objects.filter(estado=Proveedor.EstadoProveedor.ACTIVO)
+    distancias = _cercanos(activos, lat, lon, radio_km, limite)
+    proveedores = Proveedor.objects.select_related("comuna").in_bulk([pk for pk, _ in distancias])
+    return [(proveedores[pk], distancia) for pk, distancia in distancias if pk in proveedores]
+
+
+def productos_cercanos(lat, lon, radio_km, limite=50):
+    """
+    Productos activos de proveedores cercanos, ordenados por la distancia a su proveedor.
+    Devuelve una lista de (producto, distancia_km).
+    """
+    con_productos = Proveedor.objects.filter(
+        Exists(Producto.objects.filter(proveedor=OuterRef("pk"), activo=True)),
+        estado=Proveedor.EstadoProveedor.ACTIVO,
+        es_proveedor_biocombustible=True,
+    )
+    # Cada proveedor aporta al menos un producto, así que basta con los `limite` más cercanos
+    distancias = dict(_cercanos(con_productos, lat, lon, radio_km, limite))
+    if not distancias:
+        return []
+
+    ranking = Case(
+        *[When(proveedor_id=pk, then=Value(i)) for i, pk in enumerate(distancias)],
+        output_field=IntegerField(),
+    )
+    productos = (
+        Producto.objects
+        .filter(activo=True, proveedor_id__in=distancias)
+        .select_related("proveedor", "comuna")
+        .order_by(ranking, "-id")[:limite]
+    )
+    return [(p, distancias[p.proveedor_id]) for p in productos]
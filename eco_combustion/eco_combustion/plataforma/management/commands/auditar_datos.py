@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from plataforma.auditoria import MAX_MUESTRAS, TABLAS, TAMANO_LOTE, auditar
+
+
+class Command(BaseCommand):
+    help = (
+        "Audita la calidad de los datos (RUT provisorios o inválidos, proveedores "
+        "sin coordenadas, unidades que no calzan con el formato, comunas sin "
+        "región) leyendo cada tabla por bloques y revisándolos en paralelo. "
+        "Escribe un reporte JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tabla", action="append", choices=sorted(TABLAS), help="Solo estas tablas (repetible).")
+        parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Filas por bloque.")
+        parser.add_argument(
+            "--procesos", type=int, default=None,
+            help="Procesos del pool (por defecto uno por CPU; 0 o 1 revisa en el proceso actual).",
+        )
+        parser.add_argument("--muestras", type=int, default=MAX_MUESTRAS, help="Ids listados por regla.")
+        parser.add_argument("--salida", help="Archivo donde escribir el JSON (por defecto, la salida estándar).")
+        parser.add_argument("--estricto", action="store_true", help="Termina con error si hay hallazgos.")
+
+    def handle(self, *args, **options):
+        if options["lote"] < 1:
+            raise CommandError("--lote debe ser positivo.")
+        reporte = auditar(
+            tablas=options["tabla"],
+            tamano_lote=options["lote"],
+            procesos=options["procesos"],
+            max_muestras=options["muestras"],
+        )
+        texto = json.dumps(reporte, ensure_ascii=False, indent=2)
+        if options["salida"]:
+            with open(options["salida"], "w", encoding="utf-8") as archivo:
+                archivo.write(texto + "\n")
+        else:
+            self.stdout.write(texto)
+
+        total = sum(hallazgo["total"] for hallazgo in reporte["hallazgos"])
+        if options["estricto"] and total:
+            raise CommandError(f"La auditoría encontró {total} problemas.")
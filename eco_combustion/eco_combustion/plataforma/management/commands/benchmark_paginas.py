@@ -0,0 +1,52 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from plataforma.rendimiento import REPETICIONES, UMBRAL, comparar, medir
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide catálogo, detalle de proveedor, comunas por región y detalle "
+        "educativo con el cliente de pruebas: consultas SQL y latencia p50/p95. "
+        "Con --guardar escribe la línea base; con --comparar falla si alguna "
+        "página empeoró más que el umbral respecto de ella."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeticiones", type=int, default=REPETICIONES)
+        parser.add_argument("--guardar", help="Archivo JSON donde guardar el resultado como línea base.")
+        parser.add_argument("--comparar", help="Línea base JSON contra la que comparar.")
+        parser.add_argument(
+            "--umbral", type=float, default=UMBRAL,
+            help="Aumento tolerado del p95 (0.25 = 25%%).",
+        )
+
+    def handle(self, *args, **options):
+        if options["repeticiones"] < 2:
+            raise CommandError("--repeticiones debe ser al menos 2.")
+        base = None
+        if options["comparar"]:
+            try:
+                with open(options["comparar"], encoding="utf-8") as archivo:
+                    base = json.load(archivo)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"No se pudo leer la línea base: {e}")
+
+        resultado = medir(repeticiones=options["repeticiones"])
+        for nombre, medida in resultado["paginas"].items():
+            self.stdout.write(
+                f"{nombre:24} {medida['consultas']:3} consultas  p50 {medida['p50_ms']:8.2f} ms  "
+                f"p95 {medida['p95_ms']:8.2f} ms  primera {medida['primera_ms']:8.2f} ms"
+            )
+        if options["guardar"]:
+            with open(options["guardar"], "w", encoding="utf-8") as archivo:
+                json.dump(resultado, archivo, ensure_ascii=False, indent=2)
+                archivo.write("\n")
+            self.stdout.write(f"Línea base guardada en {options['guardar']}")
+
+        if base is not None:
+            regresiones = comparar(resultado, base, umbral=options["umbral"])
+            if regresiones:
+                raise CommandError("Regresiones de rendimiento:\n" + "\n".join(regresiones))
+            self.stdout.write(self.style.SUCCESS("Sin regresiones respecto de la línea base."))
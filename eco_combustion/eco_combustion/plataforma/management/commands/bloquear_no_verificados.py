@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from plataforma.models import Usuario
+
+
+class Command(BaseCommand):
+    help = (
+        "Marca como bloqueados, con un solo UPDATE, a los usuarios que no "
+        "verificaron su correo dentro del plazo. Pensado para correr en un cron."
+    )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - Usuario.PLAZO_VERIFICACION
+        bloqueados = Usuario.objects.filter(
+            email_verificado=False,
+            bloqueado=False,
+            is_staff=False,
+            is_superuser=False,
+            date_joined__lt=limite,
+        ).update(bloqueado=True)
+        self.stdout.write(self.style.SUCCESS(f"Usuarios bloqueados: {bloqueados}"))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from plataforma.correos import enviar_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        "Envía los correos pendientes de la bandeja de salida por lotes, con una "
+        "conexión por lote. Con --continuo queda corriendo como worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=100, help="Correos por conexión.")
+        parser.add_argument("--continuo", action="store_true", help="No terminar: seguir revisando la cola.")
+        parser.add_argument("--intervalo", type=float, default=5.0, help="Segundos de espera con la cola vacía.")
+
+    def handle(self, *args, **options):
+        total_enviados = total_fallidos = 0
+        while True:
+            enviados, fallidos = enviar_pendientes(tamano_lote=options["lote"])
+            total_enviados += enviados
+            total_fallidos += fallidos
+            if enviados or fallidos:
+                self.stdout.write(f"Lote: {enviados} enviados, {fallidos} con error")
+            # Un lote incompleto significa que la cola quedó al día
+            if enviados + fallidos < options["lote"]:
+                if not options["continuo"]:
+                    break
+                time.sleep(options["intervalo"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Correos enviados: {total_enviados}, con error: {total_fallidos}")
+        )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from plataforma.stock import TAMANO_LOTE_BARRIDO, liberar_vencidas
+
+
+class Command(BaseCommand):
+    help = (
+        "Libera las reservas de stock vencidas y devuelve sus unidades a los "
+        "productos, por lotes. Pensado para correr en un cron cada pocos minutos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=TAMANO_LOTE_BARRIDO, help="Reservas por transacción.")
+
+    def handle(self, *args, **options):
+        liberadas, unidades = liberar_vencidas(tamano_lote=options["lote"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Reservas liberadas: {liberadas} ({unidades} unidades devueltas)")
+        )
@@ -0,0 +1,100 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from plataforma.models import Producto, ReservaStock
+from plataforma.stock import StockInsuficiente, reservar, unidades_reservadas
+
+# SQLite no encola escrituras concurrentes: responde "database is locked"
+MAX_REINTENTOS = 50
+ESPERA_REINTENTO = 0.01
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga de reservas: N hilos reservan a la vez el mismo producto "
+        "y se verifica que no haya sobreventa. Crea y borra sus reservas y al "
+        "terminar devuelve el producto a su stock original; no usar contra la "
+        "base de producción."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--producto", type=int, required=True, help="Id del producto a reservar.")
+        parser.add_argument("--concurrencia", type=int, default=200, help="Reservas simultáneas.")
+        parser.add_argument("--stock", type=int, default=100, help="Stock con que parte el producto.")
+        parser.add_argument("--cantidad", type=int, default=1, help="Unidades por reserva.")
+        parser.add_argument(
+            "--conservar", action="store_true", help="No borrar las reservas ni restaurar el stock al terminar.",
+        )
+
+    def _reservar(self, barrera, producto_id, cantidad):
+        """
+        Una reserva desde un hilo con su propia conexión. Devuelve
+        (resultado, reintentos, segundos) con resultado "ok", "sin_stock" o "error".
+        """
+        barrera.wait()
+        inicio = time.perf_counter()
+        try:
+            for reintento in range(MAX_REINTENTOS):
+                try:
+                    reservar(producto_id, cantidad)
+                    return "ok", reintento, time.perf_counter() - inicio
+                except StockInsuficiente:
+                    return "sin_stock", reintento, time.perf_counter() - inicio
+                except OperationalError:
+                    time.sleep(ESPERA_REINTENTO * (reintento + 1))
+            return "error", MAX_REINTENTOS, time.perf_counter() - inicio
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        producto_id = options["producto"]
+        concurrencia = options["concurrencia"]
+        cantidad = options["cantidad"]
+        stock_inicial = options["stock"]
+        producto = Producto.objects.filter(pk=producto_id, activo=True).values("stock_disponible").first()
+        if producto is None:
+            raise CommandError(f"No existe un producto activo con id {producto_id}.")
+        if unidades_reservadas(producto_id):
+            raise CommandError("El producto ya tiene reservas activas; usa un producto de prueba.")
+
+        id_maximo = ReservaStock.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+        try:
+            Producto.objects.filter(pk=producto_id).update(stock_disponible=stock_inicial)
+            barrera = threading.Barrier(concurrencia)
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+                resultados = list(pool.map(
+                    lambda _: self._reservar(barrera, producto_id, cantidad), range(concurrencia)
+                ))
+            duracion = time.perf_counter() - inicio
+            stock_final = Producto.objects.values_list("stock_disponible", flat=True).get(pk=producto_id)
+            reservado = unidades_reservadas(producto_id)
+        finally:
+            # También si la prueba se corta: el stock real (NULL = sin control) no se pierde
+            if not options["conservar"]:
+                ReservaStock.objects.filter(pk__gt=id_maximo, producto_id=producto_id).delete()
+                Producto.objects.filter(pk=producto_id).update(stock_disponible=producto["stock_disponible"])
+
+        ok = sum(1 for r, _, _ in resultados if r == "ok")
+        sin_stock = sum(1 for r, _, _ in resultados if r == "sin_stock")
+        errores = sum(1 for r, _, _ in resultados if r == "error")
+        reintentos = sum(n for _, n, _ in resultados)
+        latencias = sorted(s for _, _, s in resultados)
+
+        self.stdout.write(f"Reservas: {ok} ok, {sin_stock} sin stock, {errores} con error ({reintentos} reintentos)")
+        self.stdout.write(
+            f"Tiempo: {duracion:.2f} s, {concurrencia / duracion:.0f} reservas/s, "
+            f"p50 {latencias[len(latencias) // 2] * 1000:.0f} ms, p99 {latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))] * 1000:.0f} ms"
+        )
+        self.stdout.write(f"Stock: {stock_inicial} inicial, {stock_final} final, {reservado} reservado")
+
+        sobreventa = stock_final < 0 or stock_final + reservado != stock_inicial
+        # Sin errores de conexión, tienen que haber salido todas las que alcanzaban
+        perdidas = not errores and ok != min(concurrencia, stock_inicial // cantidad)
+        if sobreventa or perdidas:
+            raise CommandError("Inconsistencia de stock: hubo sobreventa o reservas perdidas.")
+        self.stdout.write(self.style.SUCCESS("Sin sobreventa."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from plataforma.calificaciones import recalcular_calificaciones
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula desde las reseñas visibles el resumen de calificaciones de "
+        "los proveedores (cantidad, suma y promedio) con un solo UPDATE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "proveedores", nargs="*", type=int, help="Ids de proveedor (por defecto, todos)."
+        )
+
+    def handle(self, *args, **options):
+        actualizados = recalcular_calificaciones(options["proveedores"] or None)
+        self.stdout.write(self.style.SUCCESS(f"Proveedores actualizados: {actualizados}"))
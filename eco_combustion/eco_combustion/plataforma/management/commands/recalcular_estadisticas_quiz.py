@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from plataforma.evaluacion import recalcular_estadisticas
+from plataforma.models import ContenidoEducativo
+
+
+class Command(BaseCommand):
+    help = (
+        "Rehace las estadísticas de quiz (intentos, distribución de puntajes y "
+        "acierto por pregunta) a partir de los intentos guardados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "contenidos", nargs="*", type=int, help="Ids de contenido (por defecto, todos)."
+        )
+
+    def handle(self, *args, **options):
+        contenidos = ContenidoEducativo.objects.order_by("pk")
+        if options["contenidos"]:
+            contenidos = contenidos.filter(pk__in=options["contenidos"])
+
+        total = 0
+        for contenido_id in contenidos.values_list("pk", flat=True):
+            total += recalcular_estadisticas(contenido_id)
+        self.stdout.write(self.style.SUCCESS(f"Intentos procesados: {total}"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from plataforma.educativo import recompilar_contenidos
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompila el Markdown de todos los contenidos educativos a texto_html. "
+        "Correr después de cambiar el renderizador (markdown_html.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=500, help="Filas por UPDATE.")
+
+    def handle(self, *args, **options):
+        total = recompilar_contenidos(tamano_lote=options["lote"])
+        self.stdout.write(self.style.SUCCESS(f"Contenidos recompilados: {total}"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from plataforma import busqueda
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye el índice de búsqueda FTS5 (SQLite). En PostgreSQL los "
+        "índices GIN se mantienen solos y el comando no hace nada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=2000, help="Filas por INSERT.")
+
+    def handle(self, *args, **options):
+        if not busqueda.usa_fts5():
+            self.stdout.write("La base no es SQLite: no hay índice FTS5 que reconstruir.")
+            return
+        total = busqueda.reconstruir_indice(tamano_lote=options["lote"])
+        self.stdout.write(self.style.SUCCESS(f"Documentos indexados: {total}"))
@@ -0,0 +1,112 @@
+import os
+import shutil
+import subprocess
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from plataforma.snapshot import MAX_PROVEEDORES, MAX_USUARIOS, anonimizar, exportar_snapshot
+
+ARCHIVO_POR_DEFECTO = settings.BASE_DIR.parent.parent / "ecocombustion.backup"
+
+
+class Command(BaseCommand):
+    help = (
+        "Restaura un archivo de pg_dump (formato custom) en la base PostgreSQL "
+        "configurada con pg_restore en paralelo, aplica las migraciones pendientes "
+        "y anonimiza los datos personales. Con --snapshot además escribe un "
+        "subconjunto anonimizado en un archivo SQLite para desarrollo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("archivo", nargs="?", default=str(ARCHIVO_POR_DEFECTO), help="Archivo de pg_dump -Fc.")
+        parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Procesos de pg_restore.")
+        parser.add_argument(
+            "--sin-restaurar", action="store_true",
+            help="No restaura: solo arma el snapshot desde la base actual.",
+        )
+        parser.add_argument("--sin-anonimizar", action="store_true", help="Conserva los datos personales.")
+        parser.add_argument("--clave", help="Contraseña para todas las cuentas (por defecto, inutilizable).")
+        parser.add_argument("--snapshot", help="Ruta del SQLite a generar (se reemplaza si existe).")
+        parser.add_argument("--proveedores", type=int, default=MAX_PROVEEDORES, help="Proveedores del snapshot.")
+        parser.add_argument("--usuarios", type=int, default=MAX_USUARIOS, help="Consumidores del snapshot.")
+        parser.add_argument("--noinput", "--no-input", action="store_false", dest="interactive")
+
+    def handle(self, *args, **options):
+        if options["sin_restaurar"] and not options["snapshot"]:
+            raise CommandError("Con --sin-restaurar hay que indicar --snapshot.")
+
+        if not options["sin_restaurar"]:
+            self._restaurar(options)
+            # El archivo puede venir de un esquema anterior
+            call_command("migrate", interactive=False, verbosity=0)
+            self.stdout.write("Migraciones aplicadas.")
+            if not options["sin_anonimizar"]:
+                inicio = time.monotonic()
+                filas = anonimizar(clave=options["clave"])
+                self.stdout.write(
+                    f"Anonimizado en {time.monotonic() - inicio:.1f}s: "
+                    + ", ".join(f"{tabla} {total}" for tabla, total in filas.items())
+                )
+
+        if options["snapshot"]:
+            inicio = time.monotonic()
+            totales = exportar_snapshot(
+                options["snapshot"],
+                max_proveedores=options["proveedores"],
+                max_usuarios=options["usuarios"],
+                anonimizar_datos=not options["sin_anonimizar"],
+                clave=options["clave"],
+            )
+            self.stdout.write(
+                f"Snapshot {options['snapshot']} en {time.monotonic() - inicio:.1f}s: "
+                + ", ".join(f"{modelo} {total}" for modelo, total in totales.items() if total)
+            )
+        self.stdout.write(self.style.SUCCESS("Listo."))
+
+    def _restaurar(self, options):
+        if connection.vendor != "postgresql":
+            raise CommandError("La restauración necesita PostgreSQL (configure DATABASE_URL).")
+        if not os.path.exists(options["archivo"]):
+            raise CommandError(f"No existe {options['archivo']}.")
+        pg_restore = shutil.which("pg_restore")
+        if pg_restore is None:
+            raise CommandError("No se encontró pg_restore en el PATH.")
+
+        base = connection.settings_dict
+        if options["interactive"]:
+            respuesta = input(
+                f"Se borrarán todos los datos de la base '{base['NAME']}' en "
+                f"'{base['HOST'] or 'localhost'}'. Escriba 'si' para continuar: "
+            )
+            if respuesta.strip().lower() != "si":
+                raise CommandError("Restauración cancelada.")
+
+        # Esquema vacío en vez de --clean: --clean solo borra lo que trae el
+        # archivo y dejaría las tablas de migraciones posteriores
+        with connection.cursor() as cursor:
+            cursor.execute("DROP SCHEMA public CASCADE")
+            cursor.execute("CREATE SCHEMA public")
+        connection.close()
+
+        comando = [
+            pg_restore,
+            "--no-owner",
+            "--no-privileges",
+            f"--jobs={max(options['jobs'], 1)}",
+            f"--dbname={base['NAME']}",
+        ]
+        for opcion, clave in (("--host", "HOST"), ("--port", "PORT"), ("--username", "USER")):
+            if base[clave]:
+                comando.append(f"{opcion}={base[clave]}")
+        comando.append(options["archivo"])
+        entorno = {**os.environ, "PGPASSWORD": base["PASSWORD"] or os.environ.get("PGPASSWORD", "")}
+
+        inicio = time.monotonic()
+        resultado = subprocess.run(comando, env=entorno, capture_output=True, text=True)
+        if resultado.returncode != 0:
+            raise CommandError(f"pg_restore terminó con código {resultado.returncode}:\n{resultado.stderr[-2000:]}")
+        self.stdout.write(f"Restaurado en {time.monotonic() - inicio:.1f}s con {options['jobs']} procesos.")
@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from plataforma.sembrado import CLAVE, TAMANO_BLOQUE, TAMANO_LOTE, limpiar, sembrar
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos sintéticos (regiones, comunas, proveedores, productos, "
+        "servicios, reseñas, contenidos educativos e intentos de quiz) para "
+        "desarrollo, benchmarks y pruebas de escala. Con la misma --semilla se "
+        "generan los mismos datos, con cualquier --procesos. Ejemplo de escala: "
+        "--proveedores 50000 --productos 20 --procesos 4 (cerca de un millón de productos)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--proveedores", type=int, default=200)
+        parser.add_argument("--productos", type=int, default=20, help="Promedio por proveedor.")
+        parser.add_argument("--servicios", type=int, default=2, help="Promedio por prestador.")
+        parser.add_argument("--resenas", type=int, default=8, help="Promedio por proveedor.")
+        parser.add_argument("--consumidores", type=int, default=2, help="Consumidores por proveedor.")
+        parser.add_argument("--intentos", type=int, default=1, help="Intentos de quiz, promedio por consumidor.")
+        parser.add_argument("--contenidos", type=int, default=10)
+        parser.add_argument("--semilla", type=int, default=0)
+        parser.add_argument("--procesos", type=int, default=1, help="Procesos que generan bloques en paralelo.")
+        parser.add_argument(
+            "--bloque", type=int, default=TAMANO_BLOQUE,
+            help="Proveedores por bloque (cambiarlo cambia los datos generados).",
+        )
+        parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Filas por INSERT.")
+        parser.add_argument("--limpiar", action="store_true", help="Borra antes los datos sembrados.")
+
+    def handle(self, *args, **options):
+        if options["bloque"] < 1:
+            raise CommandError("--bloque debe ser al menos 1.")
+        if options["limpiar"]:
+            borrados = limpiar()
+            self.stdout.write(f"Filas sembradas borradas: {borrados}")
+
+        inicio = time.monotonic()
+        try:
+            resultado = sembrar(
+                proveedores=options["proveedores"],
+                productos_por_proveedor=options["productos"],
+                servicios_por_proveedor=options["servicios"],
+                resenas_por_proveedor=options["resenas"],
+                consumidores_por_proveedor=options["consumidores"],
+                intentos_por_consumidor=options["intentos"],
+                contenidos=options["contenidos"],
+                semilla=options["semilla"],
+                procesos=options["procesos"],
+                tamano_bloque=options["bloque"],
+                tamano_lote=options["lote"],
+            )
+        except ValueError as e:
+            raise CommandError(f"{e} (use --limpiar)")
+        self.stdout.write(self.style.SUCCESS(
+            f"Sembrado en {time.monotonic() - inicio:.1f}s: {resultado.comunas} comunas, "
+            f"{resultado.usuarios} usuarios, {resultado.proveedores} proveedores, "
+            f"{resultado.productos} productos, {resultado.servicios} servicios, "
+            f"{resultado.resenas} reseñas, {resultado.intentos} intentos de quiz, "
+            f"{resultado.contenidos} contenidos. Clave de los usuarios: {CLAVE}"
+        ))
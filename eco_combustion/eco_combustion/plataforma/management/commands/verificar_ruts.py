@@ -0,0 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, transaction
+
+from plataforma.models import Proveedor
+from plataforma.validador import validar_ruts
+
+TAMANO_LOTE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        "Revisa los RUT de usuarios y proveedores por lotes: informa los inválidos "
+        "y los que no tienen forma normalizada (duplicados de otro RUT). Con "
+        "--normalizar completa rut_normalizado donde falte y no choque."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Filas leídas por consulta.")
+        parser.add_argument("--normalizar", action="store_true", help="Guarda rut_normalizado donde falte.")
+        parser.add_argument("--detalle", type=int, default=20, help="Máximo de casos listados por modelo.")
+
+    def handle(self, *args, **options):
+        for modelo in (get_user_model(), Proveedor):
+            self._revisar(modelo, options)
+
+    def _revisar(self, modelo, options):
+        nombre = modelo._meta.verbose_name_plural
+        filas = (
+            modelo.objects
+            .exclude(rut__isnull=True)
+            .exclude(rut="")
+            .order_by("pk")
+            .values_list("pk", "rut", "rut_normalizado")
+            .iterator(chunk_size=options["lote"])
+        )
+        revisados = invalidos = sin_normalizar = normalizados = 0
+        casos = []
+        lote = []
+
+        def procesar(lote):
+            nonlocal revisados, invalidos, sin_normalizar, normalizados
+            resultados = validar_ruts(rut for _, rut, _ in lote)
+            pendientes = {}
+            for (pk, rut, guardado), resultado in zip(lote, resultados):
+                revisados += 1
+                if not resultado.valido:
+                    invalidos += 1
+                    if len(casos) < options["detalle"]:
+                        casos.append(f"  {nombre} {pk}: {rut!r} - {resultado.error}")
+                if resultado.normalizado and guardado != resultado.normalizado:
+                    sin_normalizar += 1
+                    pendientes[pk] = resultado.normalizado
+            if options["normalizar"] and pendientes:
+                normalizados += self._normalizar(modelo, pendientes)
+
+        for fila in filas:
+            lote.append(fila)
+            if len(lote) >= options["lote"]:
+                procesar(lote)
+                lote = []
+        if lote:
+            procesar(lote)
+
+        self.stdout.write(
+            f"{nombre}: {revisados} revisados, {invalidos} inválidos, {sin_normalizar} sin normalizar"
+            + (f", {normalizados} normalizados" if options["normalizar"] else "")
+        )
+        for caso in casos:
+            self.stdout.write(caso)
+
+    def _normalizar(self, modelo, pendientes):
+        """
+        Guarda {pk: rut_normalizado} salvo los que ya usa otra fila: esos son
+        duplicados que hay que resolver a mano.
+        """
+        tomados = set(
+            modelo.objects
+            .filter(rut_normalizado__in=pendientes.values())
+            .values_list("rut_normalizado", flat=True)
+        )
+        objetos, usados = [], set()
+        for pk, normalizado in pendientes.items():
+            if normalizado in tomados or normalizado in usados:
+                continue
+            usados.add(normalizado)
+            objetos.append(modelo(pk=pk, rut_normalizado=normalizado))
+        try:
+            with transaction.atomic():
+                modelo.objects.bulk_update(objetos, ["rut_normalizado"], batch_size=500)
+        except IntegrityError:
+            # Otro proceso tomó alguno entre la lectura y la escritura
+            self.stderr.write(f"{modelo._meta.verbose_name_plural}: conflicto al normalizar, reintente.")
+            return 0
+        return len(objetos)
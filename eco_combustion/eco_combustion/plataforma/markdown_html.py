@@ -0,0 +1,46 @@
+"""
+Markdown -> HTML saneado para el contenido educativo.
+
+Se compila una sola vez al guardar (ContenidoEducativo.save) y queda en
+`texto_html`; si cambia este renderizador hay que correr `recompilar_educativo`.
+"""
+import markdown
+import nh3
+
+# nl2br respeta los saltos de línea simples, como hacía `linebreaksbr` con el texto antiguo
+EXTENSIONES = ["extra", "sane_lists", "nl2br"]
+
+ETIQUETAS_PERMITIDAS = {
+    "p", "br", "hr", "h1", "h2", "h3", "h4", "h5", "h6",
+    "strong", "em", "b", "i", "code", "pre", "blockquote",
+    "ul", "ol", "li", "dl", "dt", "dd",
+    "table", "thead", "tbody", "tr", "th", "td",
+    "a", "img", "abbr", "sup", "sub",
+}
+
+ATRIBUTOS_PERMITIDOS = {
+    "a": {"href", "title"},
+    "img": {"src", "alt", "title", "width", "height"},
+    "abbr": {"title"},
+    "th": {"align"},
+    "td": {"align"},
+}
+
+ESQUEMAS_PERMITIDOS = {"http", "https", "mailto"}
+
+
+def compilar_markdown(texto):
+    """
+    Devuelve el HTML saneado de `texto`: solo etiquetas/atributos de la lista
+    blanca, sin scripts ni manejadores de eventos, y enlaces con rel="noopener".
+    """
+    if not texto:
+        return ""
+    html = markdown.markdown(texto, extensions=EXTENSIONES, output_format="html")
+    return nh3.clean(
+        html,
+        tags=ETIQUETAS_PERMITIDAS,
+        attributes=ATRIBUTOS_PERMITIDOS,
+        url_schemes=ESQUEMAS_PERMITIDOS,
+        link_rel="noopener noreferrer",
+    )
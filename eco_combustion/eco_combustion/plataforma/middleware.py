@@ -1,29 +1,55 @@
+from django.conf import settings
 from django.shortcuts import redirect
 from django.urls import reverse
-from django.utils import timezone
-from datetime import timedelta
+from django.utils.functional import SimpleLazyObject
+
+from .roles import roles_de
+
 
 class BloqueoPorNoVerificarEmailMiddleware:
+    """
+    Bloquea a los usuarios que no verificaron su correo dentro del plazo: solo
+    pueden ver la página de verificación pendiente (desde la que piden un
+    enlace nuevo), usar el enlace del correo y cerrar sesión.
+
+    No escribe en la base: el flag `bloqueado` lo persiste en lote el comando
+    `bloquear_no_verificados`, y mientras tanto el plazo se revisa en memoria
+    con los datos del usuario que ya cargó AuthenticationMiddleware.
+    """
+
+    PREFIJO_VERIFICACION = "/verificar-email/"
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self._ruta_logout = None
+
+    def ruta_logout(self):
+        if self._ruta_logout is None:
+            self._ruta_logout = reverse("plataforma:logout")
+        return self._ruta_logout
 
     def __call__(self, request):
         user = getattr(request, "user", None)
 
-        if user and user.is_authenticated:
-            if not user.email_verificado:
-                if timezone.now() > user.date_joined + timedelta(days=7):
-                    user.bloqueado = True
-                    user.save(update_fields=["bloqueado"])
-
-            if getattr(user, "bloqueado", False):
-                # Permite logout y verificar-email, bloquea el resto
-                ruta = request.path
-                allow = [
-                    reverse("plataforma:logout"),
-                ]
-                if ruta.startswith("/verificar-email/") or ruta in allow:
-                    return self.get_response(request)
-                return redirect("plataforma:logout")
+        if user and user.is_authenticated and user.esta_bloqueado():
+            # Los estáticos pasan para que la página de verificación se vea bien
+            ruta = request.path
+            if ruta.startswith((self.PREFIJO_VERIFICACION, settings.STATIC_URL)) or ruta == self.ruta_logout():
+                return self.get_response(request)
+            return redirect("plataforma:verificacion_pendiente")
+
+        return self.get_response(request)
+
 
+class RolesMiddleware:
+    """
+    Deja en request.roles los roles comerciales del usuario. Se resuelven de
+    forma perezosa y una sola vez por request (ver plataforma.roles).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.roles = SimpleLazyObject(lambda: roles_de(request.user))
         return self.get_response(request)
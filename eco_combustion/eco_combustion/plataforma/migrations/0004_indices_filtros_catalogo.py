@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plataforma', '0003_alter_producto_formato_alter_producto_unidad_medida'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['activo', 'tipo_producto', 'comuna'], name='producto_activo_tipo_comuna'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['activo', 'precio_unitario'], name='producto_activo_precio'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['activo', 'formato', 'unidad_medida'], name='producto_activo_formato'),
+        ),
+        migrations.AddIndex(
+            model_name='servicio',
+            index=models.Index(fields=['activo', 'tipo_servicio'], name='servicio_activo_tipo'),
+        ),
+    ]
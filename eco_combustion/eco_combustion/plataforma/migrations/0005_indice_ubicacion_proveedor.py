@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plataforma', '0004_indices_filtros_catalogo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='proveedor',
+            index=models.Index(fields=['latitud', 'longitud'], name='proveedor_lat_lon'),
+        ),
+    ]
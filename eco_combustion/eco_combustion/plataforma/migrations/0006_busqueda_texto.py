@@ -0,0 +1,117 @@
+from django.db import migrations
+
+# Índices de búsqueda de texto. Dependen del motor, por eso van en RunPython y
+# no en Meta.indexes: en PostgreSQL, GIN por expresión sobre to_tsvector con la
+# configuración es_sin_acentos (spanish + unaccent); en SQLite, una tabla FTS5.
+# Las expresiones deben coincidir con plataforma.busqueda.VECTORES_POSTGRES.
+
+POSTGRES_CREAR = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'es_sin_acentos') THEN
+            CREATE TEXT SEARCH CONFIGURATION es_sin_acentos (COPY = spanish);
+            ALTER TEXT SEARCH CONFIGURATION es_sin_acentos
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+        END IF;
+    END
+    $$
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS producto_busqueda_gin ON plataforma_producto
+    USING gin (to_tsvector('es_sin_acentos', coalesce("especie", '') || ' ' || coalesce("descripcion", '')))
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS servicio_busqueda_gin ON plataforma_servicio
+    USING gin (to_tsvector('es_sin_acentos', coalesce("nombre", '') || ' ' || coalesce("descripcion", '')))
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS proveedor_busqueda_gin ON plataforma_proveedor
+    USING gin (to_tsvector('es_sin_acentos', coalesce("nombre_comercial", '')))
+    """,
+]
+
+POSTGRES_BORRAR = [
+    "DROP INDEX IF EXISTS producto_busqueda_gin",
+    "DROP INDEX IF EXISTS servicio_busqueda_gin",
+    "DROP INDEX IF EXISTS proveedor_busqueda_gin",
+    "DROP TEXT SEARCH CONFIGURATION IF EXISTS es_sin_acentos",
+]
+
+SQLITE_CREAR = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS plataforma_busqueda_fts USING fts5(
+        tipo UNINDEXED,
+        objeto_id UNINDEXED,
+        titulo,
+        cuerpo,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+]
+
+SQLITE_BORRAR = [
+    "DROP TABLE IF EXISTS plataforma_busqueda_fts",
+]
+
+
+def _ejecutar(schema_editor, sentencias):
+    for sql in sentencias:
+        schema_editor.execute(sql)
+
+
+def crear_indices(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        _ejecutar(schema_editor, POSTGRES_CREAR)
+    elif vendor == "sqlite":
+        _ejecutar(schema_editor, SQLITE_CREAR)
+        # Documentos ya existentes
+        reconstruir_indice_historico(apps, schema_editor)
+
+
+def reconstruir_indice_historico(apps, schema_editor):
+    """
+    Carga inicial del índice FTS5 con los modelos históricos de la migración.
+    """
+    Producto = apps.get_model("plataforma", "Producto")
+    Servicio = apps.get_model("plataforma", "Servicio")
+    Proveedor = apps.get_model("plataforma", "Proveedor")
+    tipos_producto = {
+        "LENA": "Leña", "PELLET": "Pellet", "BRIQUETA": "Briqueta", "CARBON": "Carbón",
+    }
+
+    filas = []
+    for p in Producto.objects.filter(activo=True).iterator():
+        titulo = f"{tipos_producto.get(p.tipo_producto, p.tipo_producto)} {p.especie}".strip()
+        filas.append(("producto", p.pk, titulo, p.descripcion))
+    for s in Servicio.objects.filter(activo=True).iterator():
+        filas.append(("servicio", s.pk, s.nombre, s.descripcion))
+    for p in Proveedor.objects.filter(estado="ACTIVO").iterator():
+        filas.append(("proveedor", p.pk, p.nombre_comercial, ""))
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            "INSERT INTO plataforma_busqueda_fts (tipo, objeto_id, titulo, cuerpo) VALUES (%s, %s, %s, %s)",
+            filas,
+        )
+
+
+def borrar_indices(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        _ejecutar(schema_editor, POSTGRES_BORRAR)
+    elif vendor == "sqlite":
+        _ejecutar(schema_editor, SQLITE_BORRAR)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plataforma', '0005_indice_ubicacion_proveedor'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, borrar_indices),
+    ]
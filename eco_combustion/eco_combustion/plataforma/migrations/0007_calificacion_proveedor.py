@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:12
+
+from django.db import migrations, models
+from django.db.models import Count, Exists, FloatField, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Round
+
+
+def calcular_resumen(apps, schema_editor):
+    """
+    Un solo UPDATE ... SET = (subconsulta agregada) para todos los proveedores
+    con reseñas visibles; los demás se quedan con los valores por defecto (0).
+    """
+    Proveedor = apps.get_model("plataforma", "Proveedor")
+    Resena = apps.get_model("plataforma", "Resena")
+    visibles = Resena.objects.filter(proveedor=OuterRef("pk"), visible=True).order_by().values("proveedor")
+    cantidad = Subquery(visibles.annotate(n=Count("*")).values("n"), output_field=IntegerField())
+    suma = Subquery(visibles.annotate(s=Sum("puntaje")).values("s"), output_field=IntegerField())
+    Proveedor.objects.filter(Exists(visibles)).update(
+        resenas_cantidad=cantidad,
+        resenas_suma=suma,
+        # Cast a float para evitar la división entera de SQLite
+        calificacion_promedio=Round(Cast(suma, FloatField()) / cantidad, 2),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plataforma', '0006_busqueda_texto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proveedor',
+            name='calificacion_promedio',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='proveedor',
+            name='resenas_cantidad',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='proveedor',
+            name='resenas_suma',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='proveedor',
+            index=models.Index(fields=['-calificacion_promedio', '-id'], name='proveedor_calificacion'),
+        ),
+        migrations.RunPython(calcular_resumen, migrations.RunPython.noop),
+    ]
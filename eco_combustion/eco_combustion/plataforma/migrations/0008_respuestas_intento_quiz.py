@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plataforma', '0007_calificacion_proveedor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizintentousuario',
+            name='respuestas',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plataforma', '0008_respuestas_intento_quiz'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizEstadistica',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('intentos', models.PositiveIntegerField(default=0)),
+                ('suma_puntajes', models.PositiveIntegerField(default=0)),
+                ('suma_preguntas', models.PositiveIntegerField(default=0)),
+                ('contenido', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='estadistica', to='plataforma.contenidoeducativo')),
+            ],
+            options={
+                'verbose_name': 'Estadística de quiz',
+                'verbose_name_plural': 'Estadísticas de quiz',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuizEstadisticaPregunta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('respondidas', models.PositiveIntegerField(default=0)),
+                ('correctas', models.PositiveIntegerField(default=0)),
+                ('pregunta', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='estadistica', to='plataforma.quizpregunta')),
+            ],
+            options={
+                'verbose_name': 'Estadística de pregunta',
+                'verbose_name_plural': 'Estadísticas de preguntas',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuizDistribucionPuntaje',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('puntaje', models.PositiveIntegerField()),
+                ('cantidad', models.PositiveIntegerField(default=0)),
+                ('contenido', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='distribucion_puntajes', to='plataforma.contenidoeducativo')),
+            ],
+            options={
+                'verbose_name': 'Distribución de puntajes de quiz',
+                'verbose_name_plural': 'Distribución de puntajes de quiz',
+                'ordering': ['puntaje'],
+                'constraints': [models.UniqueConstraint(fields=('contenido', 'puntaje'), name='distribucion_contenido_puntaje')],
+            },
+        ),
+    ]
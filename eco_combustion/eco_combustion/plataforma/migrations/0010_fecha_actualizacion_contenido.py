@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:18
+
+from django.db import migrations, models
+
+
+def desde_publicacion(apps, schema_editor):
+    ContenidoEducativo = apps.get_model("plataforma", "ContenidoEducativo")
+    ContenidoEducativo.objects.update(fecha_actualizacion=models.F("fecha_publicacion"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plataforma', '0009_estadisticas_quiz'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contenidoeducativo',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(desde_publicacion, migrations.RunPython.noop),
+    ]
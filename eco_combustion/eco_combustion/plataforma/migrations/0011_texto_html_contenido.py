@@ -0,0 +1,66 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:19
+
+import markdown
+import nh3
+from django.db import migrations, models
+
+# Copia del renderizador de markdown_html.py al crear esta migración: si ese
+# módulo cambia, el relleno inicial debe seguir produciendo el mismo HTML.
+EXTENSIONES = ["extra", "sane_lists", "nl2br"]
+ETIQUETAS_PERMITIDAS = {
+    "p", "br", "hr", "h1", "h2", "h3", "h4", "h5", "h6",
+    "strong", "em", "b", "i", "code", "pre", "blockquote",
+    "ul", "ol", "li", "dl", "dt", "dd",
+    "table", "thead", "tbody", "tr", "th", "td",
+    "a", "img", "abbr", "sup", "sub",
+}
+ATRIBUTOS_PERMITIDOS = {
+    "a": {"href", "title"},
+    "img": {"src", "alt", "title", "width", "height"},
+    "abbr": {"title"},
+    "th": {"align"},
+    "td": {"align"},
+}
+ESQUEMAS_PERMITIDOS = {"http", "https", "mailto"}
+
+
+def compilar_markdown(texto):
+    if not texto:
+        return ""
+    html = markdown.markdown(texto, extensions=EXTENSIONES, output_format="html")
+    return nh3.clean(
+        html,
+        tags=ETIQUETAS_PERMITIDAS,
+        attributes=ATRIBUTOS_PERMITIDOS,
+        url_schemes=ESQUEMAS_PERMITIDOS,
+        link_rel="noopener noreferrer",
+    )
+
+
+def compilar_existentes(apps, schema_editor):
+    ContenidoEducativo = apps.get_model("plataforma", "ContenidoEducativo")
+    contenidos = list(ContenidoEducativo.objects.only("id", "texto"))
+    for contenido in contenidos:
+        contenido.texto_html = compilar_markdown(contenido.texto)
+    ContenidoEducativo.objects.bulk_update(contenidos, ["texto_html"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plataforma', '0010_fecha_actualizacion_contenido'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contenidoeducativo',
+            name='texto_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='contenidoeducativo',
+            name='texto',
+            field=models.TextField(help_text='Admite Markdown: títulos, listas, enlaces e imágenes.'),
+        ),
+        migrations.RunPython(compilar_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plataforma', '0011_texto_html_contenido'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='solicitudrolcomercial',
+            index=models.Index(fields=['estado', '-fecha_envio'], name='solicitud_estado_fecha'),
+        ),
+    ]
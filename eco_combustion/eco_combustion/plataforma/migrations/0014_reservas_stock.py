@@ -0,0 +1,54 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def stock_negativo_a_cero(apps, schema_editor):
+    Producto = apps.get_model("plataforma", "Producto")
+    Producto.objects.filter(stock_disponible__lt=0).update(stock_disponible=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plataforma', '0013_correos_pendientes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservaStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.PositiveIntegerField()),
+                ('estado', models.CharField(choices=[('ACTIVA', 'Activa'), ('CONFIRMADA', 'Confirmada'), ('LIBERADA', 'Liberada')], default='ACTIVA', max_length=20)),
+                ('expira_en', models.DateTimeField()),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_resolucion', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Reserva de stock',
+                'verbose_name_plural': 'Reservas de stock',
+            },
+        ),
+        migrations.RunPython(stock_negativo_a_cero, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='producto',
+            constraint=models.CheckConstraint(condition=models.Q(('stock_disponible__gte', 0), ('stock_disponible__isnull', True), _connector='OR'), name='producto_stock_no_negativo'),
+        ),
+        migrations.AddField(
+            model_name='reservastock',
+            name='producto',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservas', to='plataforma.producto'),
+        ),
+        migrations.AddField(
+            model_name='reservastock',
+            name='usuario',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reservas_stock', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='reservastock',
+            index=models.Index(fields=['estado', 'expira_en'], name='reserva_estado_expira'),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plataforma', '0014_reservas_stock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Carrito',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('usuario', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='carrito', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Carrito',
+                'verbose_name_plural': 'Carritos',
+            },
+        ),
+        migrations.CreateModel(
+            name='Pedido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('compra', models.UUIDField(db_index=True)),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('CONFIRMADO', 'Confirmado'), ('DESPACHADO', 'Despachado'), ('CANCELADO', 'Cancelado')], default='PENDIENTE', max_length=20)),
+                ('latitud_destino', models.FloatField()),
+                ('longitud_destino', models.FloatField()),
+                ('distancia_km', models.FloatField()),
+                ('subtotal', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('costo_envio', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('comuna_destino', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pedidos', to='plataforma.comuna')),
+                ('proveedor', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='pedidos', to='plataforma.proveedor')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='pedidos', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Pedido',
+                'verbose_name_plural': 'Pedidos',
+            },
+        ),
+        migrations.CreateModel(
+            name='LineaPedido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('descripcion', models.CharField(max_length=200)),
+                ('precio_unitario', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('cantidad', models.PositiveIntegerField()),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('producto', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lineas_pedido', to='plataforma.producto')),
+                ('pedido', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lineas', to='plataforma.pedido')),
+            ],
+            options={
+                'verbose_name': 'Línea de pedido',
+                'verbose_name_plural': 'Líneas de pedido',
+            },
+        ),
+        migrations.CreateModel(
+            name='ItemCarrito',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.PositiveIntegerField(default=1)),
+                ('fecha_agregado', models.DateTimeField(auto_now_add=True)),
+                ('carrito', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='plataforma.carrito')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items_carrito', to='plataforma.producto')),
+            ],
+            options={
+                'verbose_name': 'Ítem de carrito',
+                'verbose_name_plural': 'Ítems de carrito',
+                'constraints': [models.UniqueConstraint(fields=('carrito', 'producto'), name='item_carrito_producto')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['usuario', '-fecha_creacion'], name='pedido_usuario_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['proveedor', 'estado', '-fecha_creacion'], name='pedido_proveedor_estado'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:41
+
+from django.db import migrations, models
+
+
+
+def normalizar_rut(rut):
+    """
+    Copia de validador.normalizar_rut tal como estaba al crear esta migración:
+    si el validador cambia, la migración debe seguir normalizando igual.
+    """
+    if rut is None:
+        return None
+    partes = rut.strip().replace(".", "").replace(" ", "").split("-")
+    if len(partes) != 2 or len(partes[1]) != 1:
+        return None
+    cuerpo, dv = partes[0], partes[1].upper()
+    if not cuerpo.isdigit() or not cuerpo.isascii():
+        return None
+    if len(cuerpo.lstrip("0")) > 9 or not int(cuerpo) or dv not in "0123456789K":
+        return None
+    return f"{int(cuerpo)}-{dv}"
+
+
+def normalizar_existentes(apps, schema_editor):
+    # Si dos filas normalizan al mismo RUT, la primera se queda con el valor y
+    # las demás quedan en NULL: el comando verificar_ruts las informa.
+    for modelo in ("Usuario", "Proveedor"):
+        Modelo = apps.get_model("plataforma", modelo)
+        filas = Modelo.objects.exclude(rut__isnull=True).exclude(rut="").only("id", "rut").order_by("id")
+        vistos = set()
+        lote = []
+        for fila in filas.iterator(chunk_size=2000):
+            normalizado = normalizar_rut(fila.rut)
+            if normalizado and normalizado not in vistos:
+                vistos.add(normalizado)
+                fila.rut_normalizado = normalizado
+                lote.append(fila)
+            if len(lote) >= 2000:
+                Modelo.objects.bulk_update(lote, ["rut_normalizado"], batch_size=500)
+                lote = []
+        Modelo.objects.bulk_update(lote, ["rut_normalizado"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plataforma', '0015_carrito_pedidos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proveedor',
+            name='rut_normalizado',
+            field=models.CharField(blank=True, editable=False, max_length=12, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='usuario',
+            name='rut_normalizado',
+            field=models.CharField(blank=True, editable=False, max_length=12, null=True, unique=True),
+        ),
+        migrations.RunPython(normalizar_existentes, migrations.RunPython.noop),
+    ]
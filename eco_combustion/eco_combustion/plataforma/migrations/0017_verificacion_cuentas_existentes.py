@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:41
+
+from django.db import migrations
+
+
+def aceptar_cuentas_existentes(apps, schema_editor):
+    # Las cuentas creadas antes del bloqueo por verificación no recibieron el
+    # correo con plazo: se aceptan tal cual. email_verificado_en queda en NULL
+    # para distinguirlas de las verificadas con el enlace.
+    Usuario = apps.get_model("plataforma", "Usuario")
+    Usuario.objects.filter(email_verificado=False).update(email_verificado=True, bloqueado=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plataforma', '0016_rut_normalizado'),
+    ]
+
+    operations = [
+        migrations.RunPython(aceptar_cuentas_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations
+
+# El vector de productos en PostgreSQL incluye ahora la etiqueta del tipo
+# (Leña, Pellet...), igual que el título que indexa FTS5. Debe coincidir con
+# plataforma.busqueda.VECTORES_POSTGRES["producto"].
+
+POSTGRES_CREAR = [
+    "DROP INDEX IF EXISTS producto_busqueda_gin",
+    """
+    CREATE INDEX producto_busqueda_gin ON plataforma_producto
+    USING gin (to_tsvector('es_sin_acentos',
+        CASE "tipo_producto"
+            WHEN 'LENA' THEN 'Leña' WHEN 'PELLET' THEN 'Pellet'
+            WHEN 'BRIQUETA' THEN 'Briqueta' WHEN 'CARBON' THEN 'Carbón'
+            ELSE "tipo_producto"
+        END
+        || ' ' || coalesce("especie", '') || ' ' || coalesce("descripcion", '')))
+    """,
+]
+
+POSTGRES_BORRAR = [
+    "DROP INDEX IF EXISTS producto_busqueda_gin",
+    """
+    CREATE INDEX producto_busqueda_gin ON plataforma_producto
+    USING gin (to_tsvector('es_sin_acentos', coalesce("especie", '') || ' ' || coalesce("descripcion", '')))
+    """,
+]
+
+
+def _ejecutar(schema_editor, sentencias):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for sql in sentencias:
+        schema_editor.execute(sql)
+
+
+def crear_indice(apps, schema_editor):
+    _ejecutar(schema_editor, POSTGRES_CREAR)
+
+
+def borrar_indice(apps, schema_editor):
+    _ejecutar(schema_editor, POSTGRES_BORRAR)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plataforma', '0018_tabla_cache'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, borrar_indice),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plataforma', '0019_busqueda_tipo_producto'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='solicitudrolcomercial',
+            name='solicitud_estado_fecha',
+        ),
+        migrations.AddIndex(
+            model_name='solicitudrolcomercial',
+            index=models.Index(fields=['estado', '-fecha_envio', '-id'], name='solicitud_estado_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitudrolcomercial',
+            index=models.Index(fields=['-fecha_envio', '-id'], name='solicitud_fecha'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plataforma', '0020_indice_orden_solicitudes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='pedido',
+            name='pedido_usuario_fecha',
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['usuario', '-fecha_creacion', '-id'], name='pedido_usuario_fecha'),
+        ),
+    ]
@@ -1,7 +1,9 @@
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils.translation import gettext_lazy as _
-from .validador import validar_rut_chileno
+from .markdown_html import compilar_markdown
+from .validador import normalizar_rut, validar_rut_chileno
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 from datetime import timedelta
@@ -33,10 +35,41 @@ class Comuna(models.Model):
         verbose_name_plural = "Comunas"
 
     def __str__(self):
+        if self.region is None:
+            return self.nombre
         return f"{self.nombre} ({self.region.nombre})"
 
 
-class Usuario(AbstractUser):
+class RutNormalizadoMixin:
+    """
+    Mantiene `rut_normalizado` (forma canónica, con índice único) a partir de
+    `rut`, para que los duplicados se detecten por índice y no importe si el
+    RUT se escribió con o sin puntos. Los UPDATE en lote deben setearlo a mano.
+    """
+
+    MENSAJE_RUT_DUPLICADO = "Ya existe un registro con este RUT."
+
+    def clean(self):
+        super().clean()
+        normalizado = normalizar_rut(self.rut)
+        if normalizado and (
+            type(self)._default_manager
+            .filter(rut_normalizado=normalizado)
+            .exclude(pk=self.pk)
+            .exists()
+        ):
+            raise ValidationError({"rut": self.MENSAJE_RUT_DUPLICADO})
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "rut" in update_fields:
+            self.rut_normalizado = normalizar_rut(self.rut)
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "rut_normalizado"}
+        super().save(*args, **kwargs)
+
+
+class Usuario(RutNormalizadoMixin, AbstractUser):
     TIPO_CHOICES = [
         ('consumidor', 'Consumidor'),
         ('proveedor', 'Proveedor de leña'),
@@ -61,6 +94,7 @@ class Usuario(AbstractUser):
         validators=[validar_rut_chileno],
         help_text="Formato: 12.345.678-5",
     )
+    rut_normalizado = models.CharField(max_length=12, unique=True, null=True, blank=True, editable=False)
     # Región/comuna base del usuario (se usan en el formulario y no se repiten)
     region = models.ForeignKey(
         Region,
@@ -77,12 +111,30 @@ class Usuario(AbstractUser):
         related_name="usuarios",
     )
 
+    PLAZO_VERIFICACION = timedelta(days=7)
+
     def __str__(self):
         return self.username
+
     def verificacion_vencida(self):
-        if self.email_verificado:
+        # Las cuentas de staff (createsuperuser, admin) no pasan por la verificación
+        if self.email_verificado or self.is_staff or self.is_superuser:
+            return False
+        return timezone.now() > (self.date_joined + self.PLAZO_VERIFICACION)
+
+    def esta_bloqueado(self):
+        """
+        Chequeo en memoria (sin consultas) usado por el middleware de bloqueo.
+        """
+        if self.is_staff or self.is_superuser:
             return False
-        return timezone.now() > (self.date_joined + timedelta(days=7))
+        return self.bloqueado or self.verificacion_vencida()
+
+    def marcar_email_verificado(self):
+        self.email_verificado = True
+        self.email_verificado_en = timezone.now()
+        self.bloqueado = False
+        self.save(update_fields=["email_verificado", "email_verificado_en", "bloqueado"])
 
 
 class PerfilUsuario(models.Model):
@@ -187,12 +239,17 @@ class SolicitudRolComercial(models.Model):
     class Meta:
         verbose_name = "Solicitud de rol comercial"
         verbose_name_plural = "Solicitudes de rol comercial"
+        indexes = [
+            # Cola del panel admin (orden -fecha_envio, -id): con filtro por estado y sin él
+            models.Index(fields=["estado", "-fecha_envio", "-id"], name="solicitud_estado_fecha"),
+            models.Index(fields=["-fecha_envio", "-id"], name="solicitud_fecha"),
+        ]
 
     def __str__(self):
         return f"{self.usuario} - {self.tipo_solicitud} ({self.estado})"
 
 
-class Proveedor(models.Model):
+class Proveedor(RutNormalizadoMixin, models.Model):
     class EstadoProveedor(models.TextChoices):
         ACTIVO = "ACTIVO", _("Activo")
         SUSPENDIDO = "SUSPENDIDO", _("Suspendido")
@@ -210,6 +267,7 @@ class Proveedor(models.Model):
         help_text="Formato: 12.345.678-5",
         validators=[validar_rut_chileno],
     )
+    rut_normalizado = models.CharField(max_length=12, unique=True, null=True, blank=True, editable=False)
     nombre_comercial = models.CharField(max_length=255)
     email_contacto = models.EmailField()
     telefono_contacto = models.CharField(max_length=20)
@@ -229,9 +287,21 @@ class Proveedor(models.Model):
     )
     fecha_aprobacion = models.DateTimeField(null=True, blank=True)
 
+    # Resumen de reseñas visibles, mantenido por plataforma.calificaciones
+    resenas_cantidad = models.PositiveIntegerField(default=0, editable=False)
+    resenas_suma = models.PositiveIntegerField(default=0, editable=False)
+    calificacion_promedio = models.DecimalField(
+        max_digits=3, decimal_places=2, default=0, editable=False
+    )
+
     class Meta:
         verbose_name = "Proveedor / Prestador"
         verbose_name_plural = "Proveedores / Prestadores"
+        indexes = [
+            # Prefiltro por caja lat/lon de la búsqueda "cerca de mí"
+            models.Index(fields=["latitud", "longitud"], name="proveedor_lat_lon"),
+            models.Index(fields=["-calificacion_promedio", "-id"], name="proveedor_calificacion"),
+        ]
 
     def __str__(self):
         return self.nombre_comercial
@@ -304,11 +374,41 @@ class Producto(models.Model):
     class Meta:
         verbose_name = "Producto"
         verbose_name_plural = "Productos"
+        indexes = [
+            # Filtros y facetas del catálogo (siempre sobre activo=True)
+            models.Index(
+                fields=["activo", "tipo_producto", "comuna"],
+                name="producto_activo_tipo_comuna",
+            ),
+            models.Index(fields=["activo", "precio_unitario"], name="producto_activo_precio"),
+            models.Index(fields=["activo", "formato", "unidad_medida"], name="producto_activo_formato"),
+        ]
+        constraints = [
+            # Última barrera contra la sobreventa (NULL = stock no informado)
+            models.CheckConstraint(
+                condition=models.Q(stock_disponible__gte=0) | models.Q(stock_disponible__isnull=True),
+                name="producto_stock_no_negativo",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.get_tipo_producto_display()} - {self.proveedor.nombre_comercial}"
 
 
+_FORMATO = Producto.FormatoProducto
+_UNIDAD = Producto.UnidadMedida
+
+# Unidades que tienen sentido para cada formato; OTRO acepta cualquiera
+UNIDADES_POR_FORMATO = {
+    _FORMATO.METRO_RUMA: {_UNIDAD.M3},
+    _FORMATO.M3_GRANEL: {_UNIDAD.M3},
+    _FORMATO.SACO_15: {_UNIDAD.SACO, _UNIDAD.KG, _UNIDAD.PALLET},
+    _FORMATO.SACO_20: {_UNIDAD.SACO, _UNIDAD.KG, _UNIDAD.PALLET},
+    _FORMATO.SACO_25: {_UNIDAD.SACO, _UNIDAD.KG, _UNIDAD.PALLET},
+    _FORMATO.BOLSA: {_UNIDAD.BOLSA, _UNIDAD.KG, _UNIDAD.PALLET},
+}
+
+
 
 class Servicio(models.Model):
     class TipoServicio(models.TextChoices):
@@ -337,6 +437,9 @@ class Servicio(models.Model):
     class Meta:
         verbose_name = "Servicio"
         verbose_name_plural = "Servicios"
+        indexes = [
+            models.Index(fields=["activo", "tipo_servicio"], name="servicio_activo_tipo"),
+        ]
 
     def __str__(self):
         return self.nombre
@@ -397,10 +500,13 @@ class ContenidoEducativo(models.Model):
     titulo = models.CharField(max_length=255)
     slug = models.SlugField(unique=True)
     resumen = models.TextField(blank=True)
-    texto = models.TextField()
+    texto = models.TextField(help_text="Admite Markdown: títulos, listas, enlaces e imágenes.")
+    # HTML saneado de `texto`, compilado al guardar
+    texto_html = models.TextField(blank=True, editable=False)
     tema = models.CharField(max_length=100, blank=True)
     activo = models.BooleanField(default=True)
     fecha_publicacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
     autor_admin = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -416,6 +522,14 @@ class ContenidoEducativo(models.Model):
     def __str__(self):
         return self.titulo
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "texto" in update_fields:
+            self.texto_html = compilar_markdown(self.texto)
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "texto_html", "fecha_actualizacion"}
+        super().save(*args, **kwargs)
+
 
 class QuizPregunta(models.Model):
     class TipoPregunta(models.TextChoices):
@@ -472,6 +586,8 @@ class QuizIntentoUsuario(models.Model):
     )
     puntaje_obtenido = models.PositiveIntegerField()
     total_preguntas = models.PositiveIntegerField()
+    # {pregunta_id: [opcion_id, ...]} tal como se respondió
+    respuestas = models.JSONField(default=dict, blank=True)
     fecha_intento = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -480,3 +596,254 @@ class QuizIntentoUsuario(models.Model):
 
     def __str__(self):
         return f"{self.usuario} - {self.contenido} ({self.puntaje_obtenido}/{self.total_preguntas})"
+
+
+# -----------------------------
+# ESTADÍSTICAS DE QUIZ (resúmenes que se actualizan con cada intento)
+# -----------------------------
+
+class QuizEstadistica(models.Model):
+    contenido = models.OneToOneField(
+        ContenidoEducativo, on_delete=models.CASCADE, related_name="estadistica"
+    )
+    intentos = models.PositiveIntegerField(default=0)
+    suma_puntajes = models.PositiveIntegerField(default=0)
+    suma_preguntas = models.PositiveIntegerField(default=0)
+
+    @property
+    def porcentaje_promedio(self):
+        if not self.suma_preguntas:
+            return None
+        return round(100 * self.suma_puntajes / self.suma_preguntas, 1)
+
+    class Meta:
+        verbose_name = "Estadística de quiz"
+        verbose_name_plural = "Estadísticas de quiz"
+
+    def __str__(self):
+        return f"{self.contenido} ({self.intentos} intentos)"
+
+
+class QuizDistribucionPuntaje(models.Model):
+    contenido = models.ForeignKey(
+        ContenidoEducativo, on_delete=models.CASCADE, related_name="distribucion_puntajes"
+    )
+    puntaje = models.PositiveIntegerField()
+    cantidad = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Distribución de puntajes de quiz"
+        verbose_name_plural = "Distribución de puntajes de quiz"
+        ordering = ["puntaje"]
+        constraints = [
+            models.UniqueConstraint(fields=["contenido", "puntaje"], name="distribucion_contenido_puntaje"),
+        ]
+
+    def __str__(self):
+        return f"{self.contenido} - {self.puntaje} puntos: {self.cantidad}"
+
+
+class QuizEstadisticaPregunta(models.Model):
+    pregunta = models.OneToOneField(
+        QuizPregunta, on_delete=models.CASCADE, related_name="estadistica"
+    )
+    respondidas = models.PositiveIntegerField(default=0)
+    correctas = models.PositiveIntegerField(default=0)
+
+    @property
+    def porcentaje_acierto(self):
+        if not self.respondidas:
+            return None
+        return round(100 * self.correctas / self.respondidas, 1)
+
+    class Meta:
+        verbose_name = "Estadística de pregunta"
+        verbose_name_plural = "Estadísticas de preguntas"
+
+    def __str__(self):
+        return f"{self.pregunta} ({self.correctas}/{self.respondidas})"
+
+
+# -----------------------------
+# CORREOS (bandeja de salida transaccional)
+# -----------------------------
+
+class CorreoPendiente(models.Model):
+    class EstadoCorreo(models.TextChoices):
+        PENDIENTE = "PENDIENTE", _("Pendiente")
+        ENVIADO = "ENVIADO", _("Enviado")
+        FALLIDO = "FALLIDO", _("Fallido")
+
+    destinatario = models.EmailField()
+    asunto = models.CharField(max_length=255)
+    cuerpo_texto = models.TextField()
+    cuerpo_html = models.TextField(blank=True)
+    estado = models.CharField(
+        max_length=20,
+        choices=EstadoCorreo.choices,
+        default=EstadoCorreo.PENDIENTE,
+    )
+    intentos = models.PositiveSmallIntegerField(default=0)
+    # El worker toma los PENDIENTE con proximo_intento vencido
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    ultimo_error = models.TextField(blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_envio = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Correo pendiente"
+        verbose_name_plural = "Correos pendientes"
+        indexes = [
+            models.Index(fields=["estado", "proximo_intento"], name="correo_estado_proximo"),
+        ]
+
+    def __str__(self):
+        return f"{self.destinatario} - {self.asunto} ({self.estado})"
+
+
+# -----------------------------
+# RESERVAS DE STOCK
+# -----------------------------
+
+class ReservaStock(models.Model):
+    """
+    Unidades de un producto apartadas para un comprador. El stock se descuenta
+    al reservar; si la reserva vence sin confirmarse, el barrido la libera y
+    devuelve las unidades (ver plataforma.stock).
+    """
+
+    class EstadoReserva(models.TextChoices):
+        ACTIVA = "ACTIVA", _("Activa")
+        CONFIRMADA = "CONFIRMADA", _("Confirmada")
+        LIBERADA = "LIBERADA", _("Liberada")
+
+    producto = models.ForeignKey(
+        Producto, on_delete=models.CASCADE, related_name="reservas"
+    )
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="reservas_stock",
+    )
+    cantidad = models.PositiveIntegerField()
+    estado = models.CharField(
+        max_length=20,
+        choices=EstadoReserva.choices,
+        default=EstadoReserva.ACTIVA,
+    )
+    expira_en = models.DateTimeField()
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_resolucion = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Reserva de stock"
+        verbose_name_plural = "Reservas de stock"
+        indexes = [
+            # Barrido de reservas vencidas
+            models.Index(fields=["estado", "expira_en"], name="reserva_estado_expira"),
+        ]
+
+    def __str__(self):
+        return f"{self.producto_id} x{self.cantidad} ({self.estado})"
+
+
+# -----------------------------
+# CARRITO Y PEDIDOS
+# -----------------------------
+
+class Carrito(models.Model):
+    usuario = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="carrito"
+    )
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Carrito"
+        verbose_name_plural = "Carritos"
+
+    def __str__(self):
+        return f"Carrito de {self.usuario}"
+
+
+class ItemCarrito(models.Model):
+    carrito = models.ForeignKey(Carrito, on_delete=models.CASCADE, related_name="items")
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name="items_carrito")
+    cantidad = models.PositiveIntegerField(default=1)
+    fecha_agregado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Ítem de carrito"
+        verbose_name_plural = "Ítems de carrito"
+        constraints = [
+            models.UniqueConstraint(fields=["carrito", "producto"], name="item_carrito_producto"),
+        ]
+
+    def __str__(self):
+        return f"{self.producto_id} x{self.cantidad}"
+
+
+class Pedido(models.Model):
+    """
+    Pedido a un proveedor. Un checkout genera un pedido por proveedor del
+    carrito, todos con el mismo `compra`.
+    """
+
+    class EstadoPedido(models.TextChoices):
+        PENDIENTE = "PENDIENTE", _("Pendiente")
+        CONFIRMADO = "CONFIRMADO", _("Confirmado")
+        DESPACHADO = "DESPACHADO", _("Despachado")
+        CANCELADO = "CANCELADO", _("Cancelado")
+
+    compra = models.UUIDField(db_index=True)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name="pedidos"
+    )
+    proveedor = models.ForeignKey(Proveedor, on_delete=models.PROTECT, related_name="pedidos")
+    estado = models.CharField(
+        max_length=20,
+        choices=EstadoPedido.choices,
+        default=EstadoPedido.PENDIENTE,
+    )
+    comuna_destino = models.ForeignKey(
+        Comuna, on_delete=models.SET_NULL, null=True, blank=True, related_name="pedidos"
+    )
+    latitud_destino = models.FloatField()
+    longitud_destino = models.FloatField()
+    distancia_km = models.FloatField()
+    # Montos en CLP; subtotal y total los calcula la base desde las líneas
+    subtotal = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    costo_envio = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Pedido"
+        verbose_name_plural = "Pedidos"
+        indexes = [
+            models.Index(fields=["usuario", "-fecha_creacion", "-id"], name="pedido_usuario_fecha"),
+            models.Index(fields=["proveedor", "estado", "-fecha_creacion"], name="pedido_proveedor_estado"),
+        ]
+
+    def __str__(self):
+        return f"Pedido {self.pk} - {self.proveedor} ({self.estado})"
+
+
+class LineaPedido(models.Model):
+    pedido = models.ForeignKey(Pedido, on_delete=models.CASCADE, related_name="lineas")
+    # Se guarda una copia de lo comprado: el producto puede cambiar o borrarse
+    producto = models.ForeignKey(
+        Producto, on_delete=models.SET_NULL, null=True, related_name="lineas_pedido"
+    )
+    descripcion = models.CharField(max_length=200)
+    precio_unitario = models.DecimalField(max_digits=12, decimal_places=2)
+    cantidad = models.PositiveIntegerField()
+    subtotal = models.DecimalField(max_digits=14, decimal_places=2)
+
+    class Meta:
+        verbose_name = "Línea de pedido"
+        verbose_name_plural = "Líneas de pedido"
+
+    def __str__(self):
+        return f"{self.descripcion} x{self.cantidad}"
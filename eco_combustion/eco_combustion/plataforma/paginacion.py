@@ -0,0 +1,115 @@
+import base64
+import json
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+# Rango de un entero de 64 bits con signo, el mayor que aceptan las bases de datos
+ENTERO_MIN, ENTERO_MAX = -(2 ** 63), 2 ** 63 - 1
+
+
+@dataclass
+class PaginaKeyset:
+    objetos: list = field(default_factory=list)
+    siguiente_cursor: str | None = None
+
+    @property
+    def hay_mas(self):
+        return self.siguiente_cursor is not None
+
+
+def _campo_modelo(modelo, ruta):
+    """
+    Resuelve una ruta tipo "proveedor__nombre" al field final del modelo.
+    """
+    partes = ruta.split("__")
+    for parte in partes[:-1]:
+        modelo = modelo._meta.get_field(parte).related_model
+    return modelo._meta.get_field(partes[-1])
+
+
+def _valor_de(objeto, ruta):
+    for parte in ruta.split("__"):
+        if objeto is None:
+            return None
+        objeto = getattr(objeto, parte)
+    return objeto
+
+
+def codificar_cursor(valores):
+    crudo = json.dumps(valores, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(modelo, orden, cursor):
+    """
+    Devuelve la lista de valores (ya convertidos al tipo del campo) guardados en el cursor.
+    """
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (ValueError, TypeError):
+        raise CursorInvalido("Cursor mal formado.")
+
+    if not isinstance(valores, list) or len(valores) != len(orden):
+        raise CursorInvalido("El cursor no corresponde al orden solicitado.")
+
+    convertidos = []
+    for campo, valor in zip(orden, valores):
+        try:
+            convertido = _campo_modelo(modelo, campo.lstrip("-")).to_python(valor)
+        except (ValidationError, TypeError, ValueError):
+            raise CursorInvalido("El cursor contiene valores inválidos.")
+        # Un entero fuera de rango haría fallar la consulta (OverflowError en SQLite)
+        if isinstance(convertido, int) and not ENTERO_MIN <= convertido <= ENTERO_MAX:
+            raise CursorInvalido("El cursor contiene valores inválidos.")
+        convertidos.append(convertido)
+    return convertidos
+
+
+def _filtro_despues_de(orden, valores):
+    """
+    Construye el filtro "fila > cursor" para un orden compuesto.
+    Para ("-a", "-id") queda: a < va OR (a = va AND id < vid).
+    """
+    filtro = Q()
+    iguales = {}
+    for campo, valor in zip(orden, valores):
+        nombre = campo.lstrip("-")
+        operador = "lt" if campo.startswith("-") else "gt"
+        filtro |= Q(**iguales, **{f"{nombre}__{operador}": valor})
+        iguales[nombre] = valor
+    return filtro
+
+
+def paginar_keyset(queryset, orden=("-id",), cursor=None, tamano=20):
+    """
+    Pagina un queryset por keyset (sin OFFSET).
+
+    El último campo de `orden` debe ser único (normalmente "-id") para que
+    el cursor sea estable. El cursor es opaco para el cliente.
+    """
+    orden = tuple(orden)
+    queryset = queryset.order_by(*orden)
+
+    if cursor:
+        valores = decodificar_cursor(queryset.model, orden, cursor)
+        queryset = queryset.filter(_filtro_despues_de(orden, valores))
+
+    # Se pide una fila extra solo para saber si existe otra página
+    objetos = list(queryset[: tamano + 1])
+    siguiente = None
+    if len(objetos) > tamano:
+        objetos = objetos[:tamano]
+        ultimo = objetos[-1]
+        siguiente = codificar_cursor(
+            [_valor_de(ultimo, campo.lstrip("-")) for campo in orden]
+        )
+
+    return PaginaKeyset(objetos=objetos, siguiente_cursor=siguiente)
@@ -0,0 +1,211 @@
+"""
+Carrito y checkout.
+
+Confirmar una compra divide el carrito por proveedor y guarda todo en una
+transacción con una cantidad fija de consultas, sin importar cuántos ítems
+tenga: los ítems se leen con su subtotal ya calculado por la base, el stock
+se descuenta con un solo UPDATE, pedidos y líneas se insertan con
+bulk_create y los totales de cada pedido los suma la base desde sus líneas.
+"""
+import uuid
+
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .envios import cotizar_envio
+from .models import Carrito, ItemCarrito, LineaPedido, Pedido, Producto
+from .stock import descontar_lote, devolver_lote
+
+TAMANO_LOTE = 500
+
+MONTO = DecimalField(max_digits=14, decimal_places=2)
+SUBTOTAL_ITEM = ExpressionWrapper(F("cantidad") * F("producto__precio_unitario"), output_field=MONTO)
+
+
+class CompraInvalida(ValueError):
+    pass
+
+
+# ---------- carrito ----------
+
+
+def agregar_al_carrito(usuario, producto_id, cantidad=1):
+    """
+    Suma `cantidad` unidades del producto al carrito del usuario.
+    """
+    carrito, _ = Carrito.objects.get_or_create(usuario=usuario)
+    actualizados = ItemCarrito.objects.filter(carrito=carrito, producto_id=producto_id).update(
+        cantidad=F("cantidad") + cantidad
+    )
+    if actualizados:
+        return
+    try:
+        with transaction.atomic():
+            ItemCarrito.objects.create(carrito=carrito, producto_id=producto_id, cantidad=cantidad)
+    except IntegrityError:
+        # Otra petición del mismo usuario lo creó entre medio
+        ItemCarrito.objects.filter(carrito=carrito, producto_id=producto_id).update(
+            cantidad=F("cantidad") + cantidad
+        )
+
+
+def fijar_cantidad(usuario, producto_id, cantidad):
+    """
+    Deja el ítem con `cantidad` unidades; con 0 lo quita del carrito.
+    """
+    items = ItemCarrito.objects.filter(carrito__usuario=usuario, producto_id=producto_id)
+    if cantidad <= 0:
+        items.delete()
+    else:
+        items.update(cantidad=cantidad)
+
+
+def items_carrito(usuario):
+    """
+    Ítems del carrito como dicts, con el subtotal calculado en SQL.
+    """
+    items = list(
+        ItemCarrito.objects
+        .filter(carrito__usuario=usuario)
+        .order_by("producto__proveedor_id", "id")
+        .values(
+            "producto_id",
+            "cantidad",
+            proveedor_id=F("producto__proveedor_id"),
+            proveedor=F("producto__proveedor__nombre_comercial"),
+            tipo_producto=F("producto__tipo_producto"),
+            especie=F("producto__especie"),
+            precio_unitario=F("producto__precio_unitario"),
+            activo=F("producto__activo"),
+            stock_disponible=F("producto__stock_disponible"),
+        )
+        .annotate(subtotal=SUBTOTAL_ITEM)
+    )
+    etiquetas = {valor: str(etiqueta) for valor, etiqueta in Producto.TipoProducto.choices}
+    largo = LineaPedido._meta.get_field("descripcion").max_length
+    for item in items:
+        tipo = etiquetas.get(item["tipo_producto"], item["tipo_producto"])
+        item["descripcion"] = f"{tipo} {item['especie']}".strip()[:largo]
+    return items
+
+
+def total_carrito(usuario):
+    return (
+        ItemCarrito.objects
+        .filter(carrito__usuario=usuario)
+        .aggregate(total=Coalesce(Sum(SUBTOTAL_ITEM), Value(0), output_field=MONTO))["total"]
+    )
+
+
+# ---------- checkout ----------
+
+
+def _sumar_totales(compra):
+    """
+    subtotal = suma de las líneas y total = subtotal + envío, con un solo UPDATE.
+    """
+    suma_lineas = Coalesce(
+        Subquery(
+            LineaPedido.objects
+            .filter(pedido=OuterRef("pk"))
+            .order_by()
+            .values("pedido")
+            .annotate(s=Sum("subtotal"))
+            .values("s"),
+            output_field=MONTO,
+        ),
+        Value(0),
+        output_field=MONTO,
+    )
+    Pedido.objects.filter(compra=compra).update(
+        subtotal=suma_lineas,
+        total=ExpressionWrapper(suma_lineas + F("costo_envio"), output_field=MONTO),
+    )
+
+
+def confirmar_compra(usuario, lat, lon, comuna_id=None):
+    """
+    Convierte el carrito del usuario en un pedido por proveedor, con el
+    envío cotizado desde TarifaEnvio hasta (lat, lon). Descuenta el stock y
+    vacía el carrito. Lanza CompraInvalida o StockInsuficiente sin dejar nada
+    guardado. Devuelve los pedidos creados.
+    """
+    with transaction.atomic():
+        carrito = Carrito.objects.select_for_update().filter(usuario=usuario).first()
+        items = items_carrito(usuario) if carrito else []
+        if not items:
+            raise CompraInvalida("Tu carrito está vacío.")
+
+        no_disponibles = [item["producto_id"] for item in items if not item["activo"]]
+        if no_disponibles:
+            raise CompraInvalida("Algunos productos del carrito ya no están disponibles.")
+
+        cotizacion = cotizar_envio(lat, lon, [item["producto_id"] for item in items], comuna_id=comuna_id)
+        if cotizacion["sin_cobertura"]:
+            nombres = sorted({item["proveedor"] for item in items if item["proveedor_id"] in cotizacion["sin_cobertura"]})
+            raise CompraInvalida(f"Estos proveedores no despachan a tu ubicación: {', '.join(nombres)}.")
+
+        descontar_lote({item["producto_id"]: item["cantidad"] for item in items})
+
+        compra = uuid.uuid4()
+        pedidos = Pedido.objects.bulk_create([
+            Pedido(
+                compra=compra,
+                usuario=usuario,
+                proveedor_id=envio["proveedor_id"],
+                comuna_destino_id=comuna_id,
+                latitud_destino=lat,
+                longitud_destino=lon,
+                distancia_km=envio["distancia_km"],
+                costo_envio=envio["costo"],
+            )
+            for envio in cotizacion["envios"]
+        ])
+        pedido_por_proveedor = {pedido.proveedor_id: pedido for pedido in pedidos}
+
+        LineaPedido.objects.bulk_create(
+            [
+                LineaPedido(
+                    pedido=pedido_por_proveedor[item["proveedor_id"]],
+                    producto_id=item["producto_id"],
+                    descripcion=item["descripcion"],
+                    precio_unitario=item["precio_unitario"],
+                    cantidad=item["cantidad"],
+                    subtotal=item["subtotal"],
+                )
+                for item in items
+            ],
+            batch_size=TAMANO_LOTE,
+        )
+        _sumar_totales(compra)
+        carrito.items.all().delete()
+
+    return list(Pedido.objects.filter(compra=compra).select_related("proveedor").order_by("pk"))
+
+
+def cancelar_pedido(usuario, pedido_id):
+    """
+    Cancela un pedido PENDIENTE del usuario y devuelve su stock. Devuelve
+    False si no existe o ya no se puede cancelar.
+    """
+    with transaction.atomic():
+        pedido = (
+            Pedido.objects
+            .select_for_update()
+            .filter(pk=pedido_id, usuario=usuario, estado=Pedido.EstadoPedido.PENDIENTE)
+            .first()
+        )
+        if pedido is None:
+            return False
+        cantidades = dict(
+            pedido.lineas
+            .filter(producto__isnull=False)
+            .order_by()
+            .values("producto_id")
+            .annotate(total=Sum("cantidad"))
+            .values_list("producto_id", "total")
+        )
+        Pedido.objects.filter(pk=pedido.pk).update(estado=Pedido.EstadoPedido.CANCELADO)
+        devolver_lote(cantidades)
+    return True
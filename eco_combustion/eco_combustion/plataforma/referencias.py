@@ -0,0 +1,80 @@
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+from .models import Comuna, Region
+
+# Regiones y comunas casi nunca cambian: se guardan en memoria del proceso y
+# se invalidan con señales. El TTL cubre los cambios hechos desde otro proceso.
+REFERENCIAS_TTL = 60 * 60
+
+_lock = threading.Lock()
+_datos = None
+
+
+@dataclass(frozen=True)
+class DatosReferencia:
+    version: str
+    contenido: bytes
+    comunas_por_region: dict
+    expira: float
+
+    def etag_region(self, region_id):
+        return f"{self.version}-{region_id}"
+
+
+def _cargar():
+    regiones = [
+        {"id": pk, "nombre": nombre}
+        for pk, nombre in Region.objects.order_by("nombre").values_list("id", "nombre")
+    ]
+    comunas = [
+        {"id": pk, "nombre": nombre, "region_id": region_id}
+        for pk, nombre, region_id in Comuna.objects.order_by("nombre").values_list(
+            "id", "nombre", "region_id"
+        )
+    ]
+
+    comunas_por_region = defaultdict(list)
+    for comuna in comunas:
+        comunas_por_region[comuna["region_id"]].append(
+            {"id": comuna["id"], "nombre": comuna["nombre"]}
+        )
+
+    cuerpo = json.dumps(
+        {"regiones": regiones, "comunas": comunas},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode()
+    version = hashlib.sha1(cuerpo).hexdigest()[:16]
+    contenido = json.dumps(
+        {"version": version, "regiones": regiones, "comunas": comunas},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode()
+
+    return DatosReferencia(
+        version=version,
+        contenido=contenido,
+        comunas_por_region=dict(comunas_por_region),
+        expira=time.monotonic() + REFERENCIAS_TTL,
+    )
+
+
+def datos_referencia():
+    global _datos
+    datos = _datos
+    if datos is None or datos.expira < time.monotonic():
+        with _lock:
+            datos = _datos
+            if datos is None or datos.expira < time.monotonic():
+                datos = _datos = _cargar()
+    return datos
+
+
+def invalidar_referencias():
+    global _datos
+    _datos = None
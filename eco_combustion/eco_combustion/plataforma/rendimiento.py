@@ -0,0 +1,128 @@
+"""
+Benchmark de las páginas públicas con el cliente de pruebas de Django.
+
+Cada página se pide una vez con la caché vacía (primera visita), unas
+veces más sin medir y después `repeticiones` veces con la caché caliente.
+De cada página se guarda la cantidad de consultas SQL y la latencia
+p50/p95. comparar() contrasta un resultado con una línea base guardada y
+lista las regresiones: más consultas, o un p95 que creció más que el umbral.
+"""
+import statistics
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Q
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import ContenidoEducativo, Proveedor, Region
+
+REPETICIONES = 30
+# Pedidos sin medir tras la primera visita (plantillas compiladas, cachés llenas)
+CALENTAMIENTO = 3
+UMBRAL = 0.25
+# Debajo de esta diferencia el ruido de la medición pesa más que el cambio
+MARGEN_MS = 5.0
+# Está en ALLOWED_HOSTS; el "testserver" del cliente solo se acepta dentro de los tests
+HOST = "localhost"
+
+
+def paginas():
+    """
+    {nombre: url} de las páginas a medir, eligiendo los casos más pesados de
+    la base: el proveedor con más productos activos y la región con más comunas.
+    """
+    proveedor = (
+        Proveedor.objects
+        .filter(estado=Proveedor.EstadoProveedor.ACTIVO)
+        .annotate(n=Count("productos", filter=Q(productos__activo=True)))
+        .order_by("-n", "pk")
+        .values_list("pk", flat=True)
+        .first()
+    )
+    region = Region.objects.annotate(n=Count("comunas")).order_by("-n", "pk").values_list("pk", flat=True).first()
+    contenido = ContenidoEducativo.objects.filter(activo=True).order_by("pk").values_list("slug", flat=True).first()
+
+    urls = {"catalogo": reverse("plataforma:catalogo")}
+    if proveedor is not None:
+        urls["detalle_proveedor"] = reverse("plataforma:detalle_proveedor", args=[proveedor])
+    if region is not None:
+        urls["api_comunas_por_region"] = reverse("plataforma:api_comunas_por_region", args=[region])
+    if contenido is not None:
+        urls["educativo_detalle"] = reverse("plataforma:educativo_detalle", args=[contenido])
+    return urls
+
+
+def _percentil(valores, p):
+    if len(valores) == 1:
+        return valores[0]
+    return statistics.quantiles(valores, n=100, method="inclusive")[p - 1]
+
+
+def _pedir(cliente, url):
+    with CaptureQueriesContext(connection) as consultas:
+        inicio = time.perf_counter()
+        respuesta = cliente.get(url)
+        if getattr(respuesta, "streaming", False):
+            b"".join(respuesta.streaming_content)
+        duracion = (time.perf_counter() - inicio) * 1000
+    if respuesta.status_code != 200:
+        raise AssertionError(f"{url} respondió {respuesta.status_code}")
+    return duracion, len(consultas.captured_queries)
+
+
+def medir_pagina(cliente, url, repeticiones=REPETICIONES):
+    cache.clear()
+    primera, consultas_primera = _pedir(cliente, url)
+    for _ in range(CALENTAMIENTO):
+        _pedir(cliente, url)
+    tiempos, consultas = [], 0
+    for _ in range(repeticiones):
+        duracion, consultas = _pedir(cliente, url)
+        tiempos.append(duracion)
+    return {
+        "url": url,
+        "consultas": consultas,
+        "consultas_primera": consultas_primera,
+        "primera_ms": round(primera, 2),
+        "p50_ms": round(statistics.median(tiempos), 2),
+        "p95_ms": round(_percentil(tiempos, 95), 2),
+        "max_ms": round(max(tiempos), 2),
+    }
+
+
+def medir(urls=None, repeticiones=REPETICIONES):
+    """
+    Mide las páginas y devuelve el resultado como dict (serializable a JSON).
+    """
+    urls = urls or paginas()
+    cliente = Client(HTTP_HOST=HOST)
+    return {
+        "generado": timezone.now().isoformat(),
+        "motor": connection.vendor,
+        "repeticiones": repeticiones,
+        "paginas": {nombre: medir_pagina(cliente, url, repeticiones) for nombre, url in urls.items()},
+    }
+
+
+def comparar(actual, base, umbral=UMBRAL, margen_ms=MARGEN_MS):
+    """
+    Lista de regresiones (textos) de `actual` respecto de `base`.
+    """
+    regresiones = []
+    for nombre, medida in actual["paginas"].items():
+        anterior = base.get("paginas", {}).get(nombre)
+        if anterior is None:
+            continue
+        if medida["consultas"] > anterior["consultas"]:
+            regresiones.append(f"{nombre}: {medida['consultas']} consultas (antes {anterior['consultas']}).")
+        limite = anterior["p95_ms"] * (1 + umbral)
+        if medida["p95_ms"] > limite and medida["p95_ms"] - anterior["p95_ms"] > margen_ms:
+            regresiones.append(
+                f"{nombre}: p95 {medida['p95_ms']} ms (antes {anterior['p95_ms']} ms, "
+                f"límite {limite:.2f} ms)."
+            )
+    return regresiones
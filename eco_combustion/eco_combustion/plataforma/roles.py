@@ -0,0 +1,62 @@
+from dataclasses import dataclass
+
+from django.core.cache import cache
+
+from .models import Proveedor
+
+CACHE_ROLES = "roles_usuario:{}"
+CACHE_ROLES_TIMEOUT = 60 * 60
+
+
+@dataclass(frozen=True)
+class RolesUsuario:
+    proveedor_id: int | None = None
+    es_proveedor: bool = False
+    es_prestador: bool = False
+
+    @property
+    def es_comercial(self):
+        return self.es_proveedor or self.es_prestador
+
+
+SIN_ROLES = RolesUsuario()
+
+
+def _clave_roles(usuario_id):
+    return CACHE_ROLES.format(usuario_id)
+
+
+def roles_de(user):
+    """
+    Roles comerciales del usuario a partir de su Proveedor (si existe).
+    Se guardan en caché por usuario y se invalidan al guardar/borrar el Proveedor.
+    """
+    if not user.is_authenticated:
+        return SIN_ROLES
+
+    clave = _clave_roles(user.pk)
+    roles = cache.get(clave)
+    if roles is not None:
+        return roles
+
+    fila = (
+        Proveedor.objects
+        .filter(usuario_id=user.pk)
+        .values("id", "estado", "es_proveedor_biocombustible", "es_prestador_servicios")
+        .first()
+    )
+    if fila is None:
+        roles = SIN_ROLES
+    else:
+        activo = fila["estado"] == Proveedor.EstadoProveedor.ACTIVO
+        roles = RolesUsuario(
+            proveedor_id=fila["id"],
+            es_proveedor=activo and fila["es_proveedor_biocombustible"],
+            es_prestador=activo and fila["es_prestador_servicios"],
+        )
+    cache.set(clave, roles, CACHE_ROLES_TIMEOUT)
+    return roles
+
+
+def invalidar_roles(*usuario_ids):
+    cache.delete_many([_clave_roles(pk) for pk in usuario_ids])
@@ -0,0 +1,620 @@
+"""
+Datos sintéticos para desarrollo, benchmarks y pruebas de escala.
+
+Los proveedores se generan por bloques de `tamano_bloque`. Cada bloque usa
+su propio random.Random(semilla, bloque) y un rango de ids reservado de
+antemano (los objetos llevan el pk explícito), así que con la misma semilla
+sobre la misma base se generan las mismas filas con los mismos ids, sin
+importar cuántos procesos trabajen ni en qué orden terminen los bloques.
+Cada bloque crea sus proveedores, sus consumidores, el catálogo, las
+reseñas y los intentos de quiz con bulk_create en una transacción propia.
+
+Lo compartido (regiones, comunas, contenidos y preguntas de quiz) se crea
+antes en el proceso principal. bulk_create no envía señales, así que al
+final se recalculan las calificaciones y las estadísticas de los quizzes,
+se reconstruye el índice de búsqueda y se invalida la caché de referencias.
+Los usuarios sembrados llevan el prefijo PREFIJO en el username y se pueden
+borrar con limpiar().
+"""
+import math
+import multiprocessing
+import random
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal
+from itertools import accumulate, count, repeat
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max, Q
+
+from . import busqueda
+from .calificaciones import recalcular_calificaciones
+from .evaluacion import recalcular_estadisticas
+from .models import (
+    Carrito,
+    Comuna,
+    ContenidoEducativo,
+    ItemCarrito,
+    LineaPedido,
+    Pedido,
+    Producto,
+    Proveedor,
+    QuizIntentoUsuario,
+    QuizOpcion,
+    QuizPregunta,
+    Region,
+    Resena,
+    ReservaStock,
+    Servicio,
+    TarifaEnvio,
+    UNIDADES_POR_FORMATO,
+)
+from .referencias import invalidar_referencias
+from .roles import invalidar_roles
+from .validador import calcular_dvs, formatear_rut
+
+PREFIJO = "sembrado_"
+PREFIJO_SLUG = "sembrado-"
+CLAVE = "sembrado-123"
+TAMANO_LOTE = 2000
+# Proveedores por bloque: lo que un proceso genera y guarda en una transacción
+TAMANO_BLOQUE = 500
+# Cuerpos de RUT: empresas desde el 76 millones (proveedor i), personas
+# desde el 10 millones (consumidor j)
+BASE_RUT = 76_000_000
+BASE_RUT_CONSUMIDOR = 10_000_000
+# Fracción de productos que se ofrecen en otra comuna de la región del proveedor
+OTRA_COMUNA = 0.1
+# Probabilidad de acertar cada pregunta en los intentos sembrados
+ACIERTO = 0.65
+# Segundos que un proceso espera el bloqueo de escritura de SQLite
+ESPERA_SQLITE = 600
+
+# (región, peso, [(comuna, latitud, longitud)]). El peso reparte a los
+# proveedores: la leña se vende sobre todo del Biobío al sur.
+TERRITORIO = [
+    ("Metropolitana de Santiago", 4, [
+        ("Santiago", -33.45, -70.66), ("Puente Alto", -33.61, -70.58),
+        ("Maipú", -33.51, -70.76), ("Melipilla", -33.69, -71.21),
+    ]),
+    ("Libertador General Bernardo O'Higgins", 4, [
+        ("Rancagua", -34.17, -70.74), ("San Fernando", -34.59, -70.99),
+        ("Rengo", -34.41, -70.86), ("Pichilemu", -34.39, -72.00),
+    ]),
+    ("Maule", 8, [
+        ("Talca", -35.43, -71.66), ("Curicó", -34.98, -71.24),
+        ("Linares", -35.85, -71.59), ("Constitución", -35.33, -72.41),
+    ]),
+    ("Ñuble", 8, [
+        ("Chillán", -36.61, -72.10), ("San Carlos", -36.42, -71.96), ("Bulnes", -36.74, -72.30),
+    ]),
+    ("Biobío", 12, [
+        ("Concepción", -36.83, -73.05), ("Los Ángeles", -37.47, -72.35),
+        ("Coronel", -37.03, -73.16), ("Mulchén", -37.72, -72.24),
+    ]),
+    ("La Araucanía", 20, [
+        ("Temuco", -38.74, -72.60), ("Padre Las Casas", -38.77, -72.60), ("Villarrica", -39.28, -72.23),
+        ("Pucón", -39.27, -71.98), ("Angol", -37.80, -72.71),
+    ]),
+    ("Los Ríos", 15, [
+        ("Valdivia", -39.81, -73.25), ("La Unión", -40.29, -73.08),
+        ("Panguipulli", -39.64, -72.33), ("Río Bueno", -40.33, -72.96),
+    ]),
+    ("Los Lagos", 20, [
+        ("Puerto Montt", -41.47, -72.94), ("Osorno", -40.57, -73.13), ("Puerto Varas", -41.32, -72.99),
+        ("Castro", -42.48, -73.76), ("Ancud", -41.87, -73.83),
+    ]),
+    ("Aysén del General Carlos Ibáñez del Campo", 6, [
+        ("Coyhaique", -45.57, -72.07), ("Aysén", -45.40, -72.69), ("Chile Chico", -46.54, -71.72),
+    ]),
+    ("Magallanes y de la Antártica Chilena", 3, [
+        ("Punta Arenas", -53.16, -70.91), ("Natales", -51.73, -72.51), ("Porvenir", -53.30, -70.37),
+    ]),
+]
+
+ESPECIES = ["Eucalipto", "Hualle", "Roble", "Ulmo", "Luma", "Tepa", "Coigüe", "Pino"]
+# Precio base por formato, en pesos
+PRECIOS = {
+    Producto.FormatoProducto.METRO_RUMA: 45_000,
+    Producto.FormatoProducto.M3_GRANEL: 38_000,
+    Producto.FormatoProducto.SACO_15: 5_500,
+    Producto.FormatoProducto.SACO_20: 7_000,
+    Producto.FormatoProducto.SACO_25: 8_500,
+    Producto.FormatoProducto.BOLSA: 3_500,
+    Producto.FormatoProducto.OTRO: 10_000,
+}
+FORMATOS_POR_TIPO = {
+    Producto.TipoProducto.LENA: [Producto.FormatoProducto.METRO_RUMA, Producto.FormatoProducto.M3_GRANEL,
+                                 Producto.FormatoProducto.SACO_20],
+    Producto.TipoProducto.PELLET: [Producto.FormatoProducto.SACO_15, Producto.FormatoProducto.SACO_25],
+    Producto.TipoProducto.BRIQUETA: [Producto.FormatoProducto.SACO_20, Producto.FormatoProducto.BOLSA],
+    Producto.TipoProducto.CARBON: [Producto.FormatoProducto.BOLSA, Producto.FormatoProducto.SACO_15],
+}
+SERVICIOS = {
+    Servicio.TipoServicio.CORTE: ("Corte de leña a domicilio", 15_000, "hora"),
+    Servicio.TipoServicio.PICADO: ("Picado y trozado", 12_000, "m3"),
+    Servicio.TipoServicio.TRANSPORTE: ("Flete de leña", 25_000, "viaje"),
+    Servicio.TipoServicio.LIMPIEZA_CANALES: ("Limpieza de cañón", 20_000, "visita"),
+}
+COMENTARIOS = [
+    "Leña bien seca, llegó a la hora.",
+    "Buen precio, repetiría.",
+    "El despacho se atrasó un día.",
+    "Humedad más alta de lo indicado.",
+    "",
+]
+# Más reseñas buenas que malas, como en la práctica
+PESOS_PUNTAJE = [2, 3, 10, 30, 55]
+
+# (enunciado, correcta, incorrectas) de las preguntas de cada quiz sembrado
+PREGUNTAS = [
+    ("¿Bajo qué humedad se considera seca la leña?", "25 %", ["40 %", "60 %"]),
+    ("¿Dónde conviene guardar la leña?", "Bajo techo y ventilada", ["A la intemperie", "En una bodega cerrada"]),
+    ("¿Con qué se mide la humedad de la leña?", "Xilohigrómetro", ["Termómetro", "Barómetro"]),
+    ("¿Cuándo conviene comprar la leña?", "En primavera o verano", ["En pleno invierno", "El mismo día de uso"]),
+]
+
+
+@dataclass
+class ResultadoSembrado:
+    comunas: int = 0
+    usuarios: int = 0
+    proveedores: int = 0
+    productos: int = 0
+    servicios: int = 0
+    resenas: int = 0
+    intentos: int = 0
+    contenidos: int = 0
+
+    def sumar(self, parcial):
+        for campo, cantidad in parcial.items():
+            setattr(self, campo, getattr(self, campo) + cantidad)
+
+
+@dataclass(frozen=True)
+class _Plan:
+    """
+    Todo lo que necesita un bloque; viaja a los procesos del pool.
+    """
+    semilla: int
+    proveedores: int
+    tamano_bloque: int
+    productos: int
+    servicios: int
+    resenas: int
+    consumidores: int
+    intentos: int
+    tamano_lote: int
+    clave: str
+    # ((comuna_id, region_id, latitud, longitud), ...) y sus pesos acumulados
+    comunas: tuple
+    acumulados: tuple
+    # ((contenido_id, ((pregunta_id, (opcion_id, ...), opcion_correcta), ...)), ...)
+    quizzes: tuple
+    # {modelo: mayor pk antes de sembrar}
+    bases: dict = field(default_factory=dict)
+
+    def capacidades(self):
+        """
+        Ids reservados por bloque para cada modelo: la cantidad exacta de
+        usuarios y proveedores, y el máximo posible del resto (cada
+        proveedor o consumidor recibe entre 0 y el doble del promedio).
+        """
+        bloque = self.tamano_bloque
+        return {
+            "usuario": bloque * (1 + self.consumidores),
+            "proveedor": bloque,
+            "producto": bloque * 2 * self.productos,
+            "servicio": bloque * 2 * self.servicios,
+            "resena": bloque * 2 * self.resenas,
+            "intento": bloque * self.consumidores * 2 * self.intentos,
+        }
+
+    def ids(self, bloque):
+        return {
+            modelo: count(self.bases[modelo] + bloque * capacidad + 1)
+            for modelo, capacidad in self.capacidades().items()
+        }
+
+
+def _modelos():
+    return {
+        "usuario": get_user_model(),
+        "proveedor": Proveedor,
+        "producto": Producto,
+        "servicio": Servicio,
+        "resena": Resena,
+        "intento": QuizIntentoUsuario,
+    }
+
+
+# ---------- datos compartidos (proceso principal) ----------
+
+
+def _territorio():
+    """
+    Crea las regiones y comunas que falten. Devuelve
+    ([(comuna_id, region_id, lat, lon)], [peso]).
+    """
+    comunas, pesos = [], []
+    for nombre_region, peso, lista in TERRITORIO:
+        region = Region.objects.filter(nombre=nombre_region).first() or Region.objects.create(nombre=nombre_region)
+        for nombre, latitud, longitud in lista:
+            comuna, _ = Comuna.objects.get_or_create(nombre=nombre, region=region)
+            comunas.append((comuna.pk, region.pk, latitud, longitud))
+            pesos.append(peso / len(lista))
+    return comunas, pesos
+
+
+def _contenidos(cantidad):
+    """
+    Crea los contenidos sembrados que falten, cada uno con su quiz.
+    """
+    existentes = set(ContenidoEducativo.objects.filter(slug__startswith=PREFIJO_SLUG).values_list("slug", flat=True))
+    creados = 0
+    for i in range(cantidad):
+        slug = f"{PREFIJO_SLUG}guia-{i}"
+        if slug in existentes:
+            continue
+        contenido = ContenidoEducativo.objects.create(
+            titulo=f"Guía de calefacción eficiente {i}",
+            slug=slug,
+            resumen="Cómo elegir y guardar la leña para que rinda más.",
+            texto=(
+                f"# Guía {i}\n\n"
+                "La leña seca tiene **menos de 25 % de humedad**.\n\n"
+                "- Compre con anticipación\n- Guarde bajo techo\n- Use un xilohigrómetro\n"
+            ),
+            tema="Leña seca",
+        )
+        for orden, (enunciado, correcta, incorrectas) in enumerate(PREGUNTAS, start=1):
+            pregunta = QuizPregunta.objects.create(contenido=contenido, enunciado=enunciado, orden=orden)
+            QuizOpcion.objects.bulk_create(
+                [QuizOpcion(pregunta=pregunta, texto_opcion=correcta, es_correcta=True)]
+                + [QuizOpcion(pregunta=pregunta, texto_opcion=texto) for texto in incorrectas]
+            )
+        creados += 1
+    return creados
+
+
+def _quizzes():
+    """
+    Preguntas y opciones de los contenidos sembrados, en el formato de _Plan.quizzes.
+    """
+    opciones, correctas = defaultdict(list), {}
+    filas = (
+        QuizOpcion.objects
+        .filter(pregunta__contenido__slug__startswith=PREFIJO_SLUG)
+        .order_by("pk")
+        .values_list("pregunta_id", "pk", "es_correcta")
+    )
+    for pregunta_id, opcion_id, es_correcta in filas:
+        opciones[pregunta_id].append(opcion_id)
+        if es_correcta:
+            correctas[pregunta_id] = opcion_id
+    preguntas = defaultdict(list)
+    filas = (
+        QuizPregunta.objects
+        .filter(contenido__slug__startswith=PREFIJO_SLUG)
+        .order_by("contenido_id", "orden", "pk")
+        .values_list("contenido_id", "pk")
+    )
+    for contenido_id, pregunta_id in filas:
+        if pregunta_id in correctas:
+            preguntas[contenido_id].append((pregunta_id, tuple(opciones[pregunta_id]), correctas[pregunta_id]))
+    return tuple((contenido_id, tuple(lista)) for contenido_id, lista in sorted(preguntas.items()))
+
+
+# ---------- bloques (proceso principal o pool) ----------
+
+
+def _ruts(cuerpos):
+    """
+    [(rut formateado, rut normalizado)] con los dígitos verificadores
+    calculados en bloque.
+    """
+    return [
+        (formatear_rut(f"{cuerpo}-{dv}"), f"{cuerpo}-{dv}")
+        for cuerpo, dv in zip(cuerpos, calcular_dvs(cuerpos))
+    ]
+
+
+def _producto(rng, pk, proveedor_id, comuna_id):
+    tipo = rng.choice(list(FORMATOS_POR_TIPO))
+    formato = rng.choice(FORMATOS_POR_TIPO[tipo])
+    unidad = rng.choice(sorted(UNIDADES_POR_FORMATO.get(formato, Producto.UnidadMedida.values)))
+    precio = PRECIOS[formato] * rng.uniform(0.8, 1.3)
+    return Producto(
+        pk=pk,
+        proveedor_id=proveedor_id,
+        tipo_producto=tipo,
+        especie=rng.choice(ESPECIES) if tipo == Producto.TipoProducto.LENA else "",
+        contenido_humedad=round(rng.uniform(12, 28), 1),
+        formato=formato,
+        unidad_medida=unidad,
+        precio_unitario=Decimal(round(precio, -2)),
+        descripcion=f"{tipo.label} {formato.label.lower()} de {rng.choice(ESPECIES).lower()}",
+        comuna_id=comuna_id,
+        stock_disponible=rng.choice([None, rng.randint(0, 500)]),
+        certificado_sncl=rng.random() < 0.8,
+        activo=rng.random() < 0.95,
+    )
+
+
+def _intento(rng, pk, usuario_id, quizzes):
+    contenido_id, preguntas = rng.choice(quizzes)
+    respuestas, puntaje = {}, 0
+    for pregunta_id, opciones, correcta in preguntas:
+        if rng.random() < ACIERTO:
+            elegida = correcta
+            puntaje += 1
+        else:
+            elegida = rng.choice([opcion for opcion in opciones if opcion != correcta])
+        respuestas[str(pregunta_id)] = [elegida]
+    return QuizIntentoUsuario(
+        pk=pk,
+        usuario_id=usuario_id,
+        contenido_id=contenido_id,
+        puntaje_obtenido=puntaje,
+        total_preguntas=len(preguntas),
+        respuestas=respuestas,
+    )
+
+
+def sembrar_bloque(plan, bloque):
+    """
+    Crea los proveedores del bloque con sus consumidores, catálogo, reseñas e
+    intentos de quiz, en una transacción. Solo depende de `plan` y `bloque`.
+    Devuelve {campo de ResultadoSembrado: filas creadas}.
+    """
+    Usuario = get_user_model()
+    rng = random.Random(f"{plan.semilla}:{bloque}")
+    ids = plan.ids(bloque)
+    primero = bloque * plan.tamano_bloque
+    indices = range(primero, min(primero + plan.tamano_bloque, plan.proveedores))
+    indices_clientes = range(indices.start * plan.consumidores, indices.stop * plan.consumidores)
+    vecinas = defaultdict(list)
+    for comuna_id, region_id, _, _ in plan.comunas:
+        vecinas[region_id].append(comuna_id)
+
+    duenos = [
+        Usuario(
+            pk=next(ids["usuario"]),
+            username=f"{PREFIJO}proveedor_{i}",
+            email=f"proveedor{i}@example.cl",
+            password=plan.clave,
+            tipo_usuario="ambos",
+            email_verificado=True,
+        )
+        for i in indices
+    ]
+    clientes = [
+        Usuario(
+            pk=next(ids["usuario"]),
+            username=f"{PREFIJO}cliente_{j}",
+            email=f"cliente{j}@example.cl",
+            password=plan.clave,
+            rut=rut,
+            rut_normalizado=normalizado,
+        )
+        for j, (rut, normalizado) in zip(indices_clientes, _ruts([BASE_RUT_CONSUMIDOR + j for j in indices_clientes]))
+    ]
+
+    proveedores, regiones = [], []
+    for i, usuario, (rut, normalizado) in zip(indices, duenos, _ruts([BASE_RUT + i for i in indices])):
+        comuna_id, region_id, latitud, longitud = rng.choices(plan.comunas, cum_weights=plan.acumulados)[0]
+        proveedores.append(Proveedor(
+            pk=next(ids["proveedor"]),
+            usuario_id=usuario.pk,
+            razon_social=f"Leñas del Sur {i} SpA",
+            rut=rut,
+            rut_normalizado=normalizado,
+            nombre_comercial=f"Leñas {ESPECIES[i % len(ESPECIES)]} {i}",
+            email_contacto=usuario.email,
+            telefono_contacto=f"+569{rng.randint(10_000_000, 99_999_999)}",
+            direccion_texto=f"Camino {rng.randint(1, 999)}",
+            comuna_id=comuna_id,
+            latitud=latitud + rng.gauss(0, 0.05),
+            longitud=longitud + rng.gauss(0, 0.05),
+            numero_sncl=f"SNCL-{i}",
+            es_proveedor_biocombustible=True,
+            es_prestador_servicios=rng.random() < 0.5,
+        ))
+        regiones.append(region_id)
+
+    productos, servicios, resenas, intentos = [], [], [], []
+    for proveedor, region_id in zip(proveedores, regiones):
+        for _ in range(rng.randint(0, 2 * plan.productos)):
+            comuna_id = proveedor.comuna_id
+            if rng.random() < OTRA_COMUNA:
+                comuna_id = rng.choice(vecinas[region_id])
+            productos.append(_producto(rng, next(ids["producto"]), proveedor.pk, comuna_id))
+        if proveedor.es_prestador_servicios:
+            for _ in range(rng.randint(0, 2 * plan.servicios)):
+                tipo = rng.choice(list(SERVICIOS))
+                nombre, precio, unidad = SERVICIOS[tipo]
+                servicios.append(Servicio(
+                    pk=next(ids["servicio"]),
+                    proveedor_id=proveedor.pk,
+                    tipo_servicio=tipo,
+                    nombre=nombre,
+                    descripcion=f"{nombre} en la comuna y alrededores.",
+                    precio_base=Decimal(round(precio * rng.uniform(0.8, 1.3), -2)),
+                    unidad_precio=unidad,
+                ))
+        if clientes:
+            for _ in range(rng.randint(0, 2 * plan.resenas)):
+                resenas.append(Resena(
+                    pk=next(ids["resena"]),
+                    proveedor_id=proveedor.pk,
+                    usuario_id=rng.choice(clientes).pk,
+                    puntaje=rng.choices(range(1, 6), weights=PESOS_PUNTAJE)[0],
+                    comentario=rng.choice(COMENTARIOS),
+                ))
+    if plan.quizzes:
+        for cliente in clientes:
+            for _ in range(rng.randint(0, 2 * plan.intentos)):
+                intentos.append(_intento(rng, next(ids["intento"]), cliente.pk, plan.quizzes))
+
+    filas = {
+        "usuarios": duenos + clientes,
+        "proveedores": proveedores,
+        "productos": productos,
+        "servicios": servicios,
+        "resenas": resenas,
+        "intentos": intentos,
+    }
+    with transaction.atomic():
+        for objetos in filas.values():
+            if objetos:
+                type(objetos[0]).objects.bulk_create(objetos, batch_size=plan.tamano_lote)
+    return {campo: len(objetos) for campo, objetos in filas.items()}
+
+
+def _sembrar_bloque_en_proceso(base, plan, bloque):
+    """
+    sembrar_bloque() en un proceso del pool, contra la misma base que el
+    proceso principal (también si sus ajustes se cambiaron en tiempo de
+    ejecución). El inicializador del pool es django.setup: esta función se
+    deserializa después, cuando los modelos ya se pueden importar.
+    """
+    if connection.settings_dict != base:
+        connection.close()
+        connection.settings_dict.update(base)
+    return sembrar_bloque(plan, bloque)
+
+
+# ---------- orquestación ----------
+
+
+def _reiniciar_secuencias(modelos):
+    """
+    Con pk explícitos PostgreSQL no avanza las secuencias (SQLite sí).
+    """
+    sentencias = connection.ops.sequence_reset_sql(no_style(), modelos)
+    if sentencias:
+        with connection.cursor() as cursor:
+            for sentencia in sentencias:
+                cursor.execute(sentencia)
+
+
+def sembrar(proveedores=200, productos_por_proveedor=20, servicios_por_proveedor=2,
+            resenas_por_proveedor=8, consumidores_por_proveedor=2, intentos_por_consumidor=1,
+            contenidos=10, semilla=0, procesos=1, tamano_bloque=TAMANO_BLOQUE, tamano_lote=TAMANO_LOTE):
+    """
+    Genera el marketplace sintético. Los `*_por_proveedor` e
+    `intentos_por_consumidor` son promedios (cada uno recibe entre 0 y el
+    doble); `consumidores_por_proveedor` es exacto. Con `procesos` > 1 los
+    bloques se reparten en un pool de procesos. Si un bloque falla, los ya
+    guardados quedan: se borran con limpiar(). Devuelve un ResultadoSembrado.
+    """
+    Usuario = get_user_model()
+    if Usuario.objects.filter(username__startswith=PREFIJO).exists():
+        raise ValueError("La base ya tiene datos sembrados: bórrelos antes con limpiar().")
+
+    resultado = ResultadoSembrado()
+    comunas, pesos = _territorio()
+    resultado.comunas = len(comunas)
+    resultado.contenidos = _contenidos(contenidos)
+    quizzes = _quizzes()
+    modelos = _modelos()
+
+    plan = _Plan(
+        semilla=semilla,
+        proveedores=proveedores,
+        tamano_bloque=tamano_bloque,
+        productos=productos_por_proveedor,
+        servicios=servicios_por_proveedor,
+        resenas=resenas_por_proveedor,
+        consumidores=consumidores_por_proveedor,
+        intentos=intentos_por_consumidor,
+        tamano_lote=tamano_lote,
+        clave=make_password(CLAVE),
+        comunas=tuple(comunas),
+        acumulados=tuple(accumulate(pesos)),
+        quizzes=quizzes,
+        bases={nombre: modelo.objects.aggregate(m=Max("pk"))["m"] or 0 for nombre, modelo in modelos.items()},
+    )
+    bloques = range(math.ceil(proveedores / tamano_bloque))
+
+    # Los procesos del pool no ven una transacción abierta aquí ni una base en memoria
+    en_memoria = connection.vendor == "sqlite" and connection.is_in_memory_db()
+    if procesos <= 1 or len(bloques) <= 1 or connection.in_atomic_block or en_memoria:
+        for bloque in bloques:
+            resultado.sumar(sembrar_bloque(plan, bloque))
+    else:
+        base = dict(connection.settings_dict)
+        if connection.vendor == "sqlite":
+            # SQLite admite un solo escritor: los demás esperan su turno
+            base["OPTIONS"] = {**base["OPTIONS"], "timeout": ESPERA_SQLITE}
+        with ProcessPoolExecutor(
+            max_workers=procesos,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as pool:
+            for parcial in pool.map(_sembrar_bloque_en_proceso, repeat(base), repeat(plan), bloques):
+                resultado.sumar(parcial)
+
+    _reiniciar_secuencias(list(modelos.values()))
+    recalcular_calificaciones(
+        Proveedor.objects.filter(usuario__username__startswith=PREFIJO).values("pk")
+    )
+    for contenido_id, _ in quizzes:
+        recalcular_estadisticas(contenido_id, tamano_lote=tamano_lote)
+    busqueda.reconstruir_indice(tamano_lote=tamano_lote)
+    invalidar_referencias()
+    return resultado
+
+
+def _borrar_en_bloque(queryset):
+    """
+    Un DELETE por tabla. QuerySet.delete() traería cada fila para enviar su
+    post_delete (desindexar, aplicar_delta, invalidar_roles): lo que esas
+    señales mantienen se reconstruye en limpiar() o desaparece con el proveedor.
+    """
+    opts = queryset.model._meta
+    subconsulta, parametros = queryset.order_by().values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {connection.ops.quote_name(opts.db_table)} "
+            f"WHERE {connection.ops.quote_name(opts.pk.column)} IN ({subconsulta})",
+            parametros,
+        )
+        return cursor.rowcount
+
+
+def limpiar():
+    """
+    Borra los usuarios sembrados (con sus proveedores, productos, servicios,
+    reseñas, pedidos, carritos e intentos de quiz) y los contenidos sembrados.
+    """
+    Usuario = get_user_model()
+    sembrados = Usuario.objects.filter(username__startswith=PREFIJO)
+    proveedores = Proveedor.objects.filter(usuario__username__startswith=PREFIJO)
+    productos = Producto.objects.filter(proveedor__in=proveedores)
+    servicios = Servicio.objects.filter(proveedor__in=proveedores)
+    duenos = list(proveedores.values_list("usuario_id", flat=True))
+    with transaction.atomic():
+        # Pedido protege al usuario y al proveedor. Lo que apunta a ellos o al
+        # catálogo sembrado (pocas filas) se borra antes, con sus señales
+        Pedido.objects.filter(Q(proveedor__in=proveedores) | Q(usuario__in=sembrados)).delete()
+        Carrito.objects.filter(usuario__in=sembrados).delete()
+        ReservaStock.objects.filter(producto__in=productos).delete()
+        ItemCarrito.objects.filter(producto__in=productos).delete()
+        LineaPedido.objects.filter(producto__in=productos).update(producto=None)
+        Servicio.comunas_cobertura.through.objects.filter(servicio__in=servicios).delete()
+        TarifaEnvio.objects.filter(proveedor__in=proveedores).delete()
+        borrados = sum(
+            _borrar_en_bloque(queryset)
+            for queryset in (productos, servicios, Resena.objects.filter(proveedor__in=proveedores), proveedores)
+        )
+        usuarios, _ = sembrados.delete()
+        contenidos, _ = ContenidoEducativo.objects.filter(slug__startswith=PREFIJO_SLUG).delete()
+    invalidar_roles(*duenos)
+    busqueda.reconstruir_indice()
+    return borrados + usuarios + contenidos
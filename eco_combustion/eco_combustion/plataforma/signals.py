@@ -0,0 +1,168 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import busqueda
+from .calificaciones import aplicar_delta, aporte
+from .envios import invalidar_tarifas
+from .educativo import invalidar_contenido
+from .evaluacion import invalidar_clave
+from .models import (
+    Comuna,
+    ContenidoEducativo,
+    Producto,
+    Proveedor,
+    QuizOpcion,
+    QuizPregunta,
+    Region,
+    Resena,
+    Servicio,
+    SolicitudRolComercial,
+    TarifaEnvio,
+)
+from .referencias import invalidar_referencias
+from .roles import invalidar_roles
+from .solicitudes import ajustar_pendientes
+
+
+@receiver([post_save, post_delete], sender=TarifaEnvio)
+def tarifa_envio_cambiada(sender, instance, **kwargs):
+    invalidar_tarifas(instance.proveedor_id)
+
+
+@receiver([post_save, post_delete], sender=Proveedor)
+def proveedor_cambiado(sender, instance, **kwargs):
+    invalidar_roles(instance.usuario_id)
+
+
+@receiver([post_save, post_delete], sender=Region)
+@receiver([post_save, post_delete], sender=Comuna)
+def referencias_cambiadas(sender, **kwargs):
+    invalidar_referencias()
+
+
+# ---------- índice de búsqueda (solo SQLite/FTS5; en PostgreSQL no hace nada) ----------
+
+@receiver(post_save, sender=Producto)
+def producto_guardado(sender, instance, **kwargs):
+    busqueda.indexar("producto", instance)
+
+
+@receiver(post_save, sender=Servicio)
+def servicio_guardado(sender, instance, **kwargs):
+    busqueda.indexar("servicio", instance)
+
+
+@receiver(post_save, sender=Proveedor)
+def proveedor_guardado(sender, instance, **kwargs):
+    busqueda.indexar("proveedor", instance)
+
+
+@receiver(post_delete, sender=Producto)
+@receiver(post_delete, sender=Servicio)
+@receiver(post_delete, sender=Proveedor)
+def publicacion_borrada(sender, instance, **kwargs):
+    busqueda.desindexar(sender._meta.model_name, instance.pk)
+
+
+# ---------- resumen de calificaciones del proveedor ----------
+
+@receiver(pre_save, sender=Resena)
+def resena_por_guardar(sender, instance, **kwargs):
+    # Estado anterior, para aplicar solo la diferencia en post_save
+    instance._anterior = None
+    if instance.pk:
+        instance._anterior = (
+            Resena.objects
+            .filter(pk=instance.pk)
+            .values_list("proveedor_id", "visible", "puntaje")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Resena)
+def resena_guardada(sender, instance, **kwargs):
+    anterior = getattr(instance, "_anterior", None)
+    if anterior is not None:
+        proveedor_id, visible, puntaje = anterior
+        cantidad, suma = aporte(visible, puntaje)
+        aplicar_delta(proveedor_id, -cantidad, -suma)
+    aplicar_delta(instance.proveedor_id, *aporte(instance.visible, instance.puntaje))
+
+
+@receiver(post_delete, sender=Resena)
+def resena_borrada(sender, instance, **kwargs):
+    cantidad, suma = aporte(instance.visible, instance.puntaje)
+    aplicar_delta(instance.proveedor_id, -cantidad, -suma)
+
+
+# ---------- clave de respuestas de los quizzes ----------
+
+@receiver(post_save, sender=QuizPregunta)
+@receiver(post_delete, sender=QuizPregunta)
+def pregunta_quiz_cambiada(sender, instance, **kwargs):
+    invalidar_clave(instance.contenido_id)
+    # La cantidad de preguntas entra en el ETag de la página (botón "Responder quiz")
+    slug = ContenidoEducativo.objects.filter(pk=instance.contenido_id).values_list("slug", flat=True).first()
+    if slug is not None:
+        invalidar_contenido(slug)
+
+
+@receiver(post_save, sender=QuizOpcion)
+@receiver(post_delete, sender=QuizOpcion)
+def opcion_quiz_cambiada(sender, instance, **kwargs):
+    # Si la pregunta ya se borró (cascada), su propia señal invalida la clave
+    contenido_id = (
+        QuizPregunta.objects.filter(pk=instance.pregunta_id)
+        .values_list("contenido_id", flat=True)
+        .first()
+    )
+    if contenido_id is not None:
+        invalidar_clave(contenido_id)
+
+
+# ---------- contenido educativo (ETag / Last-Modified y fragmentos) ----------
+
+@receiver(pre_save, sender=ContenidoEducativo)
+def contenido_por_guardar(sender, instance, **kwargs):
+    # Si cambia el slug hay que invalidar también el anterior
+    instance._slug_anterior = None
+    if instance.pk:
+        instance._slug_anterior = (
+            ContenidoEducativo.objects.filter(pk=instance.pk).values_list("slug", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=ContenidoEducativo)
+@receiver(post_delete, sender=ContenidoEducativo)
+def contenido_cambiado(sender, instance, **kwargs):
+    slugs = {instance.slug, getattr(instance, "_slug_anterior", None)} - {None}
+    invalidar_contenido(*slugs)
+
+
+# ---------- contador de solicitudes pendientes ----------
+
+def _es_pendiente(estado):
+    return estado == SolicitudRolComercial.EstadoSolicitud.PENDIENTE
+
+
+@receiver(pre_save, sender=SolicitudRolComercial)
+def solicitud_por_guardar(sender, instance, **kwargs):
+    instance._estado_anterior = None
+    if instance.pk:
+        instance._estado_anterior = (
+            SolicitudRolComercial.objects.filter(pk=instance.pk).values_list("estado", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=SolicitudRolComercial)
+def solicitud_guardada(sender, instance, **kwargs):
+    antes = _es_pendiente(getattr(instance, "_estado_anterior", None))
+    delta = int(_es_pendiente(instance.estado)) - int(antes)
+    transaction.on_commit(lambda: ajustar_pendientes(delta))
+
+
+@receiver(post_delete, sender=SolicitudRolComercial)
+def solicitud_borrada(sender, instance, **kwargs):
+    if _es_pendiente(instance.estado):
+        transaction.on_commit(lambda: ajustar_pendientes(-1))
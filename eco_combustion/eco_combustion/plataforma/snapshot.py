@@ -0,0 +1,276 @@
+"""
+Datos para desarrollo a partir de una copia de producción.
+
+- anonimizar(): reemplaza los datos personales (correo, RUT, teléfono,
+  dirección, nombre, coordenadas de domicilio) con un UPDATE por tabla. Los
+  valores salen del id de cada fila, así que todo se calcula en la base,
+  también el dígito verificador de los RUT sintéticos.
+- exportar_snapshot(): copia a un archivo SQLite un subconjunto consistente
+  (los primeros N proveedores con su catálogo, sus pedidos y un grupo de
+  usuarios), lo anonimiza y reconstruye su índice de búsqueda.
+"""
+import os
+from functools import reduce
+
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Case, CharField, F, IntegerField, Value, When
+from django.db.models.functions import Cast, Concat, Mod, Round
+from django.db.models.lookups import Exact
+
+from . import busqueda
+from .models import (
+    Carrito,
+    Comuna,
+    ContenidoEducativo,
+    CorreoPendiente,
+    ItemCarrito,
+    LineaPedido,
+    Pedido,
+    PerfilUsuario,
+    Producto,
+    Proveedor,
+    QuizDistribucionPuntaje,
+    QuizEstadistica,
+    QuizEstadisticaPregunta,
+    QuizIntentoUsuario,
+    QuizOpcion,
+    QuizPregunta,
+    Region,
+    Resena,
+    Servicio,
+    SolicitudRolComercial,
+    TarifaEnvio,
+)
+from .validador import FACTORES_DV, MAX_DIGITOS_CUERPO
+
+# Los RUT reales no pasan de 99.999.999: desde aquí no hay choques con el
+# índice único mientras el UPDATE recorre la tabla
+BASE_RUT_SINTETICO = 100_000_000
+DOMINIO_ANONIMO = "example.invalid"
+TELEFONO_ANONIMO = "+56900000000"
+# Dos decimales: unos 1,1 km, suficiente para probar cotizaciones de envío
+DECIMALES_COORDENADAS = 2
+
+ALIAS_SNAPSHOT = "snapshot"
+MAX_PROVEEDORES = 50
+MAX_USUARIOS = 200
+TAMANO_LOTE = 2000
+
+
+# ---------- anonimización ----------
+
+
+def _texto_con_id(prefijo, sufijo=""):
+    partes = [Value(prefijo), Cast("pk", CharField())]
+    if sufijo:
+        partes.append(Value(sufijo))
+    return Concat(*partes, output_field=CharField())
+
+
+def _rut_sintetico():
+    """
+    Expresión "<BASE + id>-<dv>" con el dígito verificador calculado en SQL:
+    cada dígito sale de (cuerpo / 10^i) % 10 y se multiplica por su factor.
+    """
+    cuerpo = F("pk") + Value(BASE_RUT_SINTETICO)
+    suma = reduce(
+        lambda total, termino: total + termino,
+        [
+            Mod(cuerpo / Value(10**i), Value(10)) * Value(FACTORES_DV[i % len(FACTORES_DV)])
+            for i in range(MAX_DIGITOS_CUERPO)
+        ],
+    )
+    # En SQLite MOD devuelve un real: sin el Cast el dígito saldría "5.0"
+    resto = Cast(Mod(suma, Value(11)), IntegerField())
+    dv = Case(
+        When(Exact(resto, 0), then=Value("0")),
+        When(Exact(resto, 1), then=Value("K")),
+        default=Cast(Value(11) - resto, CharField()),
+        output_field=CharField(),
+    )
+    return Concat(Cast(cuerpo, CharField()), Value("-"), dv, output_field=CharField())
+
+
+def anonimizar(using=DEFAULT_DB_ALIAS, clave=None):
+    """
+    Anonimiza la base `using` en una transacción. Con `clave`, todas las
+    cuentas quedan con esa contraseña; si no, sin contraseña utilizable.
+    Devuelve {tabla: filas actualizadas o borradas}.
+    """
+    Usuario = get_user_model()
+    rut = _rut_sintetico()
+    filas = {}
+    with transaction.atomic(using=using):
+        usuarios = Usuario.objects.using(using)
+        # Primero a un valor que ningún username válido puede tener, para que
+        # el UPDATE siguiente no choque con el índice único a mitad de camino
+        usuarios.update(username=_texto_con_id("~"))
+        filas["usuario"] = usuarios.update(
+            username=_texto_con_id("usuario"),
+            email=_texto_con_id("usuario", f"@{DOMINIO_ANONIMO}"),
+            first_name=Value("Usuario"),
+            last_name=Cast("pk", CharField()),
+            password=Value(make_password(clave)),
+        )
+        usuarios.filter(rut__isnull=False).exclude(rut="").update(rut=rut, rut_normalizado=rut)
+
+        filas["proveedor"] = Proveedor.objects.using(using).update(
+            rut=rut,
+            rut_normalizado=rut,
+            email_contacto=_texto_con_id("proveedor", f"@{DOMINIO_ANONIMO}"),
+            telefono_contacto=Value(TELEFONO_ANONIMO),
+            direccion_texto=_texto_con_id("Dirección "),
+        )
+        filas["perfil"] = PerfilUsuario.objects.using(using).update(
+            telefono=Value(""),
+            direccion_texto=Value(""),
+            latitud=Round("latitud", DECIMALES_COORDENADAS),
+            longitud=Round("longitud", DECIMALES_COORDENADAS),
+        )
+        filas["solicitud"] = SolicitudRolComercial.objects.using(using).update(
+            datos_contacto=Value(""),
+            direccion_punto_venta=_texto_con_id("Dirección "),
+        )
+        filas["pedido"] = Pedido.objects.using(using).update(
+            latitud_destino=Round("latitud_destino", DECIMALES_COORDENADAS),
+            longitud_destino=Round("longitud_destino", DECIMALES_COORDENADAS),
+        )
+        # Correos con enlaces de verificación, sesiones y el historial del admin
+        # (guarda nombres y correos en object_repr): no sirven en desarrollo
+        for modelo in (CorreoPendiente, Session, LogEntry):
+            filas[modelo._meta.model_name], _ = modelo.objects.using(using).all().delete()
+    return filas
+
+
+# ---------- snapshot SQLite ----------
+
+
+def _registrar_base(ruta):
+    config = {"ENGINE": "django.db.backends.sqlite3", "NAME": str(ruta)}
+    connections.settings[ALIAS_SNAPSHOT] = connections.configure_settings({
+        DEFAULT_DB_ALIAS: connections.settings[DEFAULT_DB_ALIAS],
+        ALIAS_SNAPSHOT: config,
+    })[ALIAS_SNAPSHOT]
+
+
+def _quitar_base():
+    if ALIAS_SNAPSHOT in connections:
+        connections[ALIAS_SNAPSHOT].close()
+        del connections[ALIAS_SNAPSHOT]
+    connections.settings.pop(ALIAS_SNAPSHOT, None)
+
+
+def _subconjunto(max_proveedores, max_usuarios):
+    """
+    [(modelo, queryset)] en orden de dependencias: los primeros proveedores
+    activos, sus usuarios, el staff y los primeros `max_usuarios` usuarios
+    restantes. Los querysets pueden traer de más: _copiar descarta las filas
+    que apuntan a algo que no se copió.
+    """
+    Usuario = get_user_model()
+    proveedores = list(
+        Proveedor.objects
+        .filter(estado=Proveedor.EstadoProveedor.ACTIVO)
+        .order_by("pk")
+        .values_list("pk", flat=True)[:max_proveedores]
+    )
+    usuarios = set(Proveedor.objects.filter(pk__in=proveedores).values_list("usuario_id", flat=True))
+    usuarios.update(Usuario.objects.filter(is_staff=True).values_list("pk", flat=True))
+    usuarios.update(
+        Usuario.objects
+        .filter(proveedor__isnull=True, is_staff=False)
+        .order_by("pk")
+        .values_list("pk", flat=True)[:max_usuarios]
+    )
+    cobertura = Servicio.comunas_cobertura.through
+    return [
+        (Region, Region.objects.all()),
+        (Comuna, Comuna.objects.all()),
+        (Usuario, Usuario.objects.filter(pk__in=usuarios)),
+        (PerfilUsuario, PerfilUsuario.objects.filter(usuario_id__in=usuarios)),
+        (SolicitudRolComercial, SolicitudRolComercial.objects.filter(usuario_id__in=usuarios)),
+        (Proveedor, Proveedor.objects.filter(pk__in=proveedores)),
+        (TarifaEnvio, TarifaEnvio.objects.filter(proveedor_id__in=proveedores)),
+        (Producto, Producto.objects.filter(proveedor_id__in=proveedores)),
+        (Servicio, Servicio.objects.filter(proveedor_id__in=proveedores)),
+        (cobertura, cobertura.objects.filter(servicio__proveedor_id__in=proveedores)),
+        (Resena, Resena.objects.filter(proveedor_id__in=proveedores, usuario_id__in=usuarios)),
+        (ContenidoEducativo, ContenidoEducativo.objects.all()),
+        (QuizPregunta, QuizPregunta.objects.all()),
+        (QuizOpcion, QuizOpcion.objects.all()),
+        (QuizEstadistica, QuizEstadistica.objects.all()),
+        (QuizDistribucionPuntaje, QuizDistribucionPuntaje.objects.all()),
+        (QuizEstadisticaPregunta, QuizEstadisticaPregunta.objects.all()),
+        (QuizIntentoUsuario, QuizIntentoUsuario.objects.filter(usuario_id__in=usuarios)),
+        (Carrito, Carrito.objects.filter(usuario_id__in=usuarios)),
+        (ItemCarrito, ItemCarrito.objects.filter(carrito__usuario_id__in=usuarios, producto__proveedor_id__in=proveedores)),
+        (Pedido, Pedido.objects.filter(proveedor_id__in=proveedores, usuario_id__in=usuarios)),
+        (LineaPedido, LineaPedido.objects.filter(pedido__proveedor_id__in=proveedores, pedido__usuario_id__in=usuarios)),
+    ]
+
+
+def _copiar(modelo, queryset, copiados, tamano_lote):
+    """
+    Copia las filas a la base del snapshot. Una FK hacia una fila que no se
+    copió queda en NULL si se puede; si no, la fila se omite.
+    """
+    relaciones = [campo for campo in modelo._meta.concrete_fields if campo.is_relation]
+    ids = copiados.setdefault(modelo, set())
+    lote = []
+
+    def guardar():
+        modelo.objects.using(ALIAS_SNAPSHOT).bulk_create(lote, batch_size=tamano_lote)
+        ids.update(objeto.pk for objeto in lote)
+        lote.clear()
+
+    for objeto in queryset.order_by("pk").iterator(chunk_size=tamano_lote):
+        for campo in relaciones:
+            destino = copiados.get(campo.related_model)
+            valor = getattr(objeto, campo.attname)
+            if destino is None or valor is None or valor in destino:
+                continue
+            if not campo.null:
+                break
+            setattr(objeto, campo.attname, None)
+        else:
+            lote.append(objeto)
+            if len(lote) >= tamano_lote:
+                guardar()
+    if lote:
+        guardar()
+    return len(ids)
+
+
+def exportar_snapshot(ruta, max_proveedores=MAX_PROVEEDORES, max_usuarios=MAX_USUARIOS,
+                      anonimizar_datos=True, clave=None, tamano_lote=TAMANO_LOTE):
+    """
+    Escribe en `ruta` una base SQLite migrada con un subconjunto consistente
+    de la base actual (reemplaza el archivo al terminar, nunca queda a medias).
+    Devuelve {modelo: filas copiadas}.
+    """
+    temporal = f"{ruta}.tmp"
+    if os.path.exists(temporal):
+        os.remove(temporal)
+    _registrar_base(temporal)
+    try:
+        call_command("migrate", database=ALIAS_SNAPSHOT, interactive=False, verbosity=0)
+        copiados, totales = {}, {}
+        with transaction.atomic(using=ALIAS_SNAPSHOT):
+            for modelo, queryset in _subconjunto(max_proveedores, max_usuarios):
+                totales[modelo._meta.label] = _copiar(modelo, queryset, copiados, tamano_lote)
+        if anonimizar_datos:
+            anonimizar(using=ALIAS_SNAPSHOT, clave=clave)
+        busqueda.reconstruir_indice(tamano_lote=tamano_lote, using=ALIAS_SNAPSHOT)
+    except BaseException:
+        _quitar_base()
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    _quitar_base()
+    os.replace(temporal, ruta)
+    return totales
@@ -0,0 +1,300 @@
+"""
+Resolución (aprobar / rechazar) de solicitudes de rol comercial en lote.
+
+Todo ocurre en una transacción y con una cantidad fija de consultas, sin
+importar cuántas solicitudes se resuelvan: bulk_create / bulk_update para
+Proveedor y un UPDATE con CASE para Usuario.tipo_usuario. Como las
+operaciones en lote no envían señales, la caché de roles y el índice de
+búsqueda se actualizan a mano al confirmar la transacción.
+"""
+from dataclasses import dataclass, field
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, CharField, Value, When
+from django.utils import timezone
+
+from . import busqueda
+from .correos import encolar_lote, preparar_resolucion_solicitud
+from .models import Producto, Proveedor, Servicio, SolicitudRolComercial
+from .roles import invalidar_roles
+from .validador import normalizar_rut
+
+# Hasta que el usuario registre su RUT. Proveedor.rut es único: solo un
+# proveedor puede tenerlo, las demás solicitudes sin RUT quedan pendientes.
+RUT_PROVISORIO = "11.111.111-1"
+
+TIPO_USUARIO_POR_SOLICITUD = {
+    SolicitudRolComercial.TipoSolicitud.PROVEEDOR: "proveedor",
+    SolicitudRolComercial.TipoSolicitud.PRESTADOR: "servicio",
+    SolicitudRolComercial.TipoSolicitud.AMBOS: "ambos",
+}
+TIPO_USUARIO_SIN_ROL = "consumidor"
+
+CAMPOS_PROVEEDOR_APROBACION = [
+    "razon_social",
+    "nombre_comercial",
+    "email_contacto",
+    "telefono_contacto",
+    "direccion_texto",
+    "comuna",
+    "es_proveedor_biocombustible",
+    "es_prestador_servicios",
+    "fecha_aprobacion",
+    "estado",
+]
+
+TAMANO_LOTE = 500
+
+CACHE_PENDIENTES = "solicitudes_pendientes"
+# El contador se ajusta con incr/decr; el TTL corrige cualquier desvío
+CACHE_PENDIENTES_TIMEOUT = 60 * 10
+
+
+def contar_pendientes():
+    """
+    Cantidad de solicitudes pendientes, servida desde la caché.
+    """
+    total = cache.get(CACHE_PENDIENTES)
+    if total is None:
+        total = SolicitudRolComercial.objects.filter(
+            estado=SolicitudRolComercial.EstadoSolicitud.PENDIENTE
+        ).count()
+        cache.set(CACHE_PENDIENTES, total, CACHE_PENDIENTES_TIMEOUT)
+    return total
+
+
+def ajustar_pendientes(delta):
+    """
+    Suma `delta` al contador en caché. Si no está cargado no hace nada:
+    la próxima lectura lo recalcula.
+    """
+    if not delta:
+        return
+    try:
+        cache.incr(CACHE_PENDIENTES, delta)
+    except ValueError:
+        pass
+
+
+@dataclass
+class ResultadoResolucion:
+    resueltas: list = field(default_factory=list)
+    # {solicitud_id: motivo} de las que no se pudieron resolver
+    omitidas: dict = field(default_factory=dict)
+
+
+def _telefono(texto):
+    return (texto or "")[: Proveedor._meta.get_field("telefono_contacto").max_length]
+
+
+def _nuevo_proveedor(solicitud, rut):
+    usuario = solicitud.usuario
+    return Proveedor(
+        usuario=usuario,
+        razon_social=solicitud.nombre_comercio or usuario.get_full_name() or usuario.username,
+        rut=rut,
+        # bulk_create no pasa por save()
+        rut_normalizado=normalizar_rut(rut),
+        nombre_comercial=solicitud.nombre_comercio or usuario.username,
+        email_contacto=usuario.email or "",
+        telefono_contacto=_telefono(solicitud.datos_contacto),
+        direccion_texto=solicitud.direccion_punto_venta or "",
+        comuna_id=usuario.comuna_id,
+        numero_sncl=(solicitud.datos_adicionales or {}).get("numero_sncl", ""),
+    )
+
+
+def _aplicar_solicitud(proveedor, solicitud, ahora):
+    """
+    Actualiza en memoria el proveedor con lo que trae la solicitud aprobada.
+    """
+    usuario = solicitud.usuario
+    if solicitud.nombre_comercio:
+        proveedor.nombre_comercial = solicitud.nombre_comercio
+        if not proveedor.razon_social:
+            proveedor.razon_social = solicitud.nombre_comercio
+    if usuario.email:
+        proveedor.email_contacto = usuario.email
+    if solicitud.datos_contacto:
+        proveedor.telefono_contacto = _telefono(solicitud.datos_contacto)
+    if solicitud.direccion_punto_venta:
+        proveedor.direccion_texto = solicitud.direccion_punto_venta
+    if usuario.comuna_id:
+        proveedor.comuna_id = usuario.comuna_id
+
+    tipo = solicitud.tipo_solicitud
+    proveedor.es_proveedor_biocombustible = tipo in ("PROVEEDOR", "AMBOS")
+    proveedor.es_prestador_servicios = tipo in ("PRESTADOR", "AMBOS")
+    proveedor.fecha_aprobacion = ahora
+    proveedor.estado = Proveedor.EstadoProveedor.ACTIVO
+
+
+def _actualizar_tipo_usuario(tipos):
+    """
+    {usuario_id: tipo_usuario} con un solo UPDATE ... SET tipo_usuario = CASE ...
+    """
+    if not tipos:
+        return
+    get_user_model().objects.filter(pk__in=tipos).update(
+        tipo_usuario=Case(
+            *[When(pk=pk, then=Value(tipo)) for pk, tipo in tipos.items()],
+            output_field=CharField(),
+        )
+    )
+
+
+def _aprobar(solicitudes, ahora, resultado):
+    # Si un usuario tiene varias solicitudes en el lote, manda la más reciente
+    por_usuario = {}
+    for solicitud in sorted(solicitudes, key=lambda s: (s.fecha_envio, s.pk)):
+        por_usuario[solicitud.usuario_id] = solicitud
+
+    existentes = {
+        proveedor.usuario_id: proveedor
+        for proveedor in Proveedor.objects.filter(usuario_id__in=por_usuario)
+    }
+    ruts_nuevos = {
+        usuario_id: solicitud.usuario.rut or RUT_PROVISORIO
+        for usuario_id, solicitud in por_usuario.items()
+        if usuario_id not in existentes
+    }
+    # Por la forma normalizada: "12.345.678-5" y "12345678-5" son el mismo RUT
+    ruts_tomados = set(
+        Proveedor.objects
+        .filter(rut_normalizado__in={normalizar_rut(rut) for rut in ruts_nuevos.values()})
+        .values_list("rut_normalizado", flat=True)
+    )
+
+    nuevos, actualizados, tipos = [], [], {}
+    for usuario_id, solicitud in por_usuario.items():
+        proveedor = existentes.get(usuario_id)
+        if proveedor is None:
+            rut = ruts_nuevos[usuario_id]
+            if normalizar_rut(rut) in ruts_tomados:
+                continue
+            ruts_tomados.add(normalizar_rut(rut))
+            proveedor = _nuevo_proveedor(solicitud, rut)
+            nuevos.append(proveedor)
+        else:
+            actualizados.append(proveedor)
+        _aplicar_solicitud(proveedor, solicitud, ahora)
+        tipos[usuario_id] = TIPO_USUARIO_POR_SOLICITUD[solicitud.tipo_solicitud]
+
+    for solicitud in solicitudes:
+        if solicitud.usuario_id in tipos:
+            resultado.resueltas.append(solicitud.pk)
+        else:
+            resultado.omitidas[solicitud.pk] = "El RUT del usuario ya está registrado por otro proveedor."
+
+    Proveedor.objects.bulk_create(nuevos, batch_size=TAMANO_LOTE)
+    Proveedor.objects.bulk_update(actualizados, CAMPOS_PROVEEDOR_APROBACION, batch_size=TAMANO_LOTE)
+    _actualizar_tipo_usuario(tipos)
+
+    proveedores = nuevos + actualizados
+    usuario_ids = list(tipos)
+
+    def _al_confirmar():
+        invalidar_roles(*usuario_ids)
+        busqueda.indexar_lote("proveedor", proveedores)
+
+    transaction.on_commit(_al_confirmar)
+
+
+def desactivar_comerciales(usuario_ids):
+    """
+    Corta el acceso comercial de varios usuarios: desactiva su Proveedor,
+    apaga los flags, despublica productos/servicios y los deja como consumidores.
+    """
+    usuario_ids = list(usuario_ids)
+    proveedor_ids = list(
+        Proveedor.objects.filter(usuario_id__in=usuario_ids).values_list("pk", flat=True)
+    )
+    producto_ids = list(
+        Producto.objects.filter(proveedor_id__in=proveedor_ids).values_list("pk", flat=True)
+    )
+    servicio_ids = list(
+        Servicio.objects.filter(proveedor_id__in=proveedor_ids).values_list("pk", flat=True)
+    )
+
+    Proveedor.objects.filter(pk__in=proveedor_ids).update(
+        estado=Proveedor.EstadoProveedor.INACTIVO,
+        es_proveedor_biocombustible=False,
+        es_prestador_servicios=False,
+    )
+    Producto.objects.filter(pk__in=producto_ids).update(activo=False)
+    Servicio.objects.filter(pk__in=servicio_ids).update(activo=False)
+    get_user_model().objects.filter(pk__in=usuario_ids).update(tipo_usuario=TIPO_USUARIO_SIN_ROL)
+
+    def _al_confirmar():
+        invalidar_roles(*usuario_ids)
+        busqueda.desindexar_lote("proveedor", proveedor_ids)
+        busqueda.desindexar_lote("producto", producto_ids)
+        busqueda.desindexar_lote("servicio", servicio_ids)
+
+    transaction.on_commit(_al_confirmar)
+
+
+def resolver_solicitudes(solicitud_ids, accion, comentario="", solo_pendientes=True):
+    """
+    Aprueba (accion="aprobar") o rechaza (accion="rechazar") las solicitudes
+    indicadas en una sola transacción. Con `solo_pendientes` las ya resueltas
+    se omiten. Devuelve un ResultadoResolucion.
+
+    Rechazar corta además el acceso comercial del usuario (desactivar_comerciales),
+    como siempre hizo la vista HTML: un proveedor ya aprobado al que se le rechaza
+    una solicitud nueva queda inactivo y sus productos y servicios despublicados.
+    """
+    if accion not in ("aprobar", "rechazar"):
+        raise ValueError(f"Acción no válida: {accion}")
+
+    resultado = ResultadoResolucion()
+    ahora = timezone.now()
+
+    with transaction.atomic():
+        solicitudes = (
+            SolicitudRolComercial.objects
+            .select_for_update(of=("self",))
+            .select_related("usuario")
+            .filter(pk__in=solicitud_ids)
+        )
+        if solo_pendientes:
+            solicitudes = solicitudes.filter(estado=SolicitudRolComercial.EstadoSolicitud.PENDIENTE)
+        solicitudes = list(solicitudes)
+
+        encontradas = {solicitud.pk for solicitud in solicitudes}
+        for pk in solicitud_ids:
+            if pk not in encontradas:
+                resultado.omitidas[pk] = "No existe o ya fue resuelta."
+
+        if accion == "aprobar":
+            _aprobar(solicitudes, ahora, resultado)
+            estado = SolicitudRolComercial.EstadoSolicitud.APROBADA
+        else:
+            desactivar_comerciales({solicitud.usuario_id for solicitud in solicitudes})
+            resultado.resueltas = [solicitud.pk for solicitud in solicitudes]
+            estado = SolicitudRolComercial.EstadoSolicitud.RECHAZADA
+
+        SolicitudRolComercial.objects.filter(pk__in=resultado.resueltas).update(
+            estado=estado,
+            comentario_admin=comentario,
+            fecha_resolucion=ahora,
+        )
+        resueltas = set(resultado.resueltas)
+        pendientes_resueltas = sum(
+            1 for solicitud in solicitudes
+            if solicitud.pk in resueltas and solicitud.estado == SolicitudRolComercial.EstadoSolicitud.PENDIENTE
+        )
+        transaction.on_commit(lambda: ajustar_pendientes(-pendientes_resueltas))
+
+        # Los avisos quedan en la bandeja de salida dentro de la misma transacción
+        avisos = []
+        for solicitud in solicitudes:
+            if solicitud.pk in resueltas and solicitud.usuario.email:
+                solicitud.estado = estado
+                solicitud.comentario_admin = comentario
+                avisos.append(preparar_resolucion_solicitud(solicitud, accion == "aprobar"))
+        encolar_lote(avisos)
+
+    return resultado
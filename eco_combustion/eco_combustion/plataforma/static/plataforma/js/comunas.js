@@ -0,0 +1,36 @@
+// plataforma/static/plataforma/js/comunas.js
+// Filtra el select de comunas según la región elegida, usando el bundle de
+// referencias (regiones + comunas) que se descarga una vez y queda en caché.
+
+document.addEventListener("DOMContentLoaded", function () {
+  const contenedor = document.querySelector("[data-referencias-url]");
+  if (!contenedor) return;
+
+  const regionSelect = contenedor.querySelector('[name="region"]');
+  const comunaSelect = contenedor.querySelector('[name="comuna"]');
+  if (!regionSelect || !comunaSelect) return;
+
+  fetch(contenedor.dataset.referenciasUrl)
+    .then(resp => resp.json())
+    .then(data => {
+      const porRegion = {};
+      data.comunas.forEach(c => {
+        (porRegion[c.region_id] = porRegion[c.region_id] || []).push(c);
+      });
+
+      function actualizarComunas() {
+        const seleccionada = comunaSelect.value;
+        const comunas = porRegion[regionSelect.value] || [];
+
+        comunaSelect.innerHTML = "";
+        comunaSelect.append(new Option("---------", ""));
+        comunas.forEach(c => {
+          comunaSelect.append(new Option(c.nombre, c.id, false, String(c.id) === seleccionada));
+        });
+      }
+
+      regionSelect.addEventListener("change", actualizarComunas);
+      actualizarComunas(); // Estado inicial (formulario con errores / región ya elegida)
+    })
+    .catch(err => console.error(err));
+});
@@ -0,0 +1,198 @@
+"""
+Reservas de stock de productos.
+
+Reservar descuenta el stock con un UPDATE condicional
+(`SET stock = stock - n WHERE stock >= n`): la base decide qué comprador
+alcanza las últimas unidades, sin leer y escribir en dos pasos, así que no
+hay sobreventa aunque muchos reserven a la vez. Confirmar o liberar una
+reserva bloquea su fila con select_for_update para que cambie de estado
+una sola vez; al liberar, las unidades vuelven al producto con F().
+
+Un producto con stock_disponible NULL no lleva control de stock: se puede
+reservar sin descontar nada.
+
+descontar_lote / devolver_lote hacen lo mismo para muchos productos con un
+solo UPDATE; los usa el checkout de pedidos.
+"""
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Q, Sum, Value, When
+from django.utils import timezone
+
+from .models import Producto, ReservaStock
+
+RESERVA_TTL = timedelta(minutes=15)
+TAMANO_LOTE_BARRIDO = 500
+
+
+class StockInsuficiente(ValueError):
+    pass
+
+
+def _descontar(producto_id, cantidad):
+    """
+    Descuenta `cantidad` si alcanza. Devuelve True si el producto quedó
+    reservado (con stock suficiente o sin control de stock).
+    """
+    descontado = Producto.objects.filter(
+        pk=producto_id, activo=True, stock_disponible__gte=cantidad
+    ).update(stock_disponible=F("stock_disponible") - cantidad)
+    if descontado:
+        return True
+    return Producto.objects.filter(pk=producto_id, activo=True, stock_disponible__isnull=True).exists()
+
+
+def reservar(producto_id, cantidad, usuario=None, ttl=RESERVA_TTL):
+    """
+    Aparta `cantidad` unidades del producto por `ttl`. Devuelve la
+    ReservaStock o lanza StockInsuficiente.
+    """
+    if cantidad < 1:
+        raise ValueError("La cantidad a reservar debe ser positiva.")
+    with transaction.atomic():
+        if not _descontar(producto_id, cantidad):
+            raise StockInsuficiente(f"No hay {cantidad} unidades disponibles del producto {producto_id}.")
+        return ReservaStock.objects.create(
+            producto_id=producto_id,
+            usuario=usuario,
+            cantidad=cantidad,
+            expira_en=timezone.now() + ttl,
+        )
+
+
+def _reservas_activas(ids, skip_locked=False):
+    reservas = ReservaStock.objects.filter(pk__in=ids, estado=ReservaStock.EstadoReserva.ACTIVA)
+    if skip_locked and connection.features.has_select_for_update_skip_locked:
+        return reservas.select_for_update(skip_locked=True)
+    return reservas.select_for_update()
+
+
+def _por_producto(cantidades):
+    return Case(
+        *[When(pk=pk, then=Value(cantidad)) for pk, cantidad in cantidades.items()],
+        output_field=IntegerField(),
+    )
+
+
+def descontar_lote(cantidades):
+    """
+    Descuenta {producto_id: cantidad} de varios productos con un solo UPDATE,
+    todo o nada: si a alguno no le alcanza lanza StockInsuficiente (hay que
+    llamarla dentro de una transacción para que no quede nada descontado).
+    """
+    if not cantidades:
+        return
+    stocks = dict(
+        Producto.objects
+        .select_for_update()
+        .filter(pk__in=cantidades, stock_disponible__isnull=False)
+        .values_list("pk", "stock_disponible")
+    )
+    faltantes = [pk for pk, stock in stocks.items() if stock < cantidades[pk]]
+    if faltantes:
+        raise StockInsuficiente(f"No hay stock suficiente de los productos {sorted(faltantes)}.")
+    if not stocks:
+        return
+
+    controlados = {pk: cantidades[pk] for pk in stocks}
+    # La condición va también en el WHERE: si otro descuento ganó la carrera
+    # (SQLite no bloquea filas), la fila no se actualiza y se detecta abajo
+    alcanza = Q()
+    for pk, cantidad in controlados.items():
+        alcanza |= Q(pk=pk, stock_disponible__gte=cantidad)
+    actualizados = Producto.objects.filter(alcanza).update(
+        stock_disponible=F("stock_disponible") - _por_producto(controlados)
+    )
+    if actualizados != len(controlados):
+        raise StockInsuficiente("El stock cambió mientras se confirmaba la compra.")
+
+
+def devolver_lote(cantidades):
+    """
+    Devuelve {producto_id: cantidad} al stock con un solo UPDATE. En los
+    productos sin control de stock NULL + n sigue siendo NULL.
+    """
+    if not cantidades:
+        return
+    Producto.objects.filter(pk__in=cantidades).update(
+        stock_disponible=F("stock_disponible") + _por_producto(cantidades)
+    )
+
+
+def _devolver_stock(reservas):
+    por_producto = {}
+    for reserva in reservas:
+        por_producto[reserva.producto_id] = por_producto.get(reserva.producto_id, 0) + reserva.cantidad
+    devolver_lote(por_producto)
+
+
+def _resolver(reserva_ids, estado, skip_locked=False):
+    """
+    Pasa a `estado` las reservas indicadas que sigan ACTIVAS (bloqueadas
+    mientras tanto) y devuelve las que cambiaron.
+    """
+    with transaction.atomic():
+        reservas = list(_reservas_activas(reserva_ids, skip_locked).only("id", "producto_id", "cantidad"))
+        if not reservas:
+            return []
+        ReservaStock.objects.filter(pk__in=[r.pk for r in reservas]).update(
+            estado=estado, fecha_resolucion=timezone.now()
+        )
+        if estado == ReservaStock.EstadoReserva.LIBERADA:
+            _devolver_stock(reservas)
+    return reservas
+
+
+def confirmar_reservas(reserva_ids):
+    """
+    Confirma reservas activas (las unidades quedan vendidas). Devuelve las
+    confirmadas; las vencidas o ya resueltas se ignoran.
+    """
+    ahora = timezone.now()
+    vigentes = ReservaStock.objects.filter(pk__in=reserva_ids, expira_en__gt=ahora).values_list("pk", flat=True)
+    return _resolver(list(vigentes), ReservaStock.EstadoReserva.CONFIRMADA)
+
+
+def liberar_reservas(reserva_ids):
+    """
+    Libera reservas activas y devuelve su stock. Devuelve las liberadas.
+    """
+    return _resolver(reserva_ids, ReservaStock.EstadoReserva.LIBERADA)
+
+
+def liberar_vencidas(tamano_lote=TAMANO_LOTE_BARRIDO):
+    """
+    Barrido: libera por lotes las reservas activas cuyo plazo venció.
+    Con SKIP LOCKED (PostgreSQL) varios barridos pueden correr a la vez.
+    Devuelve (reservas liberadas, unidades devueltas).
+    """
+    liberadas = unidades = 0
+    while True:
+        ids = list(
+            ReservaStock.objects
+            .filter(estado=ReservaStock.EstadoReserva.ACTIVA, expira_en__lte=timezone.now())
+            .order_by("expira_en")
+            .values_list("pk", flat=True)[:tamano_lote]
+        )
+        if not ids:
+            break
+        reservas = _resolver(ids, ReservaStock.EstadoReserva.LIBERADA, skip_locked=True)
+        if not reservas:
+            # Todo el lote lo tomó otro barrido
+            break
+        liberadas += len(reservas)
+        unidades += sum(r.cantidad for r in reservas)
+    return liberadas, unidades
+
+
+def unidades_reservadas(producto_id):
+    """
+    Unidades del producto en reservas activas (ya descontadas del stock).
+    """
+    return (
+        ReservaStock.objects
+        .filter(producto_id=producto_id, estado=ReservaStock.EstadoReserva.ACTIVA)
+        .aggregate(total=Sum("cantidad"))["total"]
+        or 0
+    )
@@ -1,3 +1,1118 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+import io
+import math
+import os
+import sqlite3
+import tempfile
+import uuid
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.http import QueryDict
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .auditoria import auditar
+from .busqueda import VECTORES_POSTGRES, buscar
+from .catalogo_csv import importar_productos
+from .correos import enviar_pendientes, url_verificacion
+from .envios import cotizar_envio
+from .evaluacion import recalcular_estadisticas, registrar_intento
+from .forms import CheckoutForm, ResolucionSolicitudesForm
+from .geo import RADIO_TIERRA_KM, haversine_km, proveedores_cercanos
+from .markdown_html import compilar_markdown
+from .models import (
+    Carrito,
+    Comuna,
+    ContenidoEducativo,
+    CorreoPendiente,
+    Pedido,
+    Producto,
+    Proveedor,
+    QuizDistribucionPuntaje,
+    QuizEstadistica,
+    QuizEstadisticaPregunta,
+    QuizIntentoUsuario,
+    QuizOpcion,
+    QuizPregunta,
+    Region,
+    ReservaStock,
+    Servicio,
+    SolicitudRolComercial,
+    TarifaEnvio,
+    Usuario,
+)
+from .paginacion import CursorInvalido, codificar_cursor, paginar_keyset
+from .pedidos import CompraInvalida, agregar_al_carrito, confirmar_compra
+from .referencias import invalidar_referencias
+from .rendimiento import comparar, medir
+from .sembrado import PREFIJO, PREFIJO_SLUG, limpiar, sembrar
+from .snapshot import ALIAS_SNAPSHOT, anonimizar, exportar_snapshot
+from .solicitudes import contar_pendientes, resolver_solicitudes
+from .stock import StockInsuficiente, confirmar_reservas, liberar_reservas, liberar_vencidas, reservar
+from .validador import calcular_dv, normalizar_rut, validar_rut_chileno, validar_ruts
+
+
+def crear_proveedor(username="proveedor", rut="11.111.111-1", comuna=None):
+    usuario = Usuario.objects.create_user(username, f"{username}@example.cl", "clave-segura-123")
+    return Proveedor.objects.create(
+        usuario=usuario,
+        razon_social=f"{username} SpA",
+        rut=rut,
+        nombre_comercial=f"Leñas {username}",
+        email_contacto=f"{username}@example.cl",
+        telefono_contacto="+56911111111",
+        direccion_texto="Camino Real 123",
+        comuna=comuna,
+        numero_sncl="SNCL-1",
+        es_proveedor_biocombustible=True,
+        es_prestador_servicios=True,
+    )
+
+
+def crear_publicaciones(proveedor, cantidad):
+    for i in range(cantidad):
+        comuna = Comuna.objects.create(
+            nombre=f"Comuna {proveedor.pk}-{i}",
+            region=Region.objects.create(nombre=f"Región {proveedor.pk}-{i}"),
+        )
+        Producto.objects.create(
+            proveedor=proveedor,
+            tipo_producto=Producto.TipoProducto.LENA,
+            formato=Producto.FormatoProducto.METRO_RUMA,
+            unidad_medida=Producto.UnidadMedida.M3,
+            precio_unitario=Decimal("45000"),
+            comuna=comuna,
+        )
+        Servicio.objects.create(
+            proveedor=proveedor,
+            tipo_servicio=Servicio.TipoServicio.CORTE,
+            nombre=f"Corte {i}",
+            descripcion="Corte a domicilio",
+            precio_base=Decimal("15000"),
+            unidad_precio="hora",
+        )
+
+
+class ProveedorTestCase(TestCase):
+    """
+    Base de las clases que trabajan con un proveedor: se crea una vez por
+    clase (setUpTestData) y cada test lo recibe intacto.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        region = Region.objects.create(nombre="Los Ríos")
+        cls.comuna = Comuna.objects.create(nombre="Valdivia", region=region)
+        cls.proveedor = crear_proveedor(comuna=cls.comuna)
+
+
+@override_settings(PRESUPUESTO_CONSULTAS_ESTRICTO=True)
+class PresupuestoConsultasTests(ProveedorTestCase):
+    """
+    Las vistas con @presupuesto_consultas deben ejecutar el mismo número de
+    consultas sin importar cuántas filas muestren.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def contar_consultas(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def assertConsultasConstantes(self, url, agregar_filas):
+        # Primera visita para poblar las cachés (roles, etc.)
+        self.client.get(url)
+        antes = self.contar_consultas(url)
+        agregar_filas()
+        self.assertEqual(self.contar_consultas(url), antes)
+
+    def test_catalogo(self):
+        crear_publicaciones(self.proveedor, 2)
+        self.assertConsultasConstantes(
+            reverse("plataforma:catalogo"),
+            lambda: crear_publicaciones(self.proveedor, 10),
+        )
+
+    def test_detalle_proveedor(self):
+        crear_publicaciones(self.proveedor, 2)
+        self.assertConsultasConstantes(
+            reverse("plataforma:detalle_proveedor", args=[self.proveedor.pk]),
+            lambda: crear_publicaciones(self.proveedor, 10),
+        )
+
+    def test_panel_proveedor(self):
+        crear_publicaciones(self.proveedor, 2)
+        self.client.force_login(self.proveedor.usuario)
+        self.assertConsultasConstantes(
+            reverse("plataforma:panel_proveedor"),
+            lambda: crear_publicaciones(self.proveedor, 10),
+        )
+
+    def test_solicitudes_proveedores(self):
+        admin = Usuario.objects.create_user("admin", "admin@example.cl", "clave", is_staff=True)
+        self.client.force_login(admin)
+
+        def agregar_solicitudes():
+            for i in range(10):
+                usuario = Usuario.objects.create_user(f"solicitante{i}", "", "clave")
+                SolicitudRolComercial.objects.create(usuario=usuario)
+
+        self.assertConsultasConstantes(
+            reverse("plataforma:solicitudes_proveedores"), agregar_solicitudes
+        )
+
+
+class PaginacionKeysetTests(ProveedorTestCase):
+    ORDEN = ("-precio_unitario", "-id")
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Tres precios con empates: el id desempata dentro de cada precio
+        for i in range(9):
+            Producto.objects.create(
+                proveedor=cls.proveedor,
+                tipo_producto=Producto.TipoProducto.LENA,
+                formato=Producto.FormatoProducto.METRO_RUMA,
+                unidad_medida=Producto.UnidadMedida.M3,
+                precio_unitario=Decimal(40000 + 1000 * (i % 3)),
+            )
+        cls.esperados = list(Producto.objects.order_by(*cls.ORDEN).values_list("pk", flat=True))
+
+    def paginar(self, cursor=None):
+        return paginar_keyset(Producto.objects.all(), self.ORDEN, cursor=cursor, tamano=4)
+
+    def test_paginas_siguientes_y_anteriores(self):
+        cursores, vistos, cursor = [None], [], None
+        while True:
+            pagina = self.paginar(cursor)
+            vistos += [p.pk for p in pagina.objetos]
+            if not pagina.hay_mas:
+                break
+            cursor = pagina.siguiente_cursor
+            cursores.append(cursor)
+        # Recorre todo una sola vez, en orden, aunque los cortes caigan en un empate
+        self.assertEqual(vistos, self.esperados)
+        self.assertEqual(len(cursores), 3)
+        # Volver a una página anterior con su cursor devuelve las mismas filas
+        anterior = self.paginar(cursores[1])
+        self.assertEqual([p.pk for p in anterior.objetos], self.esperados[4:8])
+        self.assertEqual(anterior.siguiente_cursor, cursores[2])
+
+    def test_cursor_adulterado(self):
+        for cursor in (
+            "no-es-base64!",
+            codificar_cursor(["40000"]),
+            codificar_cursor(["abc", 1]),
+            codificar_cursor(["40000", 2 ** 70]),
+        ):
+            with self.subTest(cursor=cursor), self.assertRaises(CursorInvalido):
+                self.paginar(cursor)
+
+        respuesta = self.client.get(
+            reverse("plataforma:api_catalogo", args=["productos"]),
+            {"cursor": codificar_cursor([2 ** 70])},
+        )
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class CatalogoFiltrosTests(ProveedorTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        crear_publicaciones(cls.proveedor, 3)
+        cls.comuna_producto = Producto.objects.order_by("id").first().comuna
+        cls.url = reverse("plataforma:catalogo")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_conteo_por_faceta(self):
+        respuesta = self.client.get(self.url, {"p-comuna": self.comuna_producto.pk})
+        self.assertEqual([p.comuna for p in respuesta.context["productos"]], [self.comuna_producto])
+        facetas = respuesta.context["facetas_productos"]
+        # La faceta propia ignora su filtro; las demás cuentan solo lo filtrado
+        self.assertEqual(sorted(o["total"] for o in facetas["comuna"]), [1, 1, 1])
+        self.assertEqual([o["total"] for o in facetas["tipo_producto"]], [1])
+
+    def test_filtros_aislados_por_pestana(self):
+        respuesta = self.client.get(self.url, {"s-comuna": self.comuna_producto.pk})
+        self.assertEqual(len(respuesta.context["productos"]), 3)
+        self.assertEqual(len(respuesta.context["servicios"]), 0)
+        self.assertEqual(respuesta.context["conservar_en_productos"].urlencode(), f"s-comuna={self.comuna_producto.pk}")
+
+        api = self.client.get(
+            reverse("plataforma:api_catalogo", args=["servicios"]), {"p-comuna": self.comuna_producto.pk}
+        ).json()
+        self.assertEqual(len(api["resultados"]), 3)
+
+    def test_comuna_fuera_de_rango(self):
+        enorme = "99999999999999999999"
+        self.assertEqual(self.client.get(self.url, {"p-comuna": enorme, "s-comuna": enorme}).status_code, 200)
+        for pestana, prefijo in [("productos", "p"), ("servicios", "s")]:
+            respuesta = self.client.get(reverse("plataforma:api_catalogo", args=[pestana]), {f"{prefijo}-comuna": enorme})
+            self.assertEqual(respuesta.status_code, 400)
+
+
+def punto_destino(lat, lon, distancia_km, rumbo):
+    """Punto a `distancia_km` de (lat, lon) siguiendo el rumbo dado (grados)."""
+    phi, angulo, theta = math.radians(lat), distancia_km / RADIO_TIERRA_KM, math.radians(rumbo)
+    phi2 = math.asin(
+        math.sin(phi) * math.cos(angulo) + math.cos(phi) * math.sin(angulo) * math.cos(theta)
+    )
+    dlambda = math.atan2(
+        math.sin(theta) * math.sin(angulo) * math.cos(phi),
+        math.cos(angulo) - math.sin(phi) * math.sin(phi2),
+    )
+    return math.degrees(phi2), lon + math.degrees(dlambda)
+
+
+class GeoTests(TestCase):
+    CENTRO = (-45.0, -72.0)
+    RADIO_KM = 500
+
+    @classmethod
+    def setUpTestData(cls):
+        lat, lon = cls.CENTRO
+        # Justo dentro del radio en cada borde, incluido el rumbo de máxima longitud,
+        # que a esta latitud no cae sobre el paralelo del centro
+        angulo = cls.RADIO_KM / RADIO_TIERRA_KM
+        rumbo_tangente = math.degrees(math.asin(math.cos(math.radians(lat)) / math.cos(angulo)))
+        rumbos = [0, 90, 180, 270, rumbo_tangente, 360 - rumbo_tangente]
+        cls.puntos = [punto_destino(lat, lon, cls.RADIO_KM - 0.5, rumbo) for rumbo in rumbos]
+        for i, (lat2, lon2) in enumerate(cls.puntos):
+            proveedor = crear_proveedor(f"borde{i}", rut=f"{i + 1}.111.111-1")
+            proveedor.latitud, proveedor.longitud = lat2, lon2
+            proveedor.save(update_fields=["latitud", "longitud"])
+        lejos = crear_proveedor("lejos", rut="9.999.999-9")
+        lejos.latitud, lejos.longitud = punto_destino(lat, lon, cls.RADIO_KM + 0.5, rumbo_tangente)
+        lejos.save(update_fields=["latitud", "longitud"])
+
+    def test_caja_no_recorta_los_bordes_del_circulo(self):
+        cercanos = proveedores_cercanos(*self.CENTRO, self.RADIO_KM, limite=None)
+        nombres = {proveedor.usuario.username for proveedor, _ in cercanos}
+        self.assertEqual(nombres, {f"borde{i}" for i in range(len(self.puntos))})
+        for proveedor, distancia in cercanos:
+            esperada = haversine_km(*self.CENTRO, proveedor.latitud, proveedor.longitud)
+            self.assertAlmostEqual(distancia, esperada)
+            self.assertLess(distancia, self.RADIO_KM)
+
+
+class BusquedaTests(ProveedorTestCase):
+    def test_tipo_de_producto_y_solo_activos(self):
+        crear_publicaciones(self.proveedor, 2)
+        encontrados = [r["id"] for r in buscar("leña") if r["tipo"] == "producto"]
+        self.assertEqual(len(encontrados), 2)
+
+        Producto.objects.filter(pk=encontrados[0]).update(activo=False)
+        self.assertNotIn(encontrados[0], [r["id"] for r in buscar("leña") if r["tipo"] == "producto"])
+
+    def test_vector_postgres_incluye_tipo(self):
+        # Mismo texto que el título de FTS5, para que ambos motores encuentren lo mismo
+        for _, etiqueta in Producto.TipoProducto.choices:
+            self.assertIn(f"THEN '{etiqueta}'", VECTORES_POSTGRES["producto"])
+
+
+class BloqueoVerificacionTests(TestCase):
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user("nuevo", "nuevo@example.cl", "clave-segura-123")
+        Usuario.objects.filter(pk=self.usuario.pk).update(
+            date_joined=timezone.now() - timedelta(days=8)
+        )
+        self.client.force_login(self.usuario)
+
+    def test_middleware_bloquea_sin_escribir(self):
+        with CaptureQueriesContext(connection) as ctx:
+            respuesta = self.client.get(reverse("plataforma:catalogo"))
+        self.assertRedirects(respuesta, reverse("plataforma:verificacion_pendiente"), fetch_redirect_response=False)
+        escrituras = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(escrituras, [])
+
+    def test_verificar_desbloquea(self):
+        self.usuario.refresh_from_db()
+        self.usuario.marcar_email_verificado()
+        respuesta = self.client.get(reverse("plataforma:catalogo"))
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_comando_bloquea_en_lote(self):
+        call_command("bloquear_no_verificados", stdout=StringIO())
+        self.usuario.refresh_from_db()
+        self.assertTrue(self.usuario.bloqueado)
+
+    def test_bloqueado_puede_pedir_un_enlace_nuevo(self):
+        self.assertEqual(self.client.get(reverse("plataforma:verificacion_pendiente")).status_code, 200)
+        respuesta = self.client.post(reverse("plataforma:reenviar_verificacion"))
+        self.assertRedirects(respuesta, reverse("plataforma:verificacion_pendiente"))
+        self.assertEqual(CorreoPendiente.objects.get().destinatario, "nuevo@example.cl")
+
+    def test_staff_no_se_bloquea(self):
+        admin = Usuario.objects.create_superuser("admin", "admin@example.cl", "clave-segura-123")
+        Usuario.objects.filter(pk=admin.pk).update(date_joined=timezone.now() - timedelta(days=30))
+        call_command("bloquear_no_verificados", stdout=StringIO())
+        admin.refresh_from_db()
+        self.assertFalse(admin.bloqueado)
+        self.client.force_login(admin)
+        self.assertEqual(self.client.get(reverse("plataforma:catalogo")).status_code, 200)
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class CorreosTests(TestCase):
+    def registrar(self):
+        region = Region.objects.create(nombre="Los Ríos")
+        comuna = Comuna.objects.create(nombre="Valdivia", region=region)
+        return self.client.post(
+            reverse("plataforma:registro"),
+            {
+                "username": "registrado",
+                "email": "registrado@example.cl",
+                "rut": "12.345.678-5",
+                "region": region.pk,
+                "comuna": comuna.pk,
+                "password1": "clave-segura-123",
+                "password2": "clave-segura-123",
+            },
+        )
+
+    def test_registro_encola_sin_enviar(self):
+        self.registrar()
+        self.assertEqual(len(mail.outbox), 0)
+        correo = CorreoPendiente.objects.get()
+        self.assertEqual(correo.destinatario, "registrado@example.cl")
+        self.assertEqual(correo.estado, CorreoPendiente.EstadoCorreo.PENDIENTE)
+
+    def test_worker_envia_y_marca(self):
+        self.registrar()
+        call_command("enviar_correos", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("/verificar-email/", mail.outbox[0].body)
+        correo = CorreoPendiente.objects.get()
+        self.assertEqual(correo.estado, CorreoPendiente.EstadoCorreo.ENVIADO)
+        self.assertEqual(enviar_pendientes(), (0, 0))
+
+    def test_fallo_reintenta_con_backoff(self):
+        self.registrar()
+        with mock.patch("django.core.mail.EmailMessage.send", side_effect=OSError("SMTP caído")):
+            self.assertEqual(enviar_pendientes(), (0, 1))
+        correo = CorreoPendiente.objects.get()
+        self.assertEqual(correo.estado, CorreoPendiente.EstadoCorreo.PENDIENTE)
+        self.assertEqual(correo.intentos, 1)
+        self.assertGreater(correo.proximo_intento, timezone.now())
+        # Todavía no vence: el worker no lo vuelve a tomar
+        self.assertEqual(enviar_pendientes(), (0, 0))
+
+    def test_enlace_verifica_una_vez(self):
+        usuario = Usuario.objects.create_user("verificable", "v@example.cl", "clave-segura-123")
+        ruta = url_verificacion(usuario).split("localhost:8000", 1)[-1]
+        self.assertEqual(self.client.get(ruta).status_code, 200)
+        usuario.refresh_from_db()
+        self.assertTrue(usuario.email_verificado)
+        self.assertEqual(self.client.get(ruta).status_code, 400)
+
+    def test_resolucion_encola_aviso(self):
+        usuario = Usuario.objects.create_user("solicitante", "s@example.cl", "clave", rut="12.345.678-5")
+        solicitud = SolicitudRolComercial.objects.create(usuario=usuario, nombre_comercio="Leñas Sur")
+        resolver_solicitudes([solicitud.pk], "aprobar")
+        correo = CorreoPendiente.objects.get()
+        self.assertEqual(correo.destinatario, "s@example.cl")
+        self.assertIn("aprobada", correo.asunto)
+
+
+class ResolverSolicitudesTests(ProveedorTestCase):
+    def crear_solicitudes(self, cantidad, inicio):
+        ids = []
+        for cuerpo in range(inicio, inicio + cantidad):
+            usuario = Usuario.objects.create_user(
+                f"solicitante{cuerpo}", f"s{cuerpo}@example.cl", None, rut=f"{cuerpo}-{calcular_dv(cuerpo)}"
+            )
+            ids.append(SolicitudRolComercial.objects.create(usuario=usuario, nombre_comercio="Leñas").pk)
+        return ids
+
+    def contar_consultas(self, ids, accion):
+        with CaptureQueriesContext(connection) as ctx:
+            resultado = resolver_solicitudes(ids, accion)
+        self.assertEqual(len(resultado.resueltas), len(ids))
+        return len(ctx.captured_queries)
+
+    def test_consultas_no_crecen_con_el_lote(self):
+        for accion, inicio in (("aprobar", 1_000_000), ("rechazar", 2_000_000)):
+            with self.subTest(accion=accion):
+                una = self.contar_consultas(self.crear_solicitudes(1, inicio), accion)
+                cincuenta = self.contar_consultas(self.crear_solicitudes(50, inicio + 1), accion)
+                self.assertEqual(una, cincuenta)
+
+    def test_rechazar_despublica(self):
+        crear_publicaciones(self.proveedor, 1)
+        solicitud = SolicitudRolComercial.objects.create(usuario=self.proveedor.usuario)
+        resolver_solicitudes([solicitud.pk], "rechazar")
+        self.proveedor.refresh_from_db()
+        self.assertEqual(self.proveedor.estado, Proveedor.EstadoProveedor.INACTIVO)
+        self.assertFalse(Producto.objects.filter(activo=True).exists())
+        self.assertFalse(Servicio.objects.filter(activo=True).exists())
+
+    def test_ids_fuera_de_rango(self):
+        form = ResolucionSolicitudesForm({"ids": "1,99999999999999999999", "accion": "aprobar"})
+        self.assertFalse(form.is_valid())
+        self.assertIn("ids", form.errors)
+
+
+class MarkdownTests(TestCase):
+    def test_sanea_scripts_y_enlaces_javascript(self):
+        html = compilar_markdown(
+            "# Título\n\n<script>alert(1)</script>\n\n"
+            "[malo](javascript:alert(1)) [bueno](https://example.cl) "
+            '<a href="#" onclick="robar()">x</a>'
+        )
+        self.assertIn("<h1>Título</h1>", html)
+        self.assertNotIn("<script", html)
+        self.assertNotIn("javascript:", html)
+        self.assertNotIn("onclick", html)
+        self.assertIn('href="https://example.cl"', html)
+        self.assertIn('rel="noopener noreferrer"', html)
+
+    def test_se_compila_al_guardar(self):
+        contenido = ContenidoEducativo.objects.create(titulo="T", slug="t", texto="**seca**")
+        self.assertEqual(contenido.texto_html, "<p><strong>seca</strong></p>")
+        respuesta = self.client.get(reverse("plataforma:educativo_detalle", args=["t"]))
+        self.assertContains(respuesta, "<strong>seca</strong>", html=True)
+
+
+class ColaSolicitudesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_user("admin", "admin@example.cl", "clave", is_staff=True)
+        cls.solicitudes = [
+            SolicitudRolComercial.objects.create(usuario=Usuario.objects.create_user(f"cola{i}", "", None))
+            for i in range(3)
+        ]
+        cls.url = reverse("plataforma:solicitudes_proveedores")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def test_contador_de_pendientes_en_cache(self):
+        self.assertEqual(contar_pendientes(), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            SolicitudRolComercial.objects.create(usuario=self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            resolver_solicitudes([self.solicitudes[0].pk], "rechazar")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.solicitudes[1].delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(contar_pendientes(), 2)
+
+    def test_filtro_y_paginas(self):
+        resolver_solicitudes([self.solicitudes[0].pk], "aprobar")
+        respuesta = self.client.get(self.url, {"estado": "PENDIENTE"})
+        self.assertEqual(
+            [s.pk for s in respuesta.context["solicitudes"]],
+            [s.pk for s in reversed(self.solicitudes[1:])],
+        )
+
+        with mock.patch("plataforma.views.SOLICITUDES_TAMANO_PAGINA", 2):
+            primera = self.client.get(self.url)
+            segunda = self.client.get(self.url, {"cursor": primera.context["siguiente_cursor"]})
+        vistas = [s.pk for pagina in (primera, segunda) for s in pagina.context["solicitudes"]]
+        self.assertEqual(vistas, [s.pk for s in reversed(self.solicitudes)])
+        self.assertIsNone(segunda.context["siguiente_cursor"])
+
+
+class EducativoCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.contenido = ContenidoEducativo.objects.create(titulo="Leña seca", slug="lena-seca", texto="Texto")
+        self.url = reverse("plataforma:educativo_detalle", args=[self.contenido.slug])
+
+    def test_etag_cambia_al_agregar_preguntas(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        QuizPregunta.objects.create(contenido=self.contenido, enunciado="¿Humedad máxima?")
+        respuesta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, "Responder quiz")
+
+    def test_guardar_invalida(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.contenido.titulo = "Leña seca y certificada"
+        self.contenido.save()
+        respuesta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, "Leña seca y certificada")
+
+    def test_cambio_de_slug_y_borrado(self):
+        self.client.get(self.url)
+        self.contenido.slug = "lena-seca-2"
+        self.contenido.save()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        nueva = reverse("plataforma:educativo_detalle", args=["lena-seca-2"])
+        self.assertEqual(self.client.get(nueva).status_code, 200)
+        self.contenido.delete()
+        self.assertEqual(self.client.get(nueva).status_code, 404)
+
+    def test_lista_cambia_al_desactivar(self):
+        lista = reverse("plataforma:educativo_lista")
+        etag = self.client.get(lista)["ETag"]
+        self.contenido.activo = False
+        self.contenido.save()
+        respuesta = self.client.get(lista, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotContains(respuesta, "Leña seca")
+
+    def test_etag_no_depende_del_usuario(self):
+        anonimo = self.client.get(self.url)
+        self.assertIn("Cookie", anonimo["Vary"])
+        self.client.force_login(Usuario.objects.create_user("lector", "lector@example.cl", "clave-segura-123"))
+        self.assertEqual(self.client.get(self.url)["ETag"], anonimo["ETag"])
+
+
+class ReferenciasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.region = Region.objects.create(nombre="Los Ríos")
+        Comuna.objects.create(nombre="Valdivia", region=cls.region)
+        Comuna.objects.create(nombre="Corral", region=cls.region)
+        cls.url = reverse("plataforma:api_referencias")
+
+    def setUp(self):
+        # La caché es del proceso y sobrevive al rollback de cada test
+        invalidar_referencias()
+
+    def test_comunas_por_region(self):
+        respuesta = self.client.get(reverse("plataforma:api_comunas_por_region", args=[self.region.pk]))
+        self.assertEqual([c["nombre"] for c in respuesta.json()], ["Corral", "Valdivia"])
+
+    def test_revalidacion_sin_consultas(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_guardar_y_borrar_invalidan(self):
+        etag = self.client.get(self.url)["ETag"]
+        nueva = Comuna.objects.create(nombre="Lanco", region=self.region)
+        respuesta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn("Lanco", [c["nombre"] for c in respuesta.json()["comunas"]])
+
+        nueva.delete()
+        sin_lanco = self.client.get(self.url)
+        self.assertEqual(sin_lanco["ETag"], etag)
+        self.assertNotIn("Lanco", [c["nombre"] for c in sin_lanco.json()["comunas"]])
+
+
+class QuizTestCase(TestCase):
+    """
+    Un quiz con dos preguntas corregibles (a/b y c/d, correctas a y c) y una
+    sin opción correcta, que queda fuera de la clave.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.contenido = ContenidoEducativo.objects.create(titulo="Humedad", slug="humedad", texto="Texto")
+        cls.usuario = Usuario.objects.create_user("alumno", "alumno@example.cl", "clave-segura-123")
+        cls.p1, cls.p2, cls.p3 = [
+            QuizPregunta.objects.create(contenido=cls.contenido, enunciado=f"Pregunta {i}") for i in range(3)
+        ]
+        cls.a = QuizOpcion.objects.create(pregunta=cls.p1, texto_opcion="a", es_correcta=True)
+        cls.b = QuizOpcion.objects.create(pregunta=cls.p1, texto_opcion="b")
+        cls.c = QuizOpcion.objects.create(pregunta=cls.p2, texto_opcion="c", es_correcta=True)
+        cls.d = QuizOpcion.objects.create(pregunta=cls.p2, texto_opcion="d")
+        QuizOpcion.objects.create(pregunta=cls.p3, texto_opcion="e")
+
+    def setUp(self):
+        cache.clear()
+
+    def responder(self, **elegidas):
+        datos = QueryDict(mutable=True)
+        for campo, opciones in elegidas.items():
+            datos.setlist(f"pregunta_{getattr(self, campo).pk}", [str(o) for o in opciones])
+        return registrar_intento(self.usuario, self.contenido.pk, datos)
+
+
+class QuizCorreccionTests(QuizTestCase):
+    def test_corrige_en_el_servidor(self):
+        intento = self.responder(p1=[self.a.pk], p2=[self.d.pk], p3=["x"])
+        self.assertEqual((intento.puntaje_obtenido, intento.total_preguntas), (1, 2))
+        self.assertEqual(intento.respuestas, {str(self.p1.pk): [self.a.pk], str(self.p2.pk): [self.d.pk]})
+
+    def test_opciones_ajenas_o_mezcladas_no_suman(self):
+        # La opción c es de otra pregunta; a+b mezcla una correcta con una incorrecta
+        intento = self.responder(p1=[self.c.pk, "abc"], p2=[self.c.pk, self.d.pk])
+        self.assertEqual(intento.puntaje_obtenido, 0)
+        self.assertEqual(intento.respuestas[str(self.p1.pk)], [])
+
+    def test_cambiar_la_clave_invalida_la_cache(self):
+        self.assertEqual(self.responder(p1=[self.a.pk]).puntaje_obtenido, 1)
+        self.a.es_correcta, self.b.es_correcta = False, True
+        self.a.save()
+        self.b.save()
+        self.assertEqual(self.responder(p1=[self.a.pk]).puntaje_obtenido, 0)
+        self.p1.delete()
+        self.assertEqual(self.responder(p2=[self.c.pk]).total_preguntas, 1)
+
+    def test_vista_guarda_y_redirige(self):
+        self.client.force_login(self.usuario)
+        respuesta = self.client.post(
+            reverse("plataforma:quiz", args=[self.contenido.slug]),
+            {f"pregunta_{self.p1.pk}": self.a.pk, f"pregunta_{self.p2.pk}": self.c.pk},
+        )
+        intento = QuizIntentoUsuario.objects.get()
+        url = reverse("plataforma:quiz", args=[self.contenido.slug])
+        self.assertRedirects(respuesta, f"{url}?intento={intento.pk}")
+        self.assertEqual(intento.puntaje_obtenido, 2)
+
+
+class QuizEstadisticasTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        self.responder(p1=[self.a.pk], p2=[self.c.pk])
+        self.responder(p1=[self.a.pk], p2=[self.d.pk])
+        self.responder(p2=[self.c.pk])
+
+    def resumen(self):
+        estadistica = QuizEstadistica.objects.get(contenido=self.contenido)
+        return (
+            (estadistica.intentos, estadistica.suma_puntajes, estadistica.suma_preguntas),
+            dict(QuizDistribucionPuntaje.objects.values_list("puntaje", "cantidad")),
+            {
+                fila.pregunta_id: (fila.respondidas, fila.correctas)
+                for fila in QuizEstadisticaPregunta.objects.all()
+            },
+        )
+
+    def test_resumen_incremental(self):
+        self.assertEqual(self.resumen(), (
+            (3, 4, 6),
+            {1: 2, 2: 1},
+            # La pregunta sin responder no cuenta como respondida
+            {self.p1.pk: (2, 2), self.p2.pk: (3, 2)},
+        ))
+        self.assertEqual(self.contenido.estadistica.porcentaje_promedio, 66.7)
+        self.assertEqual(self.p2.estadistica.porcentaje_acierto, 66.7)
+
+    def test_recalcular_da_lo_mismo(self):
+        incremental = self.resumen()
+        QuizEstadistica.objects.all().delete()
+        QuizDistribucionPuntaje.objects.all().delete()
+        QuizEstadisticaPregunta.objects.all().delete()
+        self.assertEqual(recalcular_estadisticas(self.contenido.pk), 3)
+        self.assertEqual(self.resumen(), incremental)
+
+
+class CatalogoCsvTests(ProveedorTestCase):
+    ENCABEZADO = "tipo_producto;formato;unidad_medida;precio_unitario;comuna_id;descripcion\n"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.otra = Comuna.objects.create(nombre="La Unión", region=cls.comuna.region)
+
+    def importar(self, texto, codificacion="utf-8"):
+        return importar_productos(self.proveedor.pk, io.BytesIO((self.ENCABEZADO + texto).encode(codificacion)))
+
+    def test_reglas_de_comuna_y_unidad(self):
+        resultado = self.importar(
+            "LENA;METRO_RUMA;m3;45000;;Roble seco\n"
+            f"LENA;METRO_RUMA;m3;45000;{self.otra.pk};Otra comuna\n"
+            "PELLET;METRO_RUMA;kg;45000;;Unidad que no calza\n"
+        )
+        self.assertEqual(resultado.creados, 1)
+        self.assertEqual([numero for numero, _ in resultado.errores], [3, 4])
+        self.assertIn("comuna_id", resultado.errores[0][1][0])
+        self.assertIn("unidad_medida", resultado.errores[1][1][0])
+        self.assertEqual(Producto.objects.get().comuna_id, self.comuna.pk)
+
+    def test_codificacion_invalida(self):
+        resultado = self.importar("LENA;METRO_RUMA;m3;45000;;Leña de año\n", codificacion="latin-1")
+        self.assertEqual(resultado.creados, 0)
+        self.assertIn("UTF-8", resultado.errores[0][1][0])
+        self.assertFalse(Producto.objects.exists())
+
+    @mock.patch("plataforma.catalogo_csv.TAMANO_LOTE", 2)
+    def test_fila_mal_formada_revierte_todo_el_archivo(self):
+        validas = "LENA;METRO_RUMA;m3;45000;;Roble\n" * 3
+        # Un campo sobre csv.field_size_limit() hace fallar al lector
+        resultado = self.importar(validas + "LENA;METRO_RUMA;m3;45000;;" + "x" * 200_000 + "\n")
+        self.assertEqual((resultado.creados, resultado.actualizados), (0, 0))
+        self.assertEqual(resultado.errores[0][0], 5)
+        self.assertIn("CSV mal formado", resultado.errores[0][1][0])
+        # El primer lote ya se había guardado: se revirtió con el resto
+        self.assertFalse(Producto.objects.exists())
+
+    def test_valores_fuera_de_rango_son_errores_de_fila(self):
+        encabezado = "id;tipo_producto;formato;unidad_medida;precio_unitario;stock_disponible;descripcion\n"
+        filas = (
+            ";LENA;METRO_RUMA;m3;NaN;;Precio NaN\n"
+            ";LENA;METRO_RUMA;m3;Infinity;;Precio infinito\n"
+            ";LENA;METRO_RUMA;m3;45000;99999999999999999999;Stock enorme\n"
+            "99999999999999999999;LENA;METRO_RUMA;m3;45000;;Id enorme\n"
+            ";LENA;METRO_RUMA;m3;45000;10;Válida\n"
+        )
+        resultado = importar_productos(self.proveedor.pk, io.BytesIO((encabezado + filas).encode()))
+        self.assertEqual(resultado.creados, 1)
+        self.assertEqual([numero for numero, _ in resultado.errores], [2, 3, 4, 5])
+        self.assertIn("precio_unitario", resultado.errores[0][1][0])
+        self.assertIn("precio_unitario", resultado.errores[1][1][0])
+        self.assertIn("stock_disponible", resultado.errores[2][1][0])
+        self.assertIn("id", resultado.errores[3][1][0])
+        self.assertEqual(Producto.objects.get().stock_disponible, 10)
+
+
+class ReservaStockTests(ProveedorTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        crear_publicaciones(cls.proveedor, 1)
+        cls.producto = cls.proveedor.productos.get()
+        Producto.objects.filter(pk=cls.producto.pk).update(stock_disponible=5)
+
+    def stock(self):
+        return Producto.objects.values_list("stock_disponible", flat=True).get(pk=self.producto.pk)
+
+    def test_reservar_descuenta_sin_sobreventa(self):
+        reservar(self.producto.pk, 3)
+        with self.assertRaises(StockInsuficiente):
+            reservar(self.producto.pk, 3)
+        reservar(self.producto.pk, 2)
+        self.assertEqual(self.stock(), 0)
+        self.assertEqual(ReservaStock.objects.count(), 2)
+
+    def test_sin_control_de_stock(self):
+        Producto.objects.filter(pk=self.producto.pk).update(stock_disponible=None)
+        reserva = reservar(self.producto.pk, 50)
+        liberar_reservas([reserva.pk])
+        self.assertIsNone(self.stock())
+
+    def test_liberar_y_confirmar_una_sola_vez(self):
+        liberada = reservar(self.producto.pk, 2)
+        confirmada = reservar(self.producto.pk, 1)
+        self.assertEqual(len(liberar_reservas([liberada.pk])), 1)
+        self.assertEqual(liberar_reservas([liberada.pk]), [])
+        self.assertEqual(len(confirmar_reservas([confirmada.pk])), 1)
+        self.assertEqual(liberar_reservas([confirmada.pk]), [])
+        self.assertEqual(self.stock(), 4)
+
+    def test_barrido_libera_vencidas(self):
+        vencida = reservar(self.producto.pk, 2, ttl=timedelta(seconds=-1))
+        vigente = reservar(self.producto.pk, 1)
+        self.assertEqual(confirmar_reservas([vencida.pk]), [])
+        self.assertEqual(liberar_vencidas(), (1, 2))
+        self.assertEqual(self.stock(), 4)
+        vigente.refresh_from_db()
+        self.assertEqual(vigente.estado, ReservaStock.EstadoReserva.ACTIVA)
+
+
+class CargaReservaStockTests(TransactionTestCase):
+    def test_reservas_concurrentes_sin_sobreventa(self):
+        proveedor = crear_proveedor()
+        crear_publicaciones(proveedor, 1)
+        producto = proveedor.productos.get()
+        salida = StringIO()
+        call_command(
+            "prueba_carga_stock", producto=producto.pk, concurrencia=30, stock=10, stdout=salida
+        )
+        self.assertIn("Sin sobreventa", salida.getvalue())
+        self.assertEqual(ReservaStock.objects.count(), 0)
+        # El producto vuelve a su stock real (aquí, sin control de stock)
+        producto.refresh_from_db()
+        self.assertIsNone(producto.stock_disponible)
+
+
+class EnviosTests(ProveedorTestCase):
+    ORIGEN = (-39.81, -73.24)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Proveedor.objects.filter(pk=cls.proveedor.pk).update(latitud=cls.ORIGEN[0], longitud=cls.ORIGEN[1])
+        crear_publicaciones(cls.proveedor, 1)
+        cls.producto = cls.proveedor.productos.get()
+        cls.otra = Comuna.objects.create(nombre="Panguipulli", region=cls.comuna.region)
+        cls.general = TarifaEnvio.objects.create(
+            proveedor=cls.proveedor, tarifa_por_km=Decimal("500"), tarifa_minima=Decimal("3000")
+        )
+        TarifaEnvio.objects.create(
+            proveedor=cls.proveedor,
+            comuna=cls.comuna,
+            tarifa_por_km=Decimal("200"),
+            tarifa_minima=Decimal("1000"),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def cotizar(self, comuna, lon=ORIGEN[1]):
+        return cotizar_envio(self.ORIGEN[0], lon, [self.producto.pk], comuna_id=comuna.pk)
+
+    def test_tarifa_de_la_comuna_antes_que_la_general(self):
+        envio = self.cotizar(self.comuna)["envios"][0]
+        self.assertTrue(envio["tarifa_comuna"])
+        self.assertEqual(envio["costo"], Decimal("1000"))
+
+        envio = self.cotizar(self.otra)["envios"][0]
+        self.assertFalse(envio["tarifa_comuna"])
+        self.assertEqual(envio["costo"], Decimal("3000"))
+
+    def test_por_km_sobre_la_minima(self):
+        envio = self.cotizar(self.otra, lon=self.ORIGEN[1] + 1)["envios"][0]
+        esperado = (Decimal("500") * Decimal(str(envio["distancia_km"]))).quantize(
+            Decimal("1"), rounding=ROUND_HALF_UP
+        )
+        self.assertGreater(esperado, Decimal("3000"))
+        self.assertEqual(envio["costo"], esperado)
+
+    def test_sin_tarifa_para_la_comuna(self):
+        self.general.delete()
+        cotizacion = self.cotizar(self.otra)
+        self.assertEqual(cotizacion["sin_cobertura"], [self.proveedor.pk])
+        self.assertEqual(cotizacion["total"], Decimal("0"))
+
+    def test_cache_se_invalida_al_guardar_y_borrar(self):
+        self.cotizar(self.otra)
+        # Con las tarifas en caché solo se consultan los productos
+        with self.assertNumQueries(1):
+            self.cotizar(self.otra)
+
+        self.general.tarifa_minima = Decimal("4000")
+        self.general.save()
+        self.assertEqual(self.cotizar(self.otra)["envios"][0]["costo"], Decimal("4000"))
+        self.general.delete()
+        self.assertEqual(self.cotizar(self.otra)["sin_cobertura"], [self.proveedor.pk])
+
+    def test_ids_y_comuna_fuera_de_rango(self):
+        enorme = "99999999999999999999"
+        url = reverse("plataforma:api_cotizar_envio")
+        for parametros in (
+            {"productos": enorme, "lat": 1, "lon": 1},
+            {"productos": self.producto.pk, "lat": 1, "lon": 1, "comuna": enorme},
+        ):
+            with self.subTest(parametros=parametros):
+                self.assertEqual(self.client.get(url, parametros).status_code, 400)
+        self.assertIn("comuna", CheckoutForm({"comuna": enorme}).errors)
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        self.comprador = Usuario.objects.create_user("comprador", "c@example.cl", "clave-segura-123")
+        self.proveedores = []
+        for i, rut in enumerate(["11.111.111-1", "22.222.222-2"]):
+            proveedor = crear_proveedor(f"proveedor{i}", rut)
+            Proveedor.objects.filter(pk=proveedor.pk).update(latitud=-39.81, longitud=-73.24)
+            TarifaEnvio.objects.create(proveedor=proveedor, tarifa_por_km=Decimal("500"), tarifa_minima=Decimal("3000"))
+            crear_publicaciones(proveedor, 3)
+            self.proveedores.append(proveedor)
+        self.productos = list(Producto.objects.order_by("pk"))
+
+    def llenar_carrito(self, productos, cantidad=2):
+        for producto in productos:
+            agregar_al_carrito(self.comprador, producto.pk, cantidad)
+
+    def test_divide_por_proveedor_y_suma_en_sql(self):
+        Producto.objects.filter(pk=self.productos[0].pk).update(stock_disponible=5)
+        self.llenar_carrito(self.productos)
+        pedidos = confirmar_compra(self.comprador, -39.81, -73.24)
+
+        self.assertEqual([p.proveedor_id for p in pedidos], [p.pk for p in self.proveedores])
+        for pedido in pedidos:
+            self.assertEqual(pedido.subtotal, Decimal("270000"))
+            self.assertEqual(pedido.costo_envio, Decimal("3000"))
+            self.assertEqual(pedido.total, Decimal("273000"))
+            self.assertEqual(pedido.lineas.count(), 3)
+        self.assertEqual(Producto.objects.get(pk=self.productos[0].pk).stock_disponible, 3)
+        self.assertFalse(self.comprador.carrito.items.exists())
+
+    def test_sin_stock_no_guarda_nada(self):
+        Producto.objects.filter(pk=self.productos[-1].pk).update(stock_disponible=1)
+        self.llenar_carrito(self.productos)
+        with self.assertRaises(ValueError):
+            confirmar_compra(self.comprador, -39.81, -73.24)
+        self.assertFalse(Pedido.objects.exists())
+        self.assertEqual(self.comprador.carrito.items.count(), len(self.productos))
+
+    def test_sin_cobertura(self):
+        TarifaEnvio.objects.filter(proveedor=self.proveedores[1]).delete()
+        self.llenar_carrito(self.productos)
+        with self.assertRaises(CompraInvalida):
+            confirmar_compra(self.comprador, -39.81, -73.24)
+
+    def test_consultas_constantes(self):
+        def contar(productos):
+            self.llenar_carrito(productos)
+            with CaptureQueriesContext(connection) as ctx:
+                confirmar_compra(self.comprador, -39.81, -73.24)
+            return len(ctx.captured_queries)
+
+        # La primera compra carga las tarifas en caché; después, un ítem por
+        # proveedor o el catálogo completo cuestan lo mismo
+        cache.clear()
+        contar(self.productos)
+        chico = contar(self.productos[::3])
+        grande = contar(self.productos)
+        self.assertEqual(chico, grande)
+
+
+class RutTests(TestCase):
+    def test_calcular_dv_y_normalizar(self):
+        self.assertEqual(calcular_dv(12345678), "5")
+        self.assertEqual(calcular_dv(11111111), "1")
+        self.assertEqual(calcular_dv(10000013), "K")
+        self.assertEqual(normalizar_rut(" 12.345.678-k "), "12345678-K")
+        self.assertIsNone(normalizar_rut("12.345.678"))
+
+    def test_lote_igual_a_uno_por_uno(self):
+        ruts = [f"{cuerpo}-{calcular_dv(cuerpo)}" for cuerpo in range(1, 3000, 7)]
+        ruts += ["12.345.678-4", "abc-1", None, "", "1234567890-1"]
+        esperados = [(r.normalizado, r.valido) for r in validar_ruts(ruts, vectorizado=False)]
+        self.assertTrue(all(valido for _, valido in esperados[:-5]))
+        self.assertFalse(any(valido for _, valido in esperados[-5:]))
+        obtenidos = [(r.normalizado, r.valido) for r in validar_ruts(ruts, vectorizado=True)]
+        self.assertEqual(obtenidos, esperados)
+
+    def test_vectorizado_sin_numpy(self):
+        with mock.patch("plataforma.validador.np", None):
+            with self.assertRaises(ImportError):
+                validar_ruts(["12.345.678-5"], vectorizado=True)
+            self.assertTrue(validar_ruts(["12.345.678-5"])[0].valido)
+
+    def test_duplicado_con_otro_formato(self):
+        Usuario.objects.create_user("uno", "uno@example.cl", "clave-segura-123", rut="12.345.678-5")
+        otro = Usuario.objects.create_user("dos", "dos@example.cl", "clave-segura-123")
+        otro.rut = "12345678-5"
+        with self.assertRaises(ValidationError):
+            otro.full_clean()
+        with self.assertRaises(IntegrityError):
+            otro.save(update_fields=["rut"])
+
+
+class AuditoriaTests(TestCase):
+    def test_detecta_datos_malos_igual_con_y_sin_pool(self):
+        provisorio = crear_proveedor("provisorio")
+        invalido = crear_proveedor("invalido", "12.345.678-4")
+        Proveedor.objects.filter(pk=invalido.pk).update(latitud=-39.8, longitud=-73.2)
+        crear_publicaciones(invalido, 2)
+        inconsistente = Producto.objects.filter(proveedor=invalido).first()
+        Producto.objects.filter(pk=inconsistente.pk).update(unidad_medida=Producto.UnidadMedida.SACO)
+        huerfana = Comuna.objects.create(nombre="Sin región")
+
+        def totales(reporte):
+            return {(h["tabla"], h["regla"]): (h["total"], h["ids"]) for h in reporte["hallazgos"]}
+
+        en_linea = totales(auditar(tamano_lote=1, procesos=0))
+        self.assertEqual(en_linea[("proveedor", "rut_provisorio")], (1, [provisorio.pk]))
+        self.assertEqual(en_linea[("proveedor", "rut_invalido")], (1, [invalido.pk]))
+        self.assertEqual(en_linea[("proveedor", "sin_coordenadas")], (1, [provisorio.pk]))
+        self.assertEqual(en_linea[("producto", "unidad_inconsistente")], (1, [inconsistente.pk]))
+        self.assertEqual(en_linea[("comuna", "comuna_sin_region")], (1, [huerfana.pk]))
+        self.assertEqual(totales(auditar(tamano_lote=1, procesos=2)), en_linea)
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        for i in range(3):
+            cuerpo = 12345678 + i
+            crear_publicaciones(crear_proveedor(f"proveedor{i}", f"{cuerpo}-{calcular_dv(cuerpo)}"), 1)
+        Usuario.objects.create_user("consumidor", "real@gmail.com", "clave-segura-123", rut="9.876.543-3")
+
+    def test_anonimizar_deja_ruts_validos_y_sin_correos_reales(self):
+        anonimizar(clave="dev")
+        for usuario in Usuario.objects.all():
+            self.assertTrue(usuario.email.endswith("@example.invalid"))
+            self.assertTrue(usuario.check_password("dev"))
+        for rut, normalizado in Proveedor.objects.values_list("rut", "rut_normalizado"):
+            validar_rut_chileno(rut)
+            self.assertEqual(rut, normalizado)
+        consumidor = Usuario.objects.get(username__startswith="usuario", proveedor__isnull=True)
+        validar_rut_chileno(consumidor.rut)
+
+    def test_snapshot_consistente(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, "dev.sqlite3")
+            # exportar_snapshot registra la base "snapshot" al vuelo
+            with mock.patch.object(SnapshotTests, "databases", {"default", ALIAS_SNAPSHOT}):
+                totales = exportar_snapshot(ruta, max_proveedores=2, max_usuarios=1)
+            self.assertEqual(totales["plataforma.Proveedor"], 2)
+            self.assertEqual(totales["plataforma.Producto"], 2)
+            # Usuarios de los 2 proveedores más el consumidor
+            self.assertEqual(totales["plataforma.Usuario"], 3)
+            with sqlite3.connect(ruta) as base:
+                self.assertEqual(base.execute("PRAGMA foreign_key_check").fetchall(), [])
+                correos = [fila[0] for fila in base.execute("SELECT email FROM plataforma_usuario")]
+            self.assertTrue(all(correo.endswith("@example.invalid") for correo in correos))
+        # La base original no se anonimiza
+        self.assertTrue(Usuario.objects.filter(email="real@gmail.com").exists())
+
+
+class BenchmarkTests(TestCase):
+    def consultas_por_pagina(self, proveedores, productos):
+        limpiar()
+        sembrar(proveedores=proveedores, productos_por_proveedor=productos, resenas_por_proveedor=2, contenidos=1)
+        resultado = medir(repeticiones=2)
+        self.assertEqual(
+            set(resultado["paginas"]),
+            {"catalogo", "detalle_proveedor", "api_comunas_por_region", "educativo_detalle"},
+        )
+        for medida in resultado["paginas"].values():
+            self.assertLessEqual(medida["p50_ms"], medida["p95_ms"])
+        return {nombre: medida["consultas"] for nombre, medida in resultado["paginas"].items()}
+
+    def test_consultas_no_crecen_con_el_volumen(self):
+        self.assertEqual(self.consultas_por_pagina(2, 1), self.consultas_por_pagina(10, 8))
+
+    def test_comparar_detecta_regresiones(self):
+        base = {"paginas": {"catalogo": {"consultas": 9, "p95_ms": 40.0}}}
+        igual = {"paginas": {"catalogo": {"consultas": 9, "p95_ms": 45.0}}}
+        lento = {"paginas": {"catalogo": {"consultas": 9, "p95_ms": 80.0}}}
+        mas_consultas = {"paginas": {"catalogo": {"consultas": 10, "p95_ms": 40.0}}}
+        self.assertEqual(comparar(igual, base, umbral=0.25), [])
+        self.assertEqual(len(comparar(lento, base, umbral=0.25)), 1)
+        self.assertEqual(len(comparar(mas_consultas, base, umbral=0.25)), 1)
+
+
+class SembradoTests(TestCase):
+    def sembrar(self):
+        sembrar(proveedores=5, productos_por_proveedor=3, resenas_por_proveedor=2, contenidos=1,
+                semilla=7, tamano_bloque=2)
+        return (
+            list(Producto.objects.order_by("pk").values_list("pk", "proveedor_id", "comuna_id", "precio_unitario")),
+            list(QuizIntentoUsuario.objects.order_by("pk").values_list("pk", "usuario_id", "puntaje_obtenido")),
+        )
+
+    def test_misma_semilla_mismos_datos(self):
+        primera = self.sembrar()
+        limpiar()
+        self.assertFalse(Proveedor.objects.exists())
+        # Ids incluidos: cada bloque reserva su rango antes de generar
+        self.assertEqual(self.sembrar(), primera)
+
+        ruts = Proveedor.objects.values_list("rut", flat=True)
+        self.assertTrue(all(resultado.valido for resultado in validar_ruts(ruts)))
+        estadistica = QuizEstadistica.objects.get(contenido__slug__startswith=PREFIJO_SLUG)
+        self.assertEqual(estadistica.intentos, QuizIntentoUsuario.objects.count())
+
+    def test_limpiar_con_pedidos_de_consumidores_sembrados(self):
+        self.sembrar()
+        externo = crear_proveedor("externo")
+        consumidor = Usuario.objects.filter(username__startswith=PREFIJO).exclude(
+            pk__in=Proveedor.objects.values("usuario_id")
+        ).first()
+        Pedido.objects.create(
+            compra=uuid.uuid4(), usuario=consumidor, proveedor=externo,
+            latitud_destino=-39.81, longitud_destino=-73.24, distancia_km=0,
+        )
+        Carrito.objects.create(usuario=consumidor)
+        limpiar()
+        self.assertFalse(Usuario.objects.filter(username__startswith=PREFIJO).exists())
+        self.assertFalse(Pedido.objects.exists())
+        self.assertFalse(Carrito.objects.exists())
+        self.assertEqual(list(Proveedor.objects.all()), [externo])
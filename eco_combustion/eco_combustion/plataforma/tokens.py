@@ -1,6 +1,11 @@
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 
 class EmailVerificationTokenGenerator(PasswordResetTokenGenerator):
-    pass
+    """
+    El token deja de servir una vez verificado el correo o si el correo cambia.
+    """
+
+    def _make_hash_value(self, user, timestamp):
+        return f"{user.pk}{user.email}{user.email_verificado}{timestamp}"
 
 email_verification_token = EmailVerificationTokenGenerator()
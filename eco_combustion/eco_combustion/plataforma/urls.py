@@ -9,22 +9,40 @@ urlpatterns = [
     # PÚBLICO
     path("", views.home, name="home"),
     path("catalogo/", views.catalogo, name="catalogo"),
+    path("buscar/", views.buscar, name="buscar"),
     path("proveedor/<int:proveedor_id>/", views.detalle_proveedor, name="detalle_proveedor"),
 
     # API AUXILIARES
     path("api/comunas/<int:region_id>/", views.api_comunas_por_region, name="api_comunas_por_region"),
+    path("api/referencias/", views.api_referencias, name="api_referencias"),
+    path("api/catalogo/<str:pestana>/", views.api_catalogo, name="api_catalogo"),
+    path("api/cercanos/", views.api_cercanos, name="api_cercanos"),
+    path("api/buscar/", views.api_buscar, name="api_buscar"),
+    path("api/envio/cotizar/", views.api_cotizar_envio, name="api_cotizar_envio"),
 
     # API para MODAL de solicitudes de proveedor
     path("api/solicitudes/<int:pk>/",views.api_solicitud_detalle,name="api_solicitud_detalle"),
+    path("api/solicitudes/resolver/",views.api_solicitudes_resolver,name="api_solicitudes_resolver"),
 
     # AUTENTICACIÓN
     path("login/", views.login_view, name="login"),
     path("logout/", views.logout_view, name="logout"),
     path("registro/", views.registro_view, name="registro"),
+    path("verificar-email/", views.verificacion_pendiente, name="verificacion_pendiente"),
+    path("verificar-email/reenviar/", views.reenviar_verificacion, name="reenviar_verificacion"),
+    path("verificar-email/<uidb64>/<token>/", views.verificar_email, name="verificar_email"),
     path("cuenta/configuracion/", views.configuracion_cuenta, name="configuracion_cuenta"),
     path("cuenta/password/",auth_views.PasswordChangeView.as_view(template_name="plataforma/cuenta_password.html",success_url="/cuenta/configuracion/?pwd=ok"),name="password_change",),
 
 
+    # CARRITO Y PEDIDOS
+    path("carrito/", views.carrito, name="carrito"),
+    path("carrito/agregar/<int:producto_id>/", views.carrito_agregar, name="carrito_agregar"),
+    path("carrito/<int:producto_id>/cantidad/", views.carrito_cantidad, name="carrito_cantidad"),
+    path("carrito/confirmar/", views.carrito_confirmar, name="carrito_confirmar"),
+    path("pedidos/", views.mis_pedidos, name="mis_pedidos"),
+    path("pedidos/<int:pk>/cancelar/", views.pedido_cancelar, name="pedido_cancelar"),
+
     # PANELES
     path("panel/", views.panel_usuario, name="panel_usuario"),
     path("panel-admin/", views.panel_admin, name="panel_admin"),
@@ -32,6 +50,8 @@ urlpatterns = [
 
     # CRUD PRODUCTOS
     path("productos/nuevo/", views.producto_crear, name="producto_crear"),
+    path("productos/importar/", views.productos_importar, name="productos_importar"),
+    path("productos/exportar/", views.productos_exportar, name="productos_exportar"),
     path("productos/<int:pk>/editar/", views.producto_editar, name="producto_editar"),
     path("productos/<int:pk>/eliminar/", views.producto_eliminar, name="producto_eliminar"),
 
@@ -50,6 +70,7 @@ urlpatterns = [
     path("educativo/admin/nuevo/",views.educativo_admin_crear,name="educativo_admin_crear"),
     path("educativo/admin/<int:pk>/editar/",views.educativo_admin_editar,name="educativo_admin_editar"),
     path("educativo/admin/<int:pk>/eliminar/",views.educativo_admin_eliminar,name="educativo_admin_eliminar"),
+    path("educativo/admin/<int:pk>/estadisticas/",views.educativo_admin_estadisticas,name="educativo_admin_estadisticas"),
 
     # CONTENIDO EDUCATIVO
     path("educativo/", views.educativo_lista, name="educativo_lista"),
@@ -1,8 +1,81 @@
 import re
+from dataclasses import dataclass
+
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 
+try:
+    import numpy as np
+except ImportError:  # está en requirements.txt; si falta, validar_ruts usa Python puro
+    np = None
+
 RUT_REGEX = re.compile(r"^(\d{1,3}(?:\.\d{3})*)\-([\dkK])$")
+# Forma canónica que se guarda en rut_normalizado: sin puntos ni ceros a la izquierda
+RUT_NORMALIZADO_REGEX = re.compile(r"^(\d{1,9})-([\dK])$")
+
+FACTORES_DV = (2, 3, 4, 5, 6, 7)
+MAX_DIGITOS_CUERPO = 9
+
+ERROR_NULO = _("RUT no puede ser nulo")
+ERROR_FORMATO = _("Formato de RUT inválido. Use 12.345.678-5")
+ERROR_CUERPO = _("El cuerpo del RUT debe ser numérico")
+ERROR_DV = _("RUT inválido: dígito verificador incorrecto")
+
+
+def _dv_desde_resto(resto):
+    dv = 11 - resto
+    if dv == 11:
+        return "0"
+    if dv == 10:
+        return "K"
+    return str(dv)
+
+
+def calcular_dv(cuerpo):
+    """
+    Dígito verificador (módulo 11) del cuerpo de un RUT, como texto ("0"-"9" o "K").
+    """
+    suma = 0
+    for i, digito in enumerate(reversed(str(int(cuerpo)))):
+        suma += int(digito) * FACTORES_DV[i % len(FACTORES_DV)]
+    return _dv_desde_resto(suma % 11)
+
+
+def _separar(rut):
+    """
+    (cuerpo, dv) de un RUT escrito con o sin puntos, o un mensaje de error.
+    """
+    if rut is None:
+        return None, ERROR_NULO
+    partes = rut.strip().replace(".", "").replace(" ", "").split("-")
+    if len(partes) != 2 or len(partes[1]) != 1:
+        return None, ERROR_FORMATO
+    cuerpo, dv = partes[0], partes[1].upper()
+    if not cuerpo.isdigit() or not cuerpo.isascii():
+        return None, ERROR_CUERPO
+    if len(cuerpo.lstrip("0")) > MAX_DIGITOS_CUERPO or not int(cuerpo) or dv not in "0123456789K":
+        return None, ERROR_FORMATO
+    return (int(cuerpo), dv), None
+
+
+def normalizar_rut(rut):
+    """
+    "12.345.678-k" -> "12345678-K". None si el formato no es válido (no revisa el dígito verificador).
+    """
+    partes, error = _separar(rut)
+    if error:
+        return None
+    return f"{partes[0]}-{partes[1]}"
+
+
+def formatear_rut(rut):
+    """
+    "12345678-5" -> "12.345.678-5".
+    """
+    partes, error = _separar(rut)
+    if error:
+        return rut
+    return f"{partes[0]:,}".replace(",", ".") + f"-{partes[1]}"
 
 
 def validar_rut_chileno(rut: str):
@@ -10,41 +83,74 @@ def validar_rut_chileno(rut: str):
     Valida formato y dígito verificador de un RUT chileno.
     Formato esperado: 12.345.678-5 o 12345678-5
     """
-    if rut is None:
-        raise ValidationError(_("RUT no puede ser nulo"))
+    partes, error = _separar(rut)
+    if error:
+        raise ValidationError(error)
+    cuerpo, dv = partes
+    if calcular_dv(cuerpo) != dv:
+        raise ValidationError(ERROR_DV)
 
-    rut = rut.strip()
 
-    # Normalizar: quitar puntos
-    rut_sin_puntos = rut.replace(".", "")
-    partes = rut_sin_puntos.split("-")
-    if len(partes) != 2:
-        raise ValidationError(_("Formato de RUT inválido. Use 12.345.678-5"))
+# ---------- validación en lote ----------
 
-    cuerpo, dv_ingresado = partes[0], partes[1].upper()
 
-    if not cuerpo.isdigit():
-        raise ValidationError(_("El cuerpo del RUT debe ser numérico"))
+@dataclass(frozen=True)
+class ResultadoRut:
+    original: str
+    normalizado: str | None
+    valido: bool
+    error: str = ""
 
-    # Cálculo dígito verificador
-    reversed_digits = map(int, reversed(cuerpo))
-    factors = [2, 3, 4, 5, 6, 7]
-    suma = 0
-    factor_index = 0
 
-    for d in reversed_digits:
-        suma += d * factors[factor_index]
-        factor_index = (factor_index + 1) % len(factors)
+def _dvs_numpy(cuerpos):
+    """
+    Dígitos verificadores de muchos cuerpos a la vez: matriz de dígitos
+    (uno por columna, desde las unidades) por el vector de factores.
+    """
+    cuerpos = np.asarray(cuerpos, dtype=np.int64)
+    potencias = 10 ** np.arange(MAX_DIGITOS_CUERPO, dtype=np.int64)
+    digitos = (cuerpos[:, None] // potencias) % 10
+    factores = np.resize(np.array(FACTORES_DV, dtype=np.int64), MAX_DIGITOS_CUERPO)
+    restos = (digitos @ factores) % 11
+    # resto -> dígito verificador; 11 - 0 = 11 es "0" y 11 - 1 = 10 es "K"
+    tabla = np.array([_dv_desde_resto(resto) for resto in range(11)])
+    return tabla[restos].tolist()
+
+
+def calcular_dvs(cuerpos, vectorizado=None):
+    """
+    Dígitos verificadores de una lista de cuerpos, en bloque con numpy si
+    está instalado (o con `vectorizado=False`, en Python).
+    """
+    cuerpos = list(cuerpos)
+    usar_numpy = np is not None if vectorizado is None else vectorizado
+    if usar_numpy and np is None:
+        raise ImportError("calcular_dvs(vectorizado=True) necesita numpy (ver requirements.txt).")
+    if usar_numpy and cuerpos:
+        return _dvs_numpy(cuerpos)
+    return [calcular_dv(cuerpo) for cuerpo in cuerpos]
 
-    resto = suma % 11
-    dv_calculado_num = 11 - resto
 
-    if dv_calculado_num == 11:
-        dv_calculado = "0"
-    elif dv_calculado_num == 10:
-        dv_calculado = "K"
-    else:
-        dv_calculado = str(dv_calculado_num)
+def validar_ruts(ruts, vectorizado=None):
+    """
+    Normaliza y valida una lista de RUTs. Devuelve un ResultadoRut por cada
+    uno, en el mismo orden. Los dígitos verificadores se calculan en bloque
+    con calcular_dvs.
+    """
+    ruts = list(ruts)
+    separados = [_separar(rut) for rut in ruts]
+    cuerpos = [partes[0] for partes, error in separados if not error]
+    calculados = iter(calcular_dvs(cuerpos, vectorizado))
 
-    if dv_ingresado != dv_calculado:
-        raise ValidationError(_("RUT inválido: dígito verificador incorrecto"))
+    resultados = []
+    for rut, (partes, error) in zip(ruts, separados):
+        if error:
+            resultados.append(ResultadoRut(rut, None, False, str(error)))
+            continue
+        cuerpo, dv = partes
+        normalizado = f"{cuerpo}-{dv}"
+        if next(calculados) != dv:
+            resultados.append(ResultadoRut(rut, normalizado, False, str(ERROR_DV)))
+        else:
+            resultados.append(ResultadoRut(rut, normalizado, True))
+    return resultados
@@ -3,19 +3,51 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib import messages
+from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, QueryDict, StreamingHttpResponse
+from django.urls import reverse
 from django.utils import timezone
-from django.views.decorators.http import require_http_methods, require_POST
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode
+from django.views.decorators.cache import cache_control
+from django.views.decorators.vary import vary_on_cookie
+from django.views.decorators.http import condition, require_http_methods, require_POST
 
 from .models import (
     Producto,
     SolicitudRolComercial,
     Proveedor,
-    Comuna,
     Servicio,
     PerfilUsuario,
     ContenidoEducativo,
+    QuizIntentoUsuario,
+    Pedido,
+)
+from .busqueda import buscar as buscar_publicaciones
+from .catalogo_csv import COLUMNAS as COLUMNAS_CSV_PRODUCTOS, exportar_productos, importar_productos
+from .consultas import presupuesto_consultas
+from .correos import encolar_verificacion
+from .filtros import (
+    FACETAS_PRODUCTO,
+    FACETAS_SERVICIO,
+    FILTROS_PRODUCTO,
+    FILTROS_SERVICIO,
+    FILTROS_SOLICITUD,
+    ORDEN_CATALOGO_DEFECTO,
+    ORDENES_CATALOGO,
+    contar_facetas,
+    filtrar,
+)
+from .paginacion import CursorInvalido, paginar_keyset
+from .pedidos import (
+    CompraInvalida,
+    agregar_al_carrito,
+    cancelar_pedido,
+    confirmar_compra,
+    fijar_cantidad,
+    items_carrito,
+    total_carrito,
 )
 from .forms import (
     ProductoForm,
@@ -25,7 +57,27 @@ from .forms import (
     ContenidoEducativoForm,
     SolicitudRolAdminForm,
     PerfilForm,
+    FiltroProductoForm,
+    FiltroServicioForm,
+    BusquedaCercanaForm,
+    CotizacionEnvioForm,
+    ResolucionSolicitudesForm,
+    FiltroSolicitudesForm,
+    ImportarProductosForm,
+    CantidadCarritoForm,
+    CheckoutForm,
 )
+from .educativo import CACHE_EDUCATIVO_TIMEOUT, metadatos_contenido, metadatos_lista
+from .envios import cotizar_envio
+from .evaluacion import registrar_intento
+from .geo import productos_cercanos, proveedores_cercanos
+from .referencias import datos_referencia
+from .roles import roles_de
+from .solicitudes import contar_pendientes, desactivar_comerciales, resolver_solicitudes
+from .stock import StockInsuficiente
+from .tokens import email_verification_token
+
+Usuario = get_user_model()
 
 
 # ================== HELPERS DE ROL ==================
@@ -38,23 +90,16 @@ def es_admin(user):
 def es_proveedor(user):
     """
     Es proveedor si tiene un registro Proveedor ACTIVO y marcado como proveedor de biocombustible.
+    En las vistas se usa request.roles, que ya viene resuelto por RolesMiddleware.
     """
-    return Proveedor.objects.filter(
-        usuario=user,
-        es_proveedor_biocombustible=True,
-        estado=Proveedor.EstadoProveedor.ACTIVO,
-    ).exists()
+    return roles_de(user).es_proveedor
 
 
 def es_prestador(user):
     """
     Es prestador de servicios si tiene un registro Proveedor ACTIVO y marcado como prestador de servicios.
     """
-    return Proveedor.objects.filter(
-        usuario=user,
-        es_prestador_servicios=True,
-        estado=Proveedor.EstadoProveedor.ACTIVO,
-    ).exists()
+    return roles_de(user).es_prestador
 
 
 # ================== VISTAS PÚBLICAS ==================
@@ -64,47 +109,288 @@ def home(request):
     return render(request, "plataforma/home.html")
 
 
+CATALOGO_TAMANO_PAGINA = 24
+
+
+def _productos_catalogo():
+    return Producto.objects.filter(activo=True).select_related("proveedor", "comuna")
+
+
+def _servicios_catalogo():
+    return Servicio.objects.filter(activo=True).select_related("proveedor")
+
+
+def _producto_a_dict(producto):
+    return {
+        "id": producto.id,
+        "tipo_producto": producto.get_tipo_producto_display(),
+        "proveedor": producto.proveedor.nombre_comercial,
+        "proveedor_url": reverse("plataforma:detalle_proveedor", args=[producto.proveedor_id]),
+        "proveedor_calificacion": producto.proveedor.calificacion_promedio,
+        "proveedor_resenas": producto.proveedor.resenas_cantidad,
+        "especie": producto.especie,
+        "contenido_humedad": producto.contenido_humedad,
+        "precio": producto.precio_clp,
+        "formato": producto.formato,
+        "unidad_medida": producto.unidad_medida,
+        "stock_disponible": producto.stock_disponible,
+        "comuna": producto.comuna.nombre if producto.comuna else None,
+        "descripcion": producto.descripcion,
+    }
+
+
+def _servicio_a_dict(servicio):
+    return {
+        "id": servicio.id,
+        "nombre": servicio.nombre,
+        "proveedor": servicio.proveedor.nombre_comercial,
+        "proveedor_url": reverse("plataforma:detalle_proveedor", args=[servicio.proveedor_id]),
+        "proveedor_calificacion": servicio.proveedor.calificacion_promedio,
+        "proveedor_resenas": servicio.proveedor.resenas_cantidad,
+        "tipo_servicio": servicio.tipo_servicio,
+        "descripcion": servicio.descripcion,
+    }
+
+
+# Cada pestaña del catálogo es un flujo de páginas independiente, con sus propios filtros.
+# El prefijo separa sus parámetros GET (p-comuna, s-comuna) para que no se pisen.
+CATALOGO_PESTANAS = {
+    "productos": {
+        "prefijo": "p",
+        "queryset": _productos_catalogo,
+        "a_dict": _producto_a_dict,
+        "formulario": FiltroProductoForm,
+        "filtros": FILTROS_PRODUCTO,
+        "facetas": FACETAS_PRODUCTO,
+    },
+    "servicios": {
+        "prefijo": "s",
+        "queryset": _servicios_catalogo,
+        "a_dict": _servicio_a_dict,
+        "formulario": FiltroServicioForm,
+        "filtros": FILTROS_SERVICIO,
+        "facetas": FACETAS_SERVICIO,
+    },
+}
+
+
+def _consultar_catalogo(pestana, parametros, cursor=None, con_facetas=True):
+    """
+    Filtra y pagina una pestaña del catálogo. Los parámetros inválidos se ignoran
+    (el formulario se devuelve para que la API pueda informar los errores).
+    """
+    config = CATALOGO_PESTANAS[pestana]
+    form = config["formulario"](parametros, prefix=config["prefijo"])
+    form.is_valid()
+    datos = form.cleaned_data
+
+    base = config["queryset"]()
+    pagina = paginar_keyset(
+        filtrar(base, config["filtros"], datos),
+        ORDENES_CATALOGO[datos.get("orden") or ORDEN_CATALOGO_DEFECTO],
+        cursor=cursor,
+        tamano=CATALOGO_TAMANO_PAGINA,
+    )
+    facetas = contar_facetas(base, config["filtros"], config["facetas"], datos) if con_facetas else None
+    return form, pagina, facetas
+
+
+def _filtros_de_pestana(parametros, pestana):
+    """Copia de los parámetros GET que pertenecen a los filtros de `pestana`."""
+    prefijo = CATALOGO_PESTANAS[pestana]["prefijo"] + "-"
+    filtros = QueryDict(mutable=True)
+    for nombre, valores in parametros.lists():
+        if nombre.startswith(prefijo):
+            filtros.setlist(nombre, valores)
+    return filtros
+
+
+@presupuesto_consultas(11)
 def catalogo(request):
-    productos = Producto.objects.filter(activo=True).select_related("proveedor").order_by("-id")
-    servicios = Servicio.objects.filter(activo=True).select_related("proveedor").order_by("-id")
+    """
+    Primera página de cada pestaña, con filtros y conteo por faceta.
+    Las siguientes páginas se piden a api_catalogo usando el cursor del contexto.
+    """
+    form_productos, pagina_productos, facetas_productos = _consultar_catalogo("productos", request.GET)
+    form_servicios, pagina_servicios, facetas_servicios = _consultar_catalogo("servicios", request.GET)
+
+    filtros_query = request.GET.copy()
+    filtros_query.pop("cursor", None)
+    pestana_activa = request.GET.get("pestana")
 
     return render(request, "plataforma/catalogo.html", {
-        "productos": productos,
-        "servicios": servicios,
+        "productos": pagina_productos.objetos,
+        "servicios": pagina_servicios.objetos,
+        "cursor_productos": pagina_productos.siguiente_cursor,
+        "cursor_servicios": pagina_servicios.siguiente_cursor,
+        "form_productos": form_productos,
+        "form_servicios": form_servicios,
+        "facetas_productos": facetas_productos,
+        "facetas_servicios": facetas_servicios,
+        # Al filtrar una pestaña se conservan los filtros de la otra
+        "conservar_en_productos": _filtros_de_pestana(request.GET, "servicios"),
+        "conservar_en_servicios": _filtros_de_pestana(request.GET, "productos"),
+        "filtros_query": filtros_query.urlencode(),
+        "pestana_activa": pestana_activa if pestana_activa in CATALOGO_PESTANAS else "productos",
     })
 
 
+def api_catalogo(request, pestana):
+    """
+    API JSON para cargar páginas del catálogo bajo demanda.
+    GET ?cursor=<cursor opaco>&<filtros> devuelve la página siguiente a ese cursor.
+    Los filtros llevan el prefijo de la pestaña (p-comuna, s-tipo_servicio...).
+    Sin cursor (primera página) también devuelve el conteo por faceta.
+    """
+    if pestana not in CATALOGO_PESTANAS:
+        return JsonResponse({"ok": False, "mensaje": "Pestaña no válida."}, status=404)
+
+    cursor = request.GET.get("cursor") or None
+    try:
+        form, pagina, facetas = _consultar_catalogo(
+            pestana, request.GET, cursor=cursor, con_facetas=cursor is None
+        )
+    except CursorInvalido as e:
+        return JsonResponse({"ok": False, "mensaje": str(e)}, status=400)
+
+    if form.errors:
+        return JsonResponse(
+            {"ok": False, "mensaje": "Filtros inválidos.", "errores": form.errors},
+            status=400,
+        )
+
+    data = {
+        "ok": True,
+        "resultados": [CATALOGO_PESTANAS[pestana]["a_dict"](obj) for obj in pagina.objetos],
+        "siguiente_cursor": pagina.siguiente_cursor,
+    }
+    if facetas is not None:
+        data["facetas"] = facetas
+    return JsonResponse(data)
 
+
+BUSQUEDA_LIMITE = 30
+
+
+def buscar(request):
+    q = request.GET.get("q", "").strip()
+    resultados = buscar_publicaciones(q, limite=BUSQUEDA_LIMITE) if q else []
+    return render(request, "plataforma/buscar.html", {"q": q, "resultados": resultados})
+
+
+def api_buscar(request):
+    """
+    API JSON de búsqueda: GET ?q=<texto> devuelve productos, servicios y
+    proveedores ordenados por relevancia.
+    """
+    q = request.GET.get("q", "").strip()
+    if not q:
+        return JsonResponse({"ok": False, "mensaje": "Falta el texto a buscar."}, status=400)
+    return JsonResponse({"ok": True, "resultados": buscar_publicaciones(q, limite=BUSQUEDA_LIMITE)})
+
+
+@presupuesto_consultas(4)
 def detalle_proveedor(request, proveedor_id):
-    proveedor = get_object_or_404(Proveedor, pk=proveedor_id)
-    productos = proveedor.productos.filter(activo=True)
+    proveedor = get_object_or_404(
+        Proveedor.objects.select_related("comuna"), pk=proveedor_id
+    )
+    productos = proveedor.productos.filter(activo=True).select_related("comuna")
     contexto = {"proveedor": proveedor, "productos": productos}
     return render(request, "plataforma/detalle_proveedor.html", contexto)
 
 
+EDUCATIVO_TAMANO_PAGINA = 12
+EDUCATIVO_ORDEN = ("-fecha_publicacion", "-id")
+
+
+# La página incluye el menú del usuario, pero el ETag no: leer request.user
+# cargaría la sesión y el usuario, y el 304 dejaría de ser barato. Cada
+# variante queda separada por Vary: Cookie (una sesión nueva no reutiliza la
+# copia de otra).
+def _etag_educativo_lista(request):
+    cantidad, actualizado = metadatos_lista()
+    marca = actualizado.timestamp() if actualizado else 0
+    return f"{cantidad}-{marca}-{request.GET.get('cursor', '')}"
+
+
+def _modificado_educativo_lista(request):
+    return metadatos_lista()[1]
+
+
+def _etag_educativo_detalle(request, slug):
+    meta = metadatos_contenido(slug)
+    if meta is None:
+        return None
+    contenido_id, actualizado, preguntas = meta
+    return f"{contenido_id}-{actualizado.timestamp()}-{preguntas}"
+
+
+def _modificado_educativo_detalle(request, slug):
+    meta = metadatos_contenido(slug)
+    return meta[1] if meta else None
+
+
+@vary_on_cookie
+@cache_control(no_cache=True)
+@condition(etag_func=_etag_educativo_lista, last_modified_func=_modificado_educativo_lista)
 def educativo_lista(request):
-    contenidos = ContenidoEducativo.objects.filter(activo=True)
+    try:
+        pagina = paginar_keyset(
+            ContenidoEducativo.objects.filter(activo=True),
+            EDUCATIVO_ORDEN,
+            cursor=request.GET.get("cursor"),
+            tamano=EDUCATIVO_TAMANO_PAGINA,
+        )
+    except CursorInvalido:
+        return redirect("plataforma:educativo_lista")
     return render(
-        request, "plataforma/educativo_lista.html", {"contenidos": contenidos}
+        request,
+        "plataforma/educativo_lista.html",
+        {"contenidos": pagina.objetos, "siguiente_cursor": pagina.siguiente_cursor},
     )
 
 
+@vary_on_cookie
+@cache_control(no_cache=True)
+@condition(etag_func=_etag_educativo_detalle, last_modified_func=_modificado_educativo_detalle)
 def educativo_detalle(request, slug):
+    """
+    Si el navegador ya tiene la versión vigente, `condition` responde 304 usando
+    solo los metadatos en caché. El texto renderizado se guarda como fragmento.
+    """
     contenido = get_object_or_404(ContenidoEducativo, slug=slug, activo=True)
     return render(
         request,
         "plataforma/educativo_detalle.html",
-        {"contenido": contenido},
+        {"contenido": contenido, "fragmento_timeout": CACHE_EDUCATIVO_TIMEOUT},
     )
 
 
+@require_http_methods(["GET", "POST"])
 def quiz(request, slug):
+    """
+    GET muestra el quiz (y el resultado de un intento propio con ?intento=<id>).
+    POST corrige el intento completo contra la clave en caché y redirige (PRG).
+    """
     contenido = get_object_or_404(ContenidoEducativo, slug=slug, activo=True)
+
+    if request.method == "POST":
+        if not request.user.is_authenticated:
+            return redirect("plataforma:login")
+        intento = registrar_intento(request.user, contenido.id, request.POST)
+        return redirect(f"{reverse('plataforma:quiz', args=[slug])}?intento={intento.id}")
+
+    intento = None
+    if request.user.is_authenticated and request.GET.get("intento", "").isdigit():
+        intento = QuizIntentoUsuario.objects.filter(
+            pk=request.GET["intento"], usuario=request.user, contenido=contenido
+        ).first()
+
     preguntas = contenido.preguntas.prefetch_related("opciones")
     return render(
         request,
         "plataforma/quiz.html",
-        {"contenido": contenido, "preguntas": preguntas},
+        {"contenido": contenido, "preguntas": preguntas, "intento": intento},
     )
 
 
@@ -141,28 +427,66 @@ def registro_view(request):
         if form_usuario.is_valid():
             usuario = form_usuario.save()
             PerfilUsuario.objects.get_or_create(usuario=usuario)
+            # El envío lo hace el worker `enviar_correos`; la vista no espera al SMTP
+            encolar_verificacion(usuario)
             login(request, usuario)
             messages.success(
                 request,
-                "Tu cuenta ha sido creada correctamente. "
+                "Tu cuenta ha sido creada correctamente. Te enviamos un correo para verificarla. "
                 "Ahora puedes completar tu rol comercial en 'Configuración de cuenta'.",
             )
             return redirect("plataforma:panel_usuario")
     else:
         form_usuario = RegistroUsuarioForm()
 
-    comunas = Comuna.objects.values("id", "nombre", "region_id")
-
     return render(
         request,
         "plataforma/registro.html",
         {
             "form_usuario": form_usuario,
-            "comunas": list(comunas),
+            # Las comunas por región se piden al bundle de referencias (cacheado en el navegador)
+            "referencias_version": datos_referencia().version,
         },
     )
 
 
+def verificar_email(request, uidb64, token):
+    try:
+        usuario = Usuario.objects.get(pk=force_str(urlsafe_base64_decode(uidb64)))
+    except (TypeError, ValueError, OverflowError, Usuario.DoesNotExist):
+        usuario = None
+
+    # El token incluye email_verificado: una vez usado deja de ser válido
+    verificado = usuario is not None and email_verification_token.check_token(usuario, token)
+    if verificado:
+        usuario.marcar_email_verificado()
+
+    return render(
+        request,
+        "plataforma/verificar_email.html",
+        {"verificado": verificado},
+        status=200 if verificado else 400,
+    )
+
+
+@login_required
+def verificacion_pendiente(request):
+    """
+    Único destino de una cuenta bloqueada por no verificar el correo (ver
+    BloqueoPorNoVerificarEmailMiddleware): desde aquí pide un enlace nuevo.
+    """
+    if request.user.email_verificado:
+        return redirect("plataforma:panel_usuario")
+    return render(request, "plataforma/verificacion_pendiente.html")
+
+
+@login_required
+@require_POST
+def reenviar_verificacion(request):
+    if not request.user.email_verificado:
+        encolar_verificacion(request.user)
+        messages.success(request, "Te enviamos un nuevo correo de verificación.")
+    return redirect("plataforma:verificacion_pendiente")
 
 
 @login_required
@@ -226,8 +550,8 @@ def configuracion_cuenta(request):
             "form_perfil": form_perfil,
             "form_solicitud": form_solicitud,
             "solicitud_actual": solicitud_existente,
-            "puede_productos": es_proveedor(request.user),
-            "puede_servicios": es_prestador(request.user),
+            "puede_productos": request.roles.es_proveedor,
+            "puede_servicios": request.roles.es_prestador,
 
         }
     )
@@ -239,50 +563,216 @@ def desactivar_comercial(usuario):
     - Despublica productos/servicios (activo=False)
     - Normaliza tipo_usuario
     """
-    proveedor = Proveedor.objects.filter(usuario=usuario).first()
-    if not proveedor:
-        usuario.tipo_usuario = "usuario"
-        usuario.save(update_fields=["tipo_usuario"])
-        return
+    desactivar_comerciales([usuario.pk])
 
-    proveedor.estado = Proveedor.EstadoProveedor.INACTIVO
-    proveedor.es_proveedor_biocombustible = False
-    proveedor.es_prestador_servicios = False
-    proveedor.save(update_fields=["estado", "es_proveedor_biocombustible", "es_prestador_servicios"])
+# ================== API AUXILIAR COMUNAS ==================
 
-    Producto.objects.filter(proveedor=proveedor).update(activo=False)
-    Servicio.objects.filter(proveedor=proveedor).update(activo=False)
+# Las URLs de referencias llevan ?v=<versión>, así que pueden cachearse largo
+REFERENCIAS_MAX_AGE = 60 * 60 * 24
 
-    usuario.tipo_usuario = "usuario"
-    usuario.save(update_fields=["tipo_usuario"])
 
-# ================== API AUXILIAR COMUNAS ==================
+def _etag_comunas(request, region_id):
+    return datos_referencia().etag_region(region_id)
 
 
+def _etag_referencias(request):
+    return datos_referencia().version
+
+
+@cache_control(public=True, max_age=REFERENCIAS_MAX_AGE)
+@condition(etag_func=_etag_comunas)
 def api_comunas_por_region(request, region_id):
-    comunas = Comuna.objects.filter(region_id=region_id).order_by("nombre")
-    data = [{"id": c.id, "nombre": c.nombre} for c in comunas]
+    data = datos_referencia().comunas_por_region.get(region_id, [])
     return JsonResponse(data, safe=False)
 
 
+@cache_control(public=True, max_age=REFERENCIAS_MAX_AGE)
+@condition(etag_func=_etag_referencias)
+def api_referencias(request):
+    """
+    Bundle JSON con todas las regiones y comunas, para que los formularios
+    lo pidan una vez y el navegador lo guarde.
+    """
+    return HttpResponse(datos_referencia().contenido, content_type="application/json")
+
+
+# ================== API BÚSQUEDA POR CERCANÍA ==================
+
+CERCANOS_RADIO_KM = 25
+CERCANOS_LIMITE = 50
+
+
+def _perfil_ubicacion(user):
+    """
+    (lat, lon, comuna_id) guardados en el perfil, o None si no hay ubicación.
+    """
+    if not user.is_authenticated:
+        return None
+    perfil = (
+        PerfilUsuario.objects
+        .filter(usuario=user)
+        .values("latitud", "longitud", "comuna_id")
+        .first()
+    )
+    if not perfil or perfil["latitud"] is None or perfil["longitud"] is None:
+        return None
+    return perfil["latitud"], perfil["longitud"], perfil["comuna_id"]
+
+
+def api_cercanos(request):
+    """
+    API JSON "cerca de mí":
+    GET ?lat=&lon=&radio_km=&limite= devuelve proveedores y productos ordenados por distancia.
+    Sin lat/lon usa la ubicación del perfil del usuario autenticado.
+    """
+    form = BusquedaCercanaForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse(
+            {"ok": False, "mensaje": "Parámetros inválidos.", "errores": form.errors},
+            status=400,
+        )
+
+    datos = form.cleaned_data
+    if datos["lat"] is not None:
+        punto = (datos["lat"], datos["lon"])
+    else:
+        perfil = _perfil_ubicacion(request.user)
+        punto = perfil[:2] if perfil else None
+    if punto is None:
+        return JsonResponse(
+            {"ok": False, "mensaje": "Indica una ubicación (lat/lon) o guárdala en tu perfil."},
+            status=400,
+        )
+
+    lat, lon = punto
+    radio_km = datos["radio_km"] or CERCANOS_RADIO_KM
+    limite = datos["limite"] or CERCANOS_LIMITE
+
+    proveedores = [
+        {
+            "id": proveedor.id,
+            "nombre_comercial": proveedor.nombre_comercial,
+            "comuna": proveedor.comuna.nombre if proveedor.comuna else None,
+            "distancia_km": round(distancia, 2),
+            "url": reverse("plataforma:detalle_proveedor", args=[proveedor.id]),
+        }
+        for proveedor, distancia in proveedores_cercanos(lat, lon, radio_km, limite)
+    ]
+    productos = [
+        dict(_producto_a_dict(producto), distancia_km=round(distancia, 2))
+        for producto, distancia in productos_cercanos(lat, lon, radio_km, limite)
+    ]
+
+    return JsonResponse({
+        "ok": True,
+        "origen": {"lat": lat, "lon": lon, "radio_km": radio_km},
+        "proveedores": proveedores,
+        "productos": productos,
+    })
+
+
+# ================== API COTIZACIÓN DE ENVÍO ==================
+
+
+def api_cotizar_envio(request):
+    """
+    API JSON de cotización de despacho:
+    GET ?productos=1,2,3&lat=&lon=&comuna= devuelve un envío por proveedor y el total.
+    Sin lat/lon (ni comuna) usa la ubicación del perfil del usuario autenticado.
+    """
+    form = CotizacionEnvioForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse(
+            {"ok": False, "mensaje": "Parámetros inválidos.", "errores": form.errors},
+            status=400,
+        )
+
+    datos = form.cleaned_data
+    comuna_id = datos["comuna"]
+    if datos["lat"] is not None:
+        lat, lon = datos["lat"], datos["lon"]
+    else:
+        perfil = _perfil_ubicacion(request.user)
+        if perfil is None:
+            return JsonResponse(
+                {"ok": False, "mensaje": "Indica una ubicación (lat/lon) o guárdala en tu perfil."},
+                status=400,
+            )
+        lat, lon, comuna_perfil = perfil
+        comuna_id = comuna_id or comuna_perfil
+
+    cotizacion = cotizar_envio(lat, lon, datos["productos"], comuna_id=comuna_id)
+    return JsonResponse({
+        "ok": True,
+        "envios": [
+            dict(
+                envio,
+                tarifa_por_km=str(envio["tarifa_por_km"]),
+                tarifa_minima=str(envio["tarifa_minima"]),
+                costo=str(envio["costo"]),
+            )
+            for envio in cotizacion["envios"]
+        ],
+        "total": str(cotizacion["total"]),
+        "sin_cobertura": cotizacion["sin_cobertura"],
+    })
+
+
 # ================== SOLICITUDES (ADMIN) ==================
 
 
+SOLICITUDES_TAMANO_PAGINA = 50
+SOLICITUDES_ORDEN = ("-fecha_envio", "-id")
+
+
 @login_required
 @user_passes_test(es_admin)
+@presupuesto_consultas(2)
 def solicitudes_proveedores_view(request):
     """
-    Lista de solicitudes de proveedores / prestadores para el panel admin.
+    Cola de solicitudes de proveedores / prestadores para el panel admin,
+    filtrable por estado y tipo y paginada por keyset (índices solicitud_estado_fecha y solicitud_fecha).
     Aquí se usa el modal para ver/gestionar cada solicitud.
     """
-    solicitudes = SolicitudRolComercial.objects.all().order_by("-fecha_envio")
+    form = FiltroSolicitudesForm(request.GET)
+    form.is_valid()
+    solicitudes = filtrar(
+        SolicitudRolComercial.objects.select_related("usuario"),
+        FILTROS_SOLICITUD,
+        form.cleaned_data,
+    )
+    try:
+        pagina = paginar_keyset(
+            solicitudes,
+            SOLICITUDES_ORDEN,
+            cursor=request.GET.get("cursor"),
+            tamano=SOLICITUDES_TAMANO_PAGINA,
+        )
+    except CursorInvalido:
+        return redirect("plataforma:solicitudes_proveedores")
+
+    filtros_query = request.GET.copy()
+    filtros_query.pop("cursor", None)
     return render(
         request,
         "plataforma/solicitudes_proveedores.html",
-        {"solicitudes": solicitudes},
+        {
+            "solicitudes": pagina.objetos,
+            "siguiente_cursor": pagina.siguiente_cursor,
+            "hay_cursor": bool(request.GET.get("cursor")),
+            "form_filtros": form,
+            "filtros_query": filtros_query.urlencode(),
+            "pendientes": contar_pendientes(),
+        },
     )
 
 
+ESTADO_POR_ACCION = {
+    "aprobar": SolicitudRolComercial.EstadoSolicitud.APROBADA,
+    "rechazar": SolicitudRolComercial.EstadoSolicitud.RECHAZADA,
+}
+
+
 @login_required
 @user_passes_test(es_admin)
 def solicitud_proveedor_cambiar_estado(request, pk):
@@ -296,44 +786,22 @@ def solicitud_proveedor_cambiar_estado(request, pk):
     if request.method == "POST":
         accion = request.POST.get("accion")
         comentario = request.POST.get("comentario", "")
-        messages.success(
-            request,
-            f"Solicitud aprobada. {solicitud.usuario} fue aprobado como: {solicitud.get_tipo_solicitud_display()}.",)
-        if accion == "aprobar":
-            solicitud.estado = SolicitudRolComercial.EstadoSolicitud.APROBADA
-            solicitud.comentario_admin = comentario
-            solicitud.fecha_resolucion = timezone.now()
-            solicitud.save()
-
-            if solicitud.tipo_solicitud == 'PROVEEDOR':
-                solicitud.usuario.tipo_usuario = 'proveedor'
-            elif solicitud.tipo_solicitud == 'PRESTADOR':
-                solicitud.usuario.tipo_usuario = 'servicio'
-            elif solicitud.tipo_solicitud == 'AMBOS':
-                solicitud.usuario.tipo_usuario = 'ambos'
-
-            solicitud.usuario.save()
-
-
-            _crear_o_actualizar_proveedor_desde_solicitud(solicitud)
-
-            messages.success(request, "Solicitud aprobada y proveedor actualizado/creado.")
-        elif accion == "rechazar":
-            solicitud.estado = SolicitudRolComercial.EstadoSolicitud.RECHAZADA
-            solicitud.comentario_admin = comentario
-            solicitud.fecha_resolucion = timezone.now()
-            solicitud.save()
-
-            desactivar_comercial(solicitud.usuario)
-
-
-            messages.info(request, "Solicitud rechazada.")
+        if accion not in ("aprobar", "rechazar"):
+            messages.error(request, "Acción no válida.")
+            return redirect("plataforma:solicitudes_proveedores")
 
+        resultado = resolver_solicitudes([solicitud.pk], accion, comentario, solo_pendientes=False)
+        if resultado.omitidas:
+            messages.error(request, resultado.omitidas[solicitud.pk])
+        elif accion == "aprobar":
+            messages.success(
+                request,
+                f"Solicitud aprobada. {solicitud.usuario} fue aprobado como: {solicitud.get_tipo_solicitud_display()}.",
+            )
         else:
-            messages.error(request, "Acción no válida.")
+            messages.info(request, "Solicitud rechazada.")
 
         return redirect("plataforma:solicitudes_proveedores")
-    
 
     # GET: mostrar detalle simple
     return render(
@@ -389,70 +857,44 @@ def api_solicitud_detalle(request, pk):
             status=400,
         )
 
-    if accion == "aprobar":
-        solicitud.estado = SolicitudRolComercial.EstadoSolicitud.APROBADA
-    else:
-        solicitud.estado = SolicitudRolComercial.EstadoSolicitud.RECHAZADA
-
-    solicitud.comentario_admin = comentario
-    solicitud.fecha_resolucion = timezone.now()
-    solicitud.save()
-
-    if accion == "aprobar":
-        _crear_o_actualizar_proveedor_desde_solicitud(solicitud)
+    resultado = resolver_solicitudes([solicitud.pk], accion, comentario, solo_pendientes=False)
+    if resultado.omitidas:
+        return JsonResponse(
+            {"ok": False, "mensaje": resultado.omitidas[solicitud.pk]},
+            status=409,
+        )
+    estado = ESTADO_POR_ACCION[accion]
 
     return JsonResponse(
         {
             "ok": True,
             "mensaje": "Solicitud procesada correctamente.",
-            "nuevo_estado": solicitud.get_estado_display(),
+            "nuevo_estado": estado.label,
         }
     )
 
 
-def _crear_o_actualizar_proveedor_desde_solicitud(solicitud: SolicitudRolComercial):
-    usuario = solicitud.usuario
-
-    proveedor, _ = Proveedor.objects.get_or_create(
-        usuario=usuario,
-        defaults={
-            "razon_social": solicitud.nombre_comercio or usuario.get_full_name() or usuario.username,
-            "rut": usuario.rut or "11.111.111-1",
-            "nombre_comercial": solicitud.nombre_comercio or usuario.username,
-            "email_contacto": usuario.email or "",
-            "telefono_contacto": solicitud.datos_contacto or "",
-            "direccion_texto": solicitud.direccion_punto_venta or "",
-            "comuna": usuario.comuna,
-            "numero_sncl": (solicitud.datos_adicionales or {}).get("numero_sncl", ""),
-        },
-    )
-
-    # ---- Actualizar campos si vienen vacíos o si hay info nueva ----
-    if solicitud.nombre_comercio:
-        proveedor.nombre_comercial = solicitud.nombre_comercio
-        if not proveedor.razon_social:
-            proveedor.razon_social = solicitud.nombre_comercio
-
-    if usuario.email:
-        proveedor.email_contacto = usuario.email
-
-    if solicitud.datos_contacto:
-        proveedor.telefono_contacto = solicitud.datos_contacto
-
-    if solicitud.direccion_punto_venta:
-        proveedor.direccion_texto = solicitud.direccion_punto_venta
-
-    if usuario.comuna:
-        proveedor.comuna = usuario.comuna
-
-    # ---- Flags según tipo ----
-    proveedor.es_proveedor_biocombustible = solicitud.tipo_solicitud in ["PROVEEDOR", "AMBOS"]
-    proveedor.es_prestador_servicios = solicitud.tipo_solicitud in ["PRESTADOR", "AMBOS"]
-
-    proveedor.fecha_aprobacion = timezone.now()
-    proveedor.estado = Proveedor.EstadoProveedor.ACTIVO
-    proveedor.save()
-
+@login_required
+@user_passes_test(es_admin)
+@require_POST
+def api_solicitudes_resolver(request):
+    """
+    Aprueba o rechaza muchas solicitudes pendientes en una transacción
+    (ids=1,2,3&accion=aprobar|rechazar&comentario=...). Las que no se pueden
+    resolver vuelven en `omitidas` con el motivo.
+    """
+    form = ResolucionSolicitudesForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({"ok": False, "errores": form.errors}, status=400)
+
+    datos = form.cleaned_data
+    resultado = resolver_solicitudes(datos["ids"], datos["accion"], datos["comentario"])
+    return JsonResponse({
+        "ok": True,
+        "nuevo_estado": ESTADO_POR_ACCION[datos["accion"]].label,
+        "resueltas": resultado.resueltas,
+        "omitidas": [{"id": pk, "motivo": motivo} for pk, motivo in resultado.omitidas.items()],
+    })
 
 
 # ================== PANELES (USUARIO / PROVEEDOR / ADMIN) ==================
@@ -466,16 +908,22 @@ def panel_usuario(request):
 @login_required
 @user_passes_test(es_admin)
 def panel_admin(request):
-    return render(request, "plataforma/panel_admin.html")
+    return render(request, "plataforma/panel_admin.html", {"pendientes": contar_pendientes()})
 
 
 @login_required
+@presupuesto_consultas(3)
 def panel_proveedor(request):
-    if not es_proveedor(request.user) and not es_prestador(request.user):
+    if not request.roles.es_comercial:
         return redirect("plataforma:home")
 
-    productos = Producto.objects.filter(proveedor__usuario=request.user)
-    servicios = Servicio.objects.filter(proveedor__usuario=request.user)
+    # p.comuna se pinta con Comuna.__str__, que usa la región
+    productos = (
+        Producto.objects
+        .filter(proveedor_id=request.roles.proveedor_id)
+        .select_related("comuna__region")
+    )
+    servicios = Servicio.objects.filter(proveedor_id=request.roles.proveedor_id)
 
     return render(
         request,
@@ -489,14 +937,14 @@ def panel_proveedor(request):
 
 @login_required
 def producto_crear(request):
-    if not es_proveedor(request.user):
+    if not request.roles.es_proveedor:
         return redirect("plataforma:home")
 
     if request.method == "POST":
         form = ProductoForm(request.POST or None, user=request.user)
         if form.is_valid():
             producto = form.save(commit=False)
-            producto.proveedor = request.user.proveedor
+            producto.proveedor_id = request.roles.proveedor_id
             producto.save()
             messages.success(request, "Producto creado correctamente.")
             return redirect("plataforma:panel_proveedor")
@@ -512,10 +960,10 @@ def producto_crear(request):
 
 @login_required
 def producto_editar(request, pk):
-    if not es_proveedor(request.user):
+    if not request.roles.es_proveedor:
         return redirect("plataforma:home")
 
-    producto = get_object_or_404(Producto, pk=pk, proveedor__usuario=request.user)
+    producto = get_object_or_404(Producto, pk=pk, proveedor_id=request.roles.proveedor_id)
 
     if request.method == "POST":
         form = ProductoForm(request.POST or None, instance=producto, user=request.user)
@@ -535,10 +983,10 @@ def producto_editar(request, pk):
 
 @login_required
 def producto_eliminar(request, pk):
-    if not es_proveedor(request.user):
+    if not request.roles.es_proveedor:
         return redirect("plataforma:home")
 
-    producto = get_object_or_404(Producto, pk=pk, proveedor__usuario=request.user)
+    producto = get_object_or_404(Producto, pk=pk, proveedor_id=request.roles.proveedor_id)
 
     if request.method == "POST":
         producto.delete()
@@ -553,17 +1001,50 @@ def producto_eliminar(request, pk):
 
 
 
+@login_required
+@require_http_methods(["GET", "POST"])
+def productos_importar(request):
+    if not request.roles.es_proveedor:
+        return redirect("plataforma:home")
+
+    resultado = None
+    if request.method == "POST":
+        form = ImportarProductosForm(request.POST, request.FILES)
+        if form.is_valid():
+            resultado = importar_productos(request.roles.proveedor_id, form.cleaned_data["archivo"])
+    else:
+        form = ImportarProductosForm()
+
+    return render(
+        request,
+        "plataforma/productos_importar.html",
+        {"form": form, "resultado": resultado, "columnas": COLUMNAS_CSV_PRODUCTOS},
+    )
+
+
+@login_required
+def productos_exportar(request):
+    if not request.roles.es_proveedor:
+        return redirect("plataforma:home")
+
+    respuesta = StreamingHttpResponse(
+        exportar_productos(request.roles.proveedor_id),
+        content_type="text/csv; charset=utf-8",
+    )
+    respuesta["Content-Disposition"] = 'attachment; filename="productos.csv"'
+    return respuesta
+
 
 @login_required
 def servicio_crear(request):
-    if not es_prestador(request.user):
+    if not request.roles.es_prestador:
         return redirect("plataforma:home")
 
     if request.method == "POST":
         form = ServicioForm(request.POST)
         if form.is_valid():
             servicio = form.save(commit=False)
-            servicio.proveedor = request.user.proveedor
+            servicio.proveedor_id = request.roles.proveedor_id
             servicio.save()
             messages.success(request, "Servicio creado correctamente.")
             return redirect("plataforma:panel_proveedor")
@@ -579,10 +1060,10 @@ def servicio_crear(request):
 
 @login_required
 def servicio_editar(request, pk):
-    if not es_prestador(request.user):
+    if not request.roles.es_prestador:
         return redirect("plataforma:home")
 
-    servicio = get_object_or_404(Servicio, pk=pk, proveedor__usuario=request.user)
+    servicio = get_object_or_404(Servicio, pk=pk, proveedor_id=request.roles.proveedor_id)
 
     if request.method == "POST":
         form = ServicioForm(request.POST, instance=servicio)
@@ -603,16 +1084,117 @@ def servicio_editar(request, pk):
 @login_required
 @require_POST
 def servicio_eliminar(request, pk):
-    if not es_prestador(request.user):
+    if not request.roles.es_prestador:
         return redirect("plataforma:home")
 
-    servicio = get_object_or_404(Servicio, pk=pk, proveedor__usuario=request.user)
+    servicio = get_object_or_404(Servicio, pk=pk, proveedor_id=request.roles.proveedor_id)
     servicio.delete()
     messages.success(request, "Servicio eliminado.")
     return redirect("plataforma:panel_proveedor")
 
 
 
+# ================== CARRITO Y PEDIDOS ==================
+
+PEDIDOS_TAMANO_PAGINA = 20
+PEDIDOS_ORDEN = ("-fecha_creacion", "-id")
+
+
+def _render_carrito(request, error=None, status=200):
+    ubicacion = _perfil_ubicacion(request.user)
+    items = items_carrito(request.user)
+    return render(
+        request,
+        "plataforma/carrito.html",
+        {
+            "items": items,
+            "total": total_carrito(request.user) if items else 0,
+            "tiene_ubicacion": ubicacion is not None,
+            "error": error,
+        },
+        status=status,
+    )
+
+
+@login_required
+def carrito(request):
+    return _render_carrito(request)
+
+
+@login_required
+@require_POST
+def carrito_agregar(request, producto_id):
+    form = CantidadCarritoForm(request.POST)
+    if form.is_valid() and form.cleaned_data["cantidad"] > 0:
+        producto = get_object_or_404(Producto.objects.only("id"), pk=producto_id, activo=True)
+        agregar_al_carrito(request.user, producto.pk, form.cleaned_data["cantidad"])
+    return redirect("plataforma:carrito")
+
+
+@login_required
+@require_POST
+def carrito_cantidad(request, producto_id):
+    form = CantidadCarritoForm(request.POST)
+    if form.is_valid():
+        fijar_cantidad(request.user, producto_id, form.cleaned_data["cantidad"])
+    return redirect("plataforma:carrito")
+
+
+@login_required
+@require_POST
+def carrito_confirmar(request):
+    form = CheckoutForm(request.POST)
+    if not form.is_valid():
+        return _render_carrito(request, error="Ubicación de despacho inválida.", status=400)
+
+    datos = form.cleaned_data
+    comuna_id = datos["comuna"]
+    if datos["lat"] is not None:
+        lat, lon = datos["lat"], datos["lon"]
+    else:
+        perfil = _perfil_ubicacion(request.user)
+        if perfil is None:
+            return _render_carrito(
+                request, error="Guarda tu ubicación en el perfil para calcular el despacho.", status=400
+            )
+        lat, lon, comuna_perfil = perfil
+        comuna_id = comuna_id or comuna_perfil
+
+    try:
+        confirmar_compra(request.user, lat, lon, comuna_id=comuna_id)
+    except (CompraInvalida, StockInsuficiente) as error:
+        return _render_carrito(request, error=str(error), status=409)
+    return redirect("plataforma:mis_pedidos")
+
+
+@login_required
+def mis_pedidos(request):
+    try:
+        pagina = paginar_keyset(
+            Pedido.objects
+            .filter(usuario=request.user)
+            .select_related("proveedor")
+            .prefetch_related("lineas"),
+            PEDIDOS_ORDEN,
+            cursor=request.GET.get("cursor"),
+            tamano=PEDIDOS_TAMANO_PAGINA,
+        )
+    except CursorInvalido:
+        return redirect("plataforma:mis_pedidos")
+    return render(
+        request,
+        "plataforma/pedidos.html",
+        {"pedidos": pagina.objetos, "siguiente_cursor": pagina.siguiente_cursor},
+    )
+
+
+@login_required
+@require_POST
+def pedido_cancelar(request, pk):
+    cancelar_pedido(request.user, pk)
+    return redirect("plataforma:mis_pedidos")
+
+
 # ================== CONTENIDO EDUCATIVO (ADMIN) ==================
 
 
@@ -627,6 +1209,32 @@ def educativo_admin_lista(request):
     )
 
 
+@login_required
+@user_passes_test(es_admin)
+@presupuesto_consultas(6)
+def educativo_admin_estadisticas(request, pk):
+    """
+    Reporte del quiz de un contenido. Lee solo las tablas de resumen, así que
+    cuesta lo mismo sin importar cuántos intentos se hayan registrado.
+    """
+    contenido = get_object_or_404(ContenidoEducativo.objects.select_related("estadistica"), pk=pk)
+    estadistica = getattr(contenido, "estadistica", None)
+    distribucion = list(contenido.distribucion_puntajes.all())
+    maximo = max((fila.cantidad for fila in distribucion), default=0)
+    preguntas = contenido.preguntas.select_related("estadistica")
+    return render(
+        request,
+        "plataforma/educativo_admin_estadisticas.html",
+        {
+            "contenido": contenido,
+            "estadistica": estadistica,
+            "distribucion": distribucion,
+            "distribucion_maximo": maximo,
+            "preguntas": preguntas,
+        },
+    )
+
+
 @login_required
 @user_passes_test(es_admin)
 def educativo_admin_crear(request):
@@ -677,4 +1285,3 @@ def educativo_admin_eliminar(request, pk):
     contenido.delete()
     messages.success(request, "Contenido eliminado correctamente.")
     return redirect("plataforma:educativo_admin_lista")
-